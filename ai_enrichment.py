@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Project enrichment plugins for generate_static_html.py --use-ai.
+
+An enricher receives one project entry at a time and returns extra fields
+for it (a summary, tags, ...). EnrichmentRunner runs enrichers concurrently
+with asyncio under a concurrency limit and keeps a persistent cache keyed by
+a hash of the entry content, so only new or changed projects are sent to the
+backend on the next build.
+
+Backends are selected by name ("stub") or as "module:attribute", where the
+attribute is an Enricher subclass or instance importable from the module.
+"""
+
+import asyncio
+import hashlib
+import importlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+DEFAULT_CONCURRENCY = 8
+DEFAULT_BACKEND = "stub"
+# Groups inside a category that hold the project entries
+PROJECT_GROUPS = ("empresas", "itens")
+
+class Enricher:
+    """Base class for enrichment backends.
+
+    Subclasses set name, bump version whenever their output for the same
+    entry changes (this invalidates cached results), and implement enrich.
+    Blocking clients should be run through loop.run_in_executor so they do not
+    stall the other requests.
+    """
+
+    name = "base"
+    version = "1"
+
+    async def enrich(self, project: dict, categoria: str) -> dict:
+        """Return the fields to add to project; existing fields are never overwritten."""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """Release clients or sessions once a run is done."""
+
+class StubEnricher(Enricher):
+    """Offline backend: deterministic summary and tags built from the entry itself.
+
+    delay simulates the latency of a remote service.
+    """
+
+    name = "stub"
+    version = "1"
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    async def enrich(self, project: dict, categoria: str) -> dict:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        title = project.get("nome") or project.get("descricao") or "Projeto"
+        details = [project.get(k) for k in ("localizacao", "empresa", "periodo", "data") if project.get(k)]
+        summary = f"{title} ({categoria})"
+        if details:
+            summary += ": " + ", ".join(str(d) for d in details)
+        return {"resumo": summary, "tags": [categoria] + ([project["tipo"]] if project.get("tipo") else [])}
+
+ENRICHERS = {
+    "stub": StubEnricher,
+}
+
+def load_enricher(spec: str) -> Enricher:
+    """Instantiate a backend from a registered name or a "module:attribute" spec."""
+    if spec in ENRICHERS:
+        return ENRICHERS[spec]()
+    module_name, _, attribute = spec.partition(":")
+    if not attribute:
+        raise ValueError(f"Unknown enrichment backend {spec!r} (expected one of {sorted(ENRICHERS)} or module:attribute)")
+    backend = getattr(importlib.import_module(module_name), attribute)
+    enricher = backend() if isinstance(backend, type) else backend
+    if not isinstance(enricher, Enricher):
+        raise TypeError(f"{spec} is not an Enricher")
+    return enricher
+
+def entry_key(enricher: Enricher, project: dict, categoria: str) -> str:
+    """Cache key: the backend, its version and the canonical JSON of the entry."""
+    payload = json.dumps(
+        [enricher.name, enricher.version, categoria, project],
+        sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class EnrichmentCache:
+    """Persistent enrichment results keyed by entry_key.
+
+    Saving keeps every loaded entry unless told to prune, which writes back
+    only the entries used since loading so results for removed or edited
+    projects do not accumulate. Only a run that covered the whole portfolio
+    may prune; a partial one would drop results for the projects it skipped.
+    """
+
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        self.used: Dict[str, dict] = {}
+
+    @classmethod
+    def load(cls, path: Optional[Path]) -> "EnrichmentCache":
+        """Load a cache from disk, starting empty if it is missing or invalid."""
+        cache = cls(path)
+        if path is not None and path.exists():
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+                if data.get("version") == CACHE_VERSION:
+                    cache.entries = data.get("entries", {})
+                else:
+                    logger.info(f"Ignoring enrichment cache with unknown version: {path}")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read enrichment cache {path}: {e}")
+        return cache
+
+    def get(self, key: str) -> Optional[dict]:
+        result = self.entries.get(key)
+        if result is not None:
+            self.used[key] = result
+        return result
+
+    def put(self, key: str, result: dict) -> None:
+        self.entries[key] = self.used[key] = result
+
+    def save(self, prune: bool = False) -> None:
+        """Write the entries atomically; with prune, only those used since loading."""
+        if self.path is None:
+            return
+        data = {"version": CACHE_VERSION, "entries": self.used if prune else self.entries}
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+def iter_entries(projetos) -> Iterable[Tuple[List[dict], int]]:
+    """Yield (group list, index) for every project entry of a category."""
+    if not isinstance(projetos, list):
+        return
+    for item in projetos:
+        if not isinstance(item, dict):
+            continue
+        for group in PROJECT_GROUPS:
+            entries = item.get(group)
+            if isinstance(entries, list):
+                for index, project in enumerate(entries):
+                    if isinstance(project, dict):
+                        yield entries, index
+                break
+
+class EnrichmentRunner:
+    """Enriches project entries in place through an Enricher, with caching.
+
+    Counters (cached, enriched, failed) accumulate over every call until the
+    runner is closed, which also closes the enricher and saves the cache.
+    Every call runs on the same event loop, so an enricher holding a session
+    can keep it open across the categories of a streamed build.
+    """
+
+    def __init__(self, enricher: Enricher, cache_path: Optional[Path] = None,
+                 concurrency: int = DEFAULT_CONCURRENCY):
+        self.enricher = enricher
+        self.cache = EnrichmentCache.load(cache_path)
+        self.concurrency = max(1, concurrency)
+        self.cached = 0
+        self.enriched = 0
+        self.failed = 0
+        self.duration = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _enrich_all(self, pending: List[Tuple[str, str, List[dict], int]]) -> None:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def enrich_one(key: str, categoria: str, entries: List[dict], index: int) -> None:
+            project = entries[index]
+            async with semaphore:
+                try:
+                    result = await self.enricher.enrich(dict(project), categoria)
+                except Exception as e:
+                    # One failing project must not fail the build; it is retried next run
+                    self.failed += 1
+                    logger.warning(f"Enrichment failed for {project.get('nome') or project.get('descricao')!r}: {e}")
+                    return
+            self.cache.put(key, result)
+            self.enriched += 1
+            entries[index] = {**result, **project}
+
+        await asyncio.gather(*(enrich_one(*task) for task in pending))
+
+    def enrich(self, categories: Iterable[Tuple[str, object]]) -> None:
+        """Enrich every project of the given (categoria, projetos) pairs in place."""
+        start_time = time.perf_counter()
+        pending = []
+        for categoria, projetos in categories:
+            for entries, index in iter_entries(projetos):
+                key = entry_key(self.enricher, entries[index], categoria)
+                result = self.cache.get(key)
+                if result is None:
+                    pending.append((key, categoria, entries, index))
+                else:
+                    self.cached += 1
+                    entries[index] = {**result, **entries[index]}
+        if pending:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+            self._loop.run_until_complete(self._enrich_all(pending))
+        self.duration += time.perf_counter() - start_time
+
+    def enrich_portfolio(self, data: dict) -> dict:
+        self.enrich(data.items())
+        return data
+
+    def enrich_category(self, categoria: str, projetos):
+        self.enrich([(categoria, projetos)])
+        return projetos
+
+    def close(self, prune: bool = False) -> None:
+        """Close the enricher and the event loop, then save the cache.
+
+        prune drops cached results not used by this runner; pass it only when
+        every project of the portfolio went through the runner.
+        """
+        loop = self._loop or asyncio.new_event_loop()
+        self._loop = None
+        try:
+            loop.run_until_complete(self.enricher.close())
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            loop.close()
+            self.cache.save(prune)
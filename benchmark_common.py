@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the benchmark scripts (benchmark_images.py,
+benchmark_generator.py and benchmark_server.py).
+Runs configurations in fresh processes, describes the environment, and
+handles the -o/--baseline/--threshold options with a per-benchmark
+RegressionCheck. Memory and CPU measurements live in resource_usage.py.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import platform
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 0.10
+# Direction of a compared metric
+LOWER_IS_BETTER = "lower"
+HIGHER_IS_BETTER = "higher"
+
+def environment(**extra) -> dict:
+    """Python, platform and CPU count, plus benchmark-specific entries."""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": multiprocessing.cpu_count(),
+        **extra,
+    }
+
+def _run_child(target: Callable[..., dict], args: tuple, conn) -> None:
+    conn.send(target(*args))
+    conn.close()
+
+def run_isolated(target: Callable[..., dict], *args) -> dict:
+    """Call target(*args) in a fresh spawned process and return its result.
+
+    Each configuration gets its own process so peak RSS, caches and imports
+    are not shared between runs; target must be a module-level function.
+    """
+    context = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    process = context.Process(target=_run_child, args=(target, args, child_conn))
+    process.start()
+    child_conn.close()
+    try:
+        result = parent_conn.recv()
+    except EOFError:
+        process.join()
+        raise RuntimeError(f"{target.__name__} exited with code {process.exitcode}") from None
+    process.join()
+    return result
+
+def best_of(repeat: int, metric: str, target: Callable[..., dict], *args) -> dict:
+    """Run target in isolation repeat times and keep the run with the lowest metric."""
+    runs = [run_isolated(target, *args) for _ in range(max(1, repeat))]
+    return min(runs, key=lambda run: run[metric])
+
+def add_baseline_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("-o", "--output", type=Path,
+                        help="Write results to this JSON file (usable as a later --baseline)")
+    parser.add_argument("--baseline", type=Path,
+                        help="Compare against results from a previous run")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Allowed relative regression against the baseline (default: {DEFAULT_THRESHOLD})")
+
+@dataclass
+class RegressionCheck:
+    """How one benchmark's runs are matched and compared with a baseline.
+
+    keys identify a configuration (runs with equal keys are compared),
+    metrics maps each compared metric to LOWER_IS_BETTER or HIGHER_IS_BETTER,
+    and settings_key names the results entry that must match for the
+    comparison to be meaningful. Metrics below their noise_floor in both runs
+    are skipped.
+    """
+
+    keys: Tuple[str, ...]
+    metrics: Dict[str, str]
+    settings_key: str = "settings"
+    noise_floor: Dict[str, float] = field(default_factory=dict)
+
+    def label(self, run: dict) -> str:
+        first, *rest = self.keys
+        return " ".join([str(run[first])] + [f"x{run[key]}" for key in rest])
+
+    def compare(self, runs: List[dict], baseline: dict, threshold: float) -> List[str]:
+        """Return a message for every metric more than threshold worse than the baseline."""
+        previous = {tuple(r[key] for key in self.keys): r for r in baseline.get("runs", [])}
+        regressions = []
+        for run in runs:
+            old = previous.get(tuple(run[key] for key in self.keys))
+            if old is None:
+                continue
+            for metric, direction in self.metrics.items():
+                if not old.get(metric) or run.get(metric) is None:
+                    continue
+                if max(old[metric], run[metric]) < self.noise_floor.get(metric, 0):
+                    continue
+                change = run[metric] / old[metric] - 1
+                if direction == HIGHER_IS_BETTER:
+                    change = -change
+                if change > threshold:
+                    regressions.append(
+                        f"{self.label(run)}: {metric} {old[metric]:.2f} -> {run[metric]:.2f} "
+                        f"({'-' if direction == HIGHER_IS_BETTER else '+'}{change * 100:.1f}%)"
+                    )
+        return regressions
+
+    def finish(self, args: argparse.Namespace, results: dict) -> int:
+        """Save results to --output and check them against --baseline; returns the exit code."""
+        if args.output:
+            args.output.write_text(json.dumps(results, indent=2))
+            logger.info(f"Results saved to {args.output}")
+        if not args.baseline:
+            return 0
+        baseline = json.loads(args.baseline.read_text())
+        if baseline.get(self.settings_key) != results.get(self.settings_key):
+            logger.warning(f"Baseline was recorded with different {self.settings_key}; comparison may be meaningless")
+        regressions = self.compare(results["runs"], baseline, args.threshold)
+        for regression in regressions:
+            logger.error(f"Regression: {regression}")
+        if regressions:
+            return 1
+        logger.info(f"No regressions beyond {args.threshold * 100:.0f}% against {args.baseline}")
+        return 0
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Benchmark for generate_static_html.py.
+Writes deterministic synthetic portfolios of increasing size, renders each one
+in-process (load_portfolio + render_html, or the streaming reader) in a fresh
+process, and records load/render time, output size and peak memory; results
+can be compared with a baseline.
+
+Usage:
+    python benchmark_generator.py -o generator-bench.json
+    python benchmark_generator.py -n 100 10000 --baseline generator-bench.json --threshold 0.15
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import jinja2
+
+import benchmark_common
+import resource_usage
+import generate_static_html as gen
+
+logger = logging.getLogger(__name__)
+
+MODES = ("memory", "stream")
+DEFAULT_ENTRIES = [100, 10_000, 1_000_000]
+DEFAULT_TEMPLATE = Path(__file__).parent / "portfolio_template.html"
+CATEGORIES = ["aeronáutica", "mecânica", "elétrica", "civil", "naval", "automação", "energia", "consultoria"]
+# Projects per "empresas"/"itens" group inside a category
+GROUP_SIZE = 50
+CITIES = ["São Paulo", "Campinas", "São José dos Campos", "Curitiba", "Belo Horizonte", "Recife"]
+# Timings this short are mostly noise and are not compared
+MIN_COMPARED_SECONDS = 0.05
+REGRESSION_CHECK = benchmark_common.RegressionCheck(
+    keys=("mode", "entries"),
+    metrics={metric: benchmark_common.LOWER_IS_BETTER
+             for metric in ("load_time", "render_time", "total_time", "peak_rss_mb", "output_bytes")},
+    settings_key="corpus",
+    noise_floor={metric: MIN_COMPARED_SECONDS for metric in ("load_time", "render_time", "total_time")},
+)
+
+def synthetic_project(rng: random.Random, index: int, group: str) -> dict:
+    """One project entry shaped like the real portfolio.json ones."""
+    year = 1995 + rng.randrange(30)
+    if group == "empresas":
+        project = {
+            "nome": f"Projeto {index:07d}",
+            "localizacao": rng.choice(CITIES),
+            "periodo": f"{year}-{year + rng.randrange(1, 6)}",
+            "imagem": f"img/projeto_{index % 500:03d}.jpg",
+        }
+    else:
+        project = {
+            "descricao": f"Item técnico {index:07d} " + "x" * rng.randrange(10, 80),
+            "empresa": f"Empresa {rng.randrange(1000):03d}",
+            "data": str(year),
+        }
+    if rng.random() < 0.5:
+        project["tipo"] = rng.choice(["Projeto", "Consultoria", "Manutenção"])
+    return project
+
+def write_synthetic_portfolio(path: Path, entries: int, seed: int = 1) -> int:
+    """Write a portfolio.json with entries projects, streamed so size is not bounded by memory.
+
+    Projects are spread evenly over CATEGORIES in groups of GROUP_SIZE,
+    alternating between "empresas" and "itens". Returns the file size.
+    """
+    rng = random.Random(seed)
+    per_category = [entries // len(CATEGORIES) + (i < entries % len(CATEGORIES)) for i in range(len(CATEGORIES))]
+    index = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"featured_image": "img/hero.jpg"')
+        for categoria, count in zip(CATEGORIES, per_category):
+            f.write(f", {json.dumps(categoria, ensure_ascii=False)}: [")
+            for group_number, start in enumerate(range(0, count, GROUP_SIZE)):
+                group = "empresas" if group_number % 2 == 0 else "itens"
+                projects = [synthetic_project(rng, index + i, group) for i in range(min(GROUP_SIZE, count - start))]
+                index += len(projects)
+                f.write(("," if group_number else "") + json.dumps({group: projects}, ensure_ascii=False))
+            f.write("]")
+        f.write("}\n")
+    return path.stat().st_size
+
+def count_projects(portfolio: dict) -> int:
+    return sum(
+        len(item.get("empresas", item.get("itens", [])))
+        for projetos in portfolio.values() if isinstance(projetos, list)
+        for item in projetos
+    )
+
+def run_render(json_path: Path, template_path: Path, output_path: Path, mode: str) -> dict:
+    """Load and render one portfolio in this process; times exclude template compilation."""
+    env = gen.create_environment(template_path.parent, use_bytecode_cache=False)
+    env.get_template(template_path.name)
+    start_time = time.perf_counter()
+    if mode == "memory":
+        data = gen.load_portfolio(json_path)
+    else:
+        # Parsed while the template renders, so loading is part of render_time
+        data = gen.StreamingPortfolio(json_path)
+    load_time = time.perf_counter() - start_time
+    with contextlib.redirect_stdout(io.StringIO()):
+        gen.render_html(data, template_path, output_path, env=env)
+    total_time = time.perf_counter() - start_time
+    return {
+        "load_time": load_time,
+        "render_time": total_time - load_time,
+        "total_time": total_time,
+        "output_bytes": output_path.stat().st_size,
+    }
+
+def _run_config(json_path: str, template_path: str, output_path: str, mode: str, entries: int) -> dict:
+    """Render one configuration; run through benchmark_common.run_isolated."""
+    result = run_render(Path(json_path), Path(template_path), Path(output_path), mode)
+    Path(output_path).unlink()
+    return {
+        "mode": mode,
+        "entries": entries,
+        **result,
+        "peak_rss_mb": resource_usage.peak_rss_mb(),
+    }
+
+def run_benchmark(directory: Path, template_path: Path, entry_counts: List[int], modes: List[str],
+                  seed: int, repeat: int = 1) -> List[dict]:
+    """Benchmark every size/mode combination, keeping the fastest of repeat runs."""
+    runs = []
+    for entries in entry_counts:
+        json_path = directory / f"portfolio-{entries}.json"
+        start_time = time.perf_counter()
+        json_bytes = write_synthetic_portfolio(json_path, entries, seed)
+        logger.info(f"Generated {entries} entries ({json_bytes / 1024 / 1024:.1f}MB) "
+                    f"in {time.perf_counter() - start_time:.1f}s")
+        for mode in modes:
+            best = benchmark_common.best_of(
+                repeat, "total_time", _run_config,
+                str(json_path), str(template_path.absolute()), str(directory / "index.html"), mode, entries
+            )
+            best["json_bytes"] = json_bytes
+            logger.info(
+                f"{mode:>6} x{entries:<9} {best['load_time']:8.2f}s load, {best['render_time']:8.2f}s render, "
+                f"{best['output_bytes'] / 1024 / 1024:9.1f}MB out, {best['peak_rss_mb'] or 0:8.1f}MB peak, "
+                f"{best['total_time'] / entries * 1e6:7.1f}us/entry"
+            )
+            runs.append(best)
+        json_path.unlink()
+    return runs
+
+def log_scaling(runs: List[dict]) -> None:
+    """Growth of time and memory between consecutive sizes; linear scaling keeps pace with entries."""
+    for mode in MODES:
+        mode_runs = sorted((r for r in runs if r["mode"] == mode), key=lambda r: r["entries"])
+        for smaller, larger in zip(mode_runs, mode_runs[1:]):
+            logger.info(
+                f"{mode:>6} {smaller['entries']} -> {larger['entries']} entries "
+                f"(x{larger['entries'] / smaller['entries']:.0f}): "
+                f"time x{larger['total_time'] / smaller['total_time']:.1f}, "
+                f"output x{larger['output_bytes'] / smaller['output_bytes']:.1f}"
+                + (f", peak memory x{larger['peak_rss_mb'] / smaller['peak_rss_mb']:.1f}"
+                   if smaller["peak_rss_mb"] and larger["peak_rss_mb"] else "")
+            )
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Benchmark static HTML generation at increasing portfolio sizes")
+    parser.add_argument("-n", "--entries", type=int, nargs="+", default=DEFAULT_ENTRIES,
+                        help=f"Project entries per synthetic portfolio (default: {' '.join(map(str, DEFAULT_ENTRIES))})")
+    parser.add_argument("-m", "--modes", nargs="+", choices=MODES, default=list(MODES),
+                        help="Ways of loading the portfolio: json.load or the streaming reader (default: all)")
+    parser.add_argument("--seed", type=int, default=1,
+                        help="Seed for the synthetic portfolios (default: 1)")
+    parser.add_argument("-t", "--template", type=Path, default=DEFAULT_TEMPLATE,
+                        help=f"Template to render (default: {DEFAULT_TEMPLATE.name})")
+    parser.add_argument("-r", "--repeat", type=int, default=1,
+                        help="Runs per configuration; the fastest is kept (default: 1)")
+    benchmark_common.add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="generator-bench-") as tmp:
+        runs = run_benchmark(Path(tmp), args.template, sorted(set(args.entries)), args.modes, args.seed, args.repeat)
+    log_scaling(runs)
+
+    results = {
+        "environment": benchmark_common.environment(jinja2=jinja2.__version__),
+        "corpus": {"seed": args.seed, "template": args.template.name},
+        "runs": runs,
+    }
+    return REGRESSION_CHECK.finish(args, results)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Benchmark for optimize_images.py.
+Generates a deterministic synthetic image corpus, runs process_directory across
+executor backends and worker counts, and compares the results with a baseline.
+
+Usage:
+    python benchmark_images.py -o bench.json
+    python benchmark_images.py --baseline bench.json --threshold 0.15
+"""
+
+import argparse
+import concurrent.futures
+import logging
+import multiprocessing
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import PIL
+from PIL import Image, ImageDraw
+
+import benchmark_common
+import resource_usage
+import optimize_images
+
+logger = logging.getLogger(__name__)
+
+# (width, height) of generated images, cycled through the corpus
+CORPUS_SIZES = [(640, 480), (1280, 720), (1920, 1080), (3000, 2000), (4000, 3000)]
+# (mode, file extension) of generated images, cycled independently of the sizes
+CORPUS_KINDS = [("RGB", ".jpg"), ("RGBA", ".png"), ("P", ".png"), ("RGB", ".webp")]
+DEFAULT_BACKENDS = list(optimize_images.EXECUTOR_BACKENDS)
+DEFAULT_WORKERS = [1, 2, 4]
+REGRESSION_CHECK = benchmark_common.RegressionCheck(
+    keys=("backend", "workers"),
+    metrics={metric: benchmark_common.LOWER_IS_BETTER
+             for metric in ("wall_time", "cpu_time", "peak_rss_mb", "bytes_out")},
+    settings_key="corpus",
+)
+
+def synthetic_image(rng: random.Random, size, mode: str) -> Image.Image:
+    """Draw a reproducible image with gradients, shapes and noise."""
+    width, height = size
+    img = Image.linear_gradient('L').resize(size).convert('RGB')
+    draw = ImageDraw.Draw(img)
+    for _ in range(rng.randint(5, 20)):
+        x, y = rng.randrange(width), rng.randrange(height)
+        w, h = rng.randint(20, width // 2), rng.randint(20, height // 2)
+        color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        if rng.random() < 0.5:
+            draw.ellipse((x, y, x + w, y + h), fill=color)
+        else:
+            draw.rectangle((x, y, x + w, y + h), fill=color)
+
+    # Photographic-like texture: upscaled seeded noise blended over the shapes
+    tile = (max(1, width // 8), max(1, height // 8))
+    noise = Image.frombytes('RGB', tile, rng.randbytes(tile[0] * tile[1] * 3)).resize(size)
+    img = Image.blend(img, noise, 0.25)
+
+    if mode == "RGBA":
+        img.putalpha(Image.linear_gradient('L').resize(size))
+    elif mode == "P":
+        img = img.convert('P', palette=Image.Palette.ADAPTIVE)
+    return img
+
+def generate_corpus(directory: Path, count: int, seed: int) -> int:
+    """Write count synthetic images into directory; returns their total size in bytes."""
+    rng = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    total = 0
+    for i in range(count):
+        size = CORPUS_SIZES[i % len(CORPUS_SIZES)]
+        mode, suffix = CORPUS_KINDS[i % len(CORPUS_KINDS)]
+        path = directory / f"img_{i:04d}{suffix}"
+        synthetic_image(rng, size, mode).save(path, quality=92)
+        total += path.stat().st_size
+    return total
+
+def _run_config(directory: str, backend: str, workers: int) -> dict:
+    """Optimize the corpus once; run through benchmark_common.run_isolated."""
+    logging.disable(logging.INFO)
+    usage_before = resource_usage.cpu_seconds()
+    start_time = time.perf_counter()
+    stats = optimize_images.process_directory(
+        Path(directory),
+        use_manifest=False,
+        dedupe="off",
+        backend=backend,
+        workers=workers
+    )
+    wall_time = time.perf_counter() - start_time
+    return {
+        "backend": backend,
+        "workers": workers,
+        "images": len(stats),
+        "wall_time": wall_time,
+        "cpu_time": resource_usage.cpu_seconds() - usage_before,
+        "peak_rss_mb": resource_usage.peak_rss_mb(),
+        "bytes_in": sum(s.original_size for s in stats),
+        "bytes_out": sum(s.optimized_size for s in stats),
+    }
+
+def run_benchmark(directory: Path, backends: List[str], workers: List[int], repeat: int = 1) -> List[dict]:
+    """Benchmark every backend/worker combination, keeping the fastest of repeat runs."""
+    runs = []
+    for backend in backends:
+        for count in workers:
+            best = benchmark_common.best_of(repeat, "wall_time", _run_config, str(directory), backend, count)
+            logger.info(
+                f"{backend:>9} x{count:<3} {best['wall_time']:7.2f}s wall, {best['cpu_time']:7.2f}s CPU, "
+                f"{best['peak_rss_mb'] or 0:7.1f}MB peak, "
+                f"{best['images'] / best['wall_time']:6.1f} img/s"
+            )
+            runs.append(best)
+    return runs
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Benchmark the image optimization pipeline")
+    parser.add_argument("-n", "--images", type=int, default=40,
+                        help="Number of synthetic images to generate (default: 40)")
+    parser.add_argument("--seed", type=int, default=1,
+                        help="Seed for the synthetic corpus (default: 1)")
+    parser.add_argument("--corpus", type=Path,
+                        help="Directory for the corpus (default: a temporary directory)")
+    parser.add_argument("-b", "--backends", nargs="+", choices=optimize_images.EXECUTOR_BACKENDS,
+                        default=DEFAULT_BACKENDS, help="Executor backends to benchmark (default: all)")
+    parser.add_argument("-j", "--workers", type=int, nargs="+", default=DEFAULT_WORKERS,
+                        help=f"Worker counts to benchmark (default: {' '.join(map(str, DEFAULT_WORKERS))})")
+    parser.add_argument("-r", "--repeat", type=int, default=1,
+                        help="Runs per configuration; the fastest is kept (default: 1)")
+    benchmark_common.add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="image-bench-") as tmp:
+        directory = args.corpus or Path(tmp)
+        # Generate in a child process: Linux carries the peak RSS of a parent over
+        # fork+exec, so a large parent would inflate every run's measurement
+        with concurrent.futures.ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            corpus_bytes = executor.submit(generate_corpus, directory, args.images, args.seed).result()
+        logger.info(f"Generated {args.images} images ({corpus_bytes/1024/1024:.1f}MB) in {directory}")
+        runs = run_benchmark(directory, args.backends, args.workers, args.repeat)
+
+    results = {
+        "environment": benchmark_common.environment(pillow=PIL.__version__),
+        "corpus": {"images": args.images, "seed": args.seed, "bytes": corpus_bytes},
+        "runs": runs,
+    }
+    return REGRESSION_CHECK.finish(args, results)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark for local_server.py.
+Serves a generated file too large for the file cache and measures download
+throughput with os.sendfile against the copy through Python buffers, for a
+range of client concurrencies; results can be compared with a baseline.
+
+Usage:
+    python benchmark_server.py -o server-bench.json
+    python benchmark_server.py --baseline server-bench.json --threshold 0.15
+"""
+
+import argparse
+import concurrent.futures
+import functools
+import http.client
+import logging
+import multiprocessing
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import benchmark_common
+import local_server
+
+logger = logging.getLogger(__name__)
+
+MODES = ("sendfile", "copy")
+DEFAULT_CONCURRENCY = [1, 4, 16]
+DEFAULT_SIZE_MB = 64
+READ_SIZE = 1024 * 1024
+REGRESSION_CHECK = benchmark_common.RegressionCheck(
+    keys=("mode", "concurrency"),
+    metrics={"throughput_mb_s": benchmark_common.HIGHER_IS_BETTER, "requests_per_s": benchmark_common.HIGHER_IS_BETTER},
+)
+
+def _serve(directory: str, use_sendfile: bool, workers: int, conn) -> None:
+    """Run the server in its own process so clients and server do not share a GIL."""
+    logging.disable(logging.INFO)
+    handler = functools.partial(
+        local_server.CustomHTTPRequestHandler,
+        directory=Path(directory),
+        file_cache=local_server.FileCache(local_server.DEFAULT_CACHE_SIZE_MB * 1024 * 1024),
+        use_sendfile=use_sendfile
+    )
+    with local_server.PooledHTTPServer(("127.0.0.1", 0), handler, workers=workers) as httpd:
+        conn.send(httpd.server_address[1])
+        httpd.serve_forever()
+
+def download(port: int, path: str, count: int) -> int:
+    """Fetch path count times over one keep-alive connection; returns the bytes received."""
+    buffer = bytearray(READ_SIZE)
+    received = 0
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    try:
+        for _ in range(count):
+            connection.request("GET", path)
+            response = connection.getresponse()
+            while True:
+                n = response.readinto(buffer)
+                if not n:
+                    break
+                received += n
+    finally:
+        connection.close()
+    return received
+
+def run_mode(directory: Path, mode: str, concurrency: List[int], requests: int) -> List[dict]:
+    context = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    workers = max(concurrency)
+    server = context.Process(target=_serve, args=(str(directory), mode == "sendfile", workers, child_conn), daemon=True)
+    server.start()
+    try:
+        port = parent_conn.recv()
+        download(port, "/payload.bin", 1)  # warm up the page cache and the ETag
+        runs = []
+        for clients in concurrency:
+            start_time = time.perf_counter()
+            with concurrent.futures.ThreadPoolExecutor(clients) as executor:
+                received = sum(executor.map(lambda _: download(port, "/payload.bin", requests), range(clients)))
+            wall_time = time.perf_counter() - start_time
+            run = {
+                "mode": mode,
+                "concurrency": clients,
+                "requests": clients * requests,
+                "bytes": received,
+                "wall_time": wall_time,
+                "throughput_mb_s": received / 1024 / 1024 / wall_time,
+                "requests_per_s": clients * requests / wall_time,
+            }
+            logger.info(
+                f"{mode:>8} x{clients:<3} {run['throughput_mb_s']:9.1f}MB/s, "
+                f"{run['requests_per_s']:7.1f} req/s, {wall_time:6.2f}s"
+            )
+            runs.append(run)
+        return runs
+    finally:
+        server.terminate()
+        server.join()
+
+def main() -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Benchmark local_server.py file transfers")
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE_MB,
+                        help=f"Size of the served file in MB (default: {DEFAULT_SIZE_MB})")
+    parser.add_argument("-c", "--concurrency", type=int, nargs="+", default=DEFAULT_CONCURRENCY,
+                        help=f"Concurrent clients to benchmark (default: {' '.join(map(str, DEFAULT_CONCURRENCY))})")
+    parser.add_argument("-n", "--requests", type=int, default=4,
+                        help="Downloads per client (default: 4)")
+    parser.add_argument("-m", "--modes", nargs="+", choices=MODES, default=list(MODES),
+                        help="Transfer paths to benchmark (default: all)")
+    benchmark_common.add_baseline_arguments(parser)
+    args = parser.parse_args()
+
+    runs = []
+    with tempfile.TemporaryDirectory(prefix="server-bench-") as tmp:
+        directory = Path(tmp)
+        with open(directory / "payload.bin", "wb") as f:
+            for _ in range(args.size):
+                f.write(b"\0" * 1024 * 1024)
+        logger.info(f"Serving a {args.size}MB file from {directory}")
+        for mode in args.modes:
+            runs += run_mode(directory, mode, args.concurrency, args.requests)
+
+    for clients in args.concurrency:
+        by_mode = {r["mode"]: r for r in runs if r["concurrency"] == clients}
+        if len(by_mode) == len(MODES):
+            speedup = by_mode["sendfile"]["throughput_mb_s"] / by_mode["copy"]["throughput_mb_s"]
+            logger.info(f"x{clients}: sendfile is {speedup:.2f}x the copy path")
+
+    results = {
+        "environment": benchmark_common.environment(sendfile=hasattr(socket.socket, "sendfile")),
+        "settings": {"size_mb": args.size, "requests": args.requests},
+        "runs": runs,
+    }
+    return REGRESSION_CHECK.finish(args, results)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,55 +1,879 @@
 #!/usr/bin/env python3
 """
 Generate static HTML for the portfolio site from portfolio.json using a Jinja2 template.
-Optionally enriches data via AI agent (local or remote) if --use-ai is passed.
+Optionally enriches data via AI agent (local or remote) if --use-ai is passed:
+each project is sent to an ai_enrichment backend concurrently, and results are
+cached next to the output so only new or changed projects are enriched again.
 
 Usage:
-    python generate_static_html.py [--use-ai]
+    python generate_static_html.py [--use-ai] [--force] [--watch] [--stream] [--page-size N]
+
+Rendering is skipped when the data, the template (and its includes) and the
+settings are unchanged since the last build, and the output file is only
+replaced when its bytes change. The page is rendered with template.generate()
+and streamed to disk; with --stream, portfolio.json is also parsed one
+top-level entry at a time, so memory stays flat however large the data is.
+Compiled templates are kept in a Jinja2 bytecode cache between runs. --watch
+keeps one environment alive and rebuilds whenever the JSON or a template file
+is saved.
+
+With --page-size, each category is written to its own directory next to the
+output file (<category>/index.html, <category>/page-2.html, ...), rendered in
+parallel, and the output file becomes a lightweight index page backed by a
+search-index.json file.
+
+With --assets, a post-render stage copies the CSS, scripts and images the
+pages reference to content-hashed names (style.<hash>.css) and rewrites the
+references so they can be cached forever, fills in srcset/sizes on lazy
+<img> tags from the image_variants.json written by optimize_images.py
+--widths, and writes .gz (and, with brotli installed, .br) siblings of the
+text files at maximum compression.
 
 Requirements:
     - Jinja2
     - Python 3.8+
+    - inotify_simple (optional, Linux: instant change detection in --watch mode)
+    - brotli (optional: .br files with --assets)
 
 Place this script in the toolbox directory. Run from the project root or specify paths as needed.
 """
 import json
 import argparse
+import concurrent.futures
+import gzip
+import hashlib
+import os
+import re
+import time
+import unicodedata
+from datetime import datetime
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, meta
+
+from ai_enrichment import DEFAULT_BACKEND, DEFAULT_CONCURRENCY, EnrichmentRunner, load_enricher
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
-# Optional: import your AI enrichment function here
-# from ai_enrichment import enrich_portfolio_data
+BUILD_CACHE_SUFFIX = '.build-cache.json'
+ENRICHMENT_CACHE_SUFFIX = '.enrichment-cache.json'
+POLL_INTERVAL = 0.1
+DEFAULT_INDEX_TEMPLATE = 'portfolio_index_template.html'
+SEARCH_INDEX_NAME = 'search-index.json'
+STREAM_CHUNK_SIZE = 1 << 16
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+VARIANT_MAP_NAME = 'image_variants.json'  # written by optimize_images.py --widths
+DEFAULT_IMAGE_SIZES = '(max-width: 600px) 100vw, 33vw'
+SRCSET_FORMATS = ('jpeg', 'png')
+FINGERPRINT_LENGTH = 10
+FINGERPRINT_SUFFIXES = {'.css', '.js', '.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.svg', '.ico'}
+COMPRESSIBLE_SUFFIXES = {'.html', '.css', '.js', '.json', '.svg', '.xml', '.txt'}
+# Tag contents up to the closing '>'; a '>' inside a quoted attribute value does not end the tag
+_TAG_BODY = r'''(?:"[^"]*"|'[^']*'|[^'">])*'''
+_TAG = re.compile(rf'<{_TAG_BODY}>')
+_ASSET_TAG = re.compile(rf'<(?:img|link|script)\b{_TAG_BODY}>', re.IGNORECASE)
+# One attribute: leading space, name, and = with a quoted or bare value if present
+_TAG_ATTR = re.compile(r'''(\s+)([^\s"'>/=]+)(?:(\s*=\s*)("[^"]*"|'[^']*'|[^\s"'>]+))?''')
+_EXTERNAL_URL = re.compile(r'^(?:[a-z][a-z0-9+.-]*:|//|#)', re.IGNORECASE)
 
 def load_portfolio(json_path):
     with open(json_path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def enrich_with_ai(data):
-    # Placeholder for AI enrichment logic
-    # Example: return enrich_portfolio_data(data)
-    print("[INFO] AI enrichment is not implemented. Returning original data.")
-    return data
+def iter_portfolio(json_path, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield the top-level (key, value) pairs of portfolio.json one at a time.
+
+    Only the entry being decoded is held in memory: a single category has to
+    fit, the whole file does not.
+    """
+    decoder = json.JSONDecoder()
+    with open(json_path, 'r', encoding='utf-8') as f:
+        buf, pos = '', 0
+
+        def read_more(size=chunk_size):
+            nonlocal buf, pos
+            chunk = f.read(max(size, chunk_size))
+            buf, pos = buf[pos:] + chunk, 0
+            return bool(chunk)
+
+        def peek():
+            nonlocal pos
+            while True:
+                pos = _WHITESPACE.match(buf, pos).end()
+                if pos < len(buf):
+                    return buf[pos]
+                if not read_more():
+                    return ''
+
+        def decode():
+            nonlocal pos
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    # Incomplete value: double the buffered text so retries stay linear
+                    if not read_more(len(buf) - pos):
+                        raise
+                    continue
+                # A number cut by the chunk boundary ("1.5e" of "1.5e10") decodes
+                # as a shorter one; only trust it once a delimiter follows
+                if (isinstance(value, (int, float)) and not isinstance(value, bool)
+                        and (end == len(buf) or buf[end] not in ' \t\n\r,}]') and read_more()):
+                    continue
+                pos = end
+                return value
+
+        def expect(chars):
+            nonlocal pos
+            char = peek()
+            if not char or char not in chars:
+                raise json.JSONDecodeError(f"Expecting one of {chars!r}", buf, pos)
+            pos += 1
+            return char
+
+        expect('{')
+        if peek() == '}':
+            return
+        while True:
+            if peek() != '"':
+                raise json.JSONDecodeError("Expecting property name enclosed in double quotes", buf, pos)
+            key = decode()
+            expect(':')
+            peek()
+            yield key, decode()
+            if expect(',}') == '}':
+                return
+
+class StreamingPortfolio:
+    """Read-once stand-in for the portfolio dict, backed by iter_portfolio.
+
+    items() parses categories as the template loops over them. Lookups such as
+    portfolio.featured_image see the non-list entries that precede the first
+    category, which are read ahead on demand. transform, if set, is called
+    with each category and its list and returns the list to render.
+    """
+
+    def __init__(self, json_path, chunk_size=STREAM_CHUNK_SIZE):
+        self.transform = None
+        self._entries = iter_portfolio(json_path, chunk_size)
+        self._head = {}
+        self._pending = None
+        self._head_read = False
+
+    def _read_head(self):
+        if self._head_read:
+            return
+        self._head_read = True
+        for key, value in self._entries:
+            if isinstance(value, list):
+                self._pending = (key, value)
+                break
+            self._head[key] = value
+
+    def __getitem__(self, key):
+        self._read_head()
+        return self._head[key]
+
+    def items(self):
+        self._read_head()
+        yield from self._head.items()
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            yield self._apply(*pending)
+        for key, value in self._entries:
+            yield self._apply(key, value)
+
+    def _apply(self, key, value):
+        if self.transform is not None and isinstance(value, list):
+            value = self.transform(key, value)
+        return key, value
+
+def format_date(value, fmt='%Y-%m-%d'):
+    """Jinja2 filter: format a datetime, or the current time for "now"."""
+    if value == 'now':
+        value = datetime.now()
+    return value.strftime(fmt)
+
+def create_environment(template_dir, bytecode_cache_dir=None, use_bytecode_cache=True):
+    """Create the Jinja2 environment; templates are reloaded when their files change.
+
+    Compiled templates are cached in bytecode_cache_dir, or in a per-user
+    temporary directory chosen by Jinja2 when it is None.
+    """
+    bytecode_cache = None
+    if use_bytecode_cache:
+        if bytecode_cache_dir is not None:
+            Path(bytecode_cache_dir).mkdir(parents=True, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(str(bytecode_cache_dir))
+        else:
+            bytecode_cache = FileSystemBytecodeCache()
+    env = Environment(
+        loader=FileSystemLoader(str(template_dir)),
+        auto_reload=True,
+        bytecode_cache=bytecode_cache
+    )
+    env.filters['date'] = format_date
+    return env
+
+def template_dependencies(env, name, seen=None):
+    """Return name and every template it extends, includes or imports, recursively."""
+    seen = seen if seen is not None else set()
+    if name in seen:
+        return seen
+    seen.add(name)
+    source = env.loader.get_source(env, name)[0]
+    for ref in meta.find_referenced_templates(env.parse(source)):
+        # Dynamic references (None) cannot be resolved statically
+        if ref is not None:
+            template_dependencies(env, ref, seen)
+    return seen
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(STREAM_CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def build_fingerprint(data_digest, env, template_names, settings):
+    """Hash everything that affects the rendered output; data_digest identifies the JSON data."""
+    dependencies = set()
+    for template_name in template_names:
+        template_dependencies(env, template_name, dependencies)
+    digest = hashlib.sha256()
+    digest.update(data_digest.encode('utf-8'))
+    for name in sorted(dependencies):
+        digest.update(name.encode('utf-8'))
+        digest.update(env.loader.get_source(env, name)[0].encode('utf-8'))
+    # The generator itself and the render date (templates may print "now")
+    digest.update(Path(__file__).read_bytes())
+    digest.update(datetime.now().date().isoformat().encode('utf-8'))
+    digest.update(json.dumps(settings, sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+def build_cache_path(output_path):
+    return output_path.with_name('.' + output_path.name + BUILD_CACHE_SUFFIX)
+
+def load_build_cache(output_path):
+    try:
+        return json.loads(build_cache_path(output_path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+def save_build_cache(output_path, fingerprint, files=(), assets=None):
+    """Record the build fingerprint, the extra files (e.g. shards) it produced
+    and the source assets it fingerprinted."""
+    cache = {'fingerprint': fingerprint, 'files': sorted(files), 'assets': assets or {}}
+    write_if_changed(build_cache_path(output_path), json.dumps(cache).encode('utf-8'))
+
+def write_if_changed(path, content):
+    """Atomically replace path with content unless it already holds those bytes.
+
+    Returns True if the file was written.
+    """
+    path = Path(path)
+    try:
+        if path.stat().st_size == len(content) and path.read_bytes() == content:
+            return False
+    except FileNotFoundError:
+        pass
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    try:
+        tmp_path.write_bytes(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return True
+
+def write_stream_if_changed(path, chunks):
+    """Like write_if_changed, but for an iterable of text chunks.
+
+    The chunks are written to a temporary file as they come and hashed on the
+    way; the file only replaces path if the result differs from it.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, 'wb') as f:
+            for chunk in chunks:
+                data = chunk.encode('utf-8')
+                digest.update(data)
+                size += len(data)
+                f.write(data)
+        try:
+            unchanged = path.stat().st_size == size and file_sha256(path) == digest.hexdigest()
+        except FileNotFoundError:
+            unchanged = False
+        if unchanged:
+            tmp_path.unlink()
+            return False
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return True
+
+def load_variant_map(path, root):
+    """Read an image_variants.json, re-keyed by paths relative to root.
+
+    The file maps source images to their variants, both relative to its own
+    directory; entries outside root are ignored.
+    """
+    path = Path(path)
+    base = path.parent.resolve()
+    variant_map = {}
+    for source, variants in json.loads(path.read_text(encoding='utf-8')).items():
+        try:
+            key = (base / source).resolve().relative_to(root).as_posix()
+            variants = [dict(v, path=(base / v['path']).resolve().relative_to(root).as_posix()) for v in variants]
+        except ValueError:
+            continue
+        if variants:
+            variant_map[key] = variants
+    return variant_map
+
+class AssetPipeline:
+    """Post-render asset stage applied to every page.
+
+    Local CSS, scripts and images referenced by href/src are copied to
+    content-hashed names next to the original, and the references rewritten.
+    Lazy <img> tags with variants get srcset/sizes. References are resolved
+    against root, the directory of the main output file (shard pages point
+    there through <base href>).
+    """
+
+    def __init__(self, root, variant_map_path=None, sizes=DEFAULT_IMAGE_SIZES):
+        self.root = Path(root).resolve()
+        self.sizes = sizes
+        self.variants = load_variant_map(variant_map_path, self.root) if variant_map_path else {}
+        # Source asset (relative to root) -> its mtime, size and fingerprinted copy
+        self.sources = {}
+
+    def resolve(self, ref):
+        """Path relative to root of a local asset reference, or None."""
+        if not ref or _EXTERNAL_URL.match(ref) or '?' in ref or '#' in ref:
+            return None
+        path = (self.root / ref.lstrip('/')).resolve()
+        try:
+            relative = path.relative_to(self.root).as_posix()
+        except ValueError:
+            return None
+        if path.suffix.lower() not in FINGERPRINT_SUFFIXES or not path.is_file():
+            return None
+        return relative
+
+    def fingerprint(self, ref):
+        """Return ref pointing at the content-hashed copy of its file, creating it if needed."""
+        relative = self.resolve(ref)
+        if relative is None:
+            return ref
+        entry = self.sources.get(relative)
+        if entry is None:
+            source = self.root / relative
+            st = source.stat()
+            data = source.read_bytes()
+            target = source.with_name(f'{source.stem}.{hashlib.sha256(data).hexdigest()[:FINGERPRINT_LENGTH]}{source.suffix}')
+            if not target.exists():
+                write_if_changed(target, data)
+            entry = self.sources[relative] = {
+                'mtime_ns': st.st_mtime_ns,
+                'size': st.st_size,
+                'hashed': target.relative_to(self.root).as_posix(),
+            }
+        return ref[:ref.rfind('/') + 1] + Path(entry['hashed']).name
+
+    def srcset(self, ref):
+        """srcset for the variants of ref in a single format, or None."""
+        relative = self.resolve(ref)
+        variants = self.variants.get(relative) if relative else None
+        if not variants:
+            return None
+        # An <img> cannot say which format each candidate is in, so offer a
+        # format every browser decodes when there is one; others need a <picture>
+        formats = [v['format'] for v in variants]
+        fmt = next((f for f in SRCSET_FORMATS if f in formats), formats[0])
+        primary = sorted((v for v in variants if v['format'] == fmt), key=lambda v: v['width'])
+        prefix = '/' if ref.startswith('/') else ''
+        return ', '.join(f"{self.fingerprint(prefix + v['path'])} {v['width']}w" for v in primary)
+
+    def _rewrite_attr(self, match):
+        space, name, equals, value = match.groups()
+        if value is None or name.lower() not in ('href', 'src'):
+            return match.group(0)
+        quote = value[0] if value[0] in '"\'' else ''
+        ref = value[1:-1] if quote else value
+        return f'{space}{name}{equals}{quote}{self.fingerprint(ref)}{quote}'
+
+    def _rewrite_tag(self, match):
+        tag = match.group(0)
+        if tag[1:4].lower() == 'img':
+            attrs = {m.group(2).lower(): _attr_value(m.group(4)) for m in _TAG_ATTR.finditer(tag)}
+            srcset = None
+            if attrs.get('loading') == 'lazy' and 'srcset' not in attrs and attrs.get('src'):
+                srcset = self.srcset(attrs['src'])
+            if srcset:
+                head, tail = (tag[:-2], ' />') if tag.endswith('/>') else (tag[:-1], '>')
+                tag = f'{head.rstrip()} srcset="{srcset}" sizes="{self.sizes}"{tail}'
+        return _TAG_ATTR.sub(self._rewrite_attr, tag)
 
-def render_html(portfolio_data, template_path, output_path):
-    env = Environment(loader=FileSystemLoader(template_path.parent))
+    def rewrite(self, html):
+        return _ASSET_TAG.sub(self._rewrite_tag, html)
+
+    def rewrite_stream(self, chunks):
+        """Rewrite a stream of HTML chunks, holding back a tag until it is closed so none is split."""
+        pending = ''
+        for chunk in chunks:
+            pending += chunk
+            cut = _complete_markup_end(pending)
+            if cut:
+                yield self.rewrite(pending[:cut])
+                pending = pending[cut:]
+        if pending:
+            yield self.rewrite(pending)
+
+def _attr_value(value):
+    """Attribute value without its quotes; None for an attribute without a value."""
+    if value is None or value[0] not in '"\'':
+        return value
+    return value[1:-1]
+
+def _complete_markup_end(html):
+    """Length of the longest prefix of html that does not end inside an unclosed tag."""
+    pos = 0
+    while True:
+        start = html.find('<', pos)
+        if start < 0:
+            return len(html)
+        match = _TAG.match(html, start)
+        if match is None:
+            return start
+        pos = match.end()
+
+def assets_unchanged(assets, root):
+    """True if every source asset recorded by a build is untouched and its copy still exists."""
+    for relative, entry in assets.items():
+        try:
+            st = (root / relative).stat()
+        except FileNotFoundError:
+            return False
+        if (st.st_mtime_ns, st.st_size) != (entry['mtime_ns'], entry['size']) or not (root / entry['hashed']).exists():
+            return False
+    return True
+
+def precompress(path):
+    """Write .gz (and .br if brotli is installed) siblings of path at maximum compression.
+
+    Siblings newer than path are kept as they are. Returns their paths.
+    """
+    siblings = [(path.with_name(path.name + '.gz'), lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        siblings.append((path.with_name(path.name + '.br'), lambda data: brotli.compress(data, quality=11)))
+    source_mtime = path.stat().st_mtime_ns
+    data = None
+    for sibling, compress in siblings:
+        try:
+            if sibling.stat().st_mtime_ns >= source_mtime:
+                continue
+        except FileNotFoundError:
+            pass
+        data = data if data is not None else path.read_bytes()
+        write_if_changed(sibling, compress(data))
+    return [sibling for sibling, _ in siblings]
+
+def enrichment_cache_path(output_path):
+    return output_path.with_name('.' + output_path.name + ENRICHMENT_CACHE_SUFFIX)
+
+def enrich_with_ai(data, runner):
+    """Enrich every project through runner; streamed data is enriched one category at a time."""
+    if isinstance(data, StreamingPortfolio):
+        data.transform = runner.enrich_category
+        return data
+    return runner.enrich_portfolio(data)
+
+def render_html(portfolio_data, template_path, output_path, env=None, pipeline=None):
+    env = env or create_environment(template_path.parent)
     template = env.get_template(template_path.name)
-    html = template.render(portfolio=portfolio_data)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(html)
-    print(f"[SUCCESS] HTML generated at {output_path}")
+    chunks = template.generate(portfolio=portfolio_data)
+    if pipeline is not None:
+        chunks = pipeline.rewrite_stream(chunks)
+    if write_stream_if_changed(output_path, chunks):
+        print(f"[SUCCESS] HTML generated at {output_path}")
+    else:
+        print(f"[INFO] {output_path} is unchanged")
+
+def slugify(text):
+    text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-') or 'categoria'
+
+def iter_projects(projetos):
+    """Yield the projects of a category, flattening its empresas/itens groups."""
+    for item in projetos:
+        if 'empresas' in item:
+            yield from item['empresas']
+        elif 'itens' in item:
+            yield from item['itens']
+
+def page_filename(page):
+    return 'index.html' if page == 1 else f'page-{page}.html'
+
+def shard_pages(portfolio_data, page_size):
+    """Split the portfolio into per-category pages of at most page_size projects."""
+    pages = []
+    slugs = set()
+    for categoria, projetos in portfolio_data.items():
+        if not isinstance(projetos, list):
+            continue
+        slug = slugify(categoria)
+        while slug in slugs:
+            slug += '-'
+        slugs.add(slug)
+        projects = list(iter_projects(projetos))
+        count = max(1, -(-len(projects) // page_size))
+        for page in range(1, count + 1):
+            pages.append({
+                'categoria': categoria,
+                'slug': slug,
+                'page': page,
+                'pages': count,
+                'total': len(projects),
+                'projects': projects[(page - 1) * page_size:page * page_size],
+                'path': f'{slug}/{page_filename(page)}',
+            })
+    return pages
+
+def page_context(page):
+    """Template context for one shard; links are relative to the site root via <base>."""
+    slug = page['slug']
+    return {
+        'portfolio': {page['categoria']: [{'itens': page['projects']}]},
+        'base_path': '../',
+        'pagination': {
+            'page': page['page'],
+            'pages': page['pages'],
+            'prev': f"{slug}/{page_filename(page['page'] - 1)}" if page['page'] > 1 else None,
+            'next': f"{slug}/{page_filename(page['page'] + 1)}" if page['page'] < page['pages'] else None,
+        },
+    }
+
+def build_search_index(pages):
+    """Compact list of every project and the page it is on, for client-side search."""
+    index = []
+    for page in pages:
+        for projeto in page['projects']:
+            index.append({
+                'title': projeto.get('nome') or projeto.get('descricao'),
+                'category': page['categoria'],
+                'location': projeto.get('localizacao') or projeto.get('empresa'),
+                'period': projeto.get('periodo') or projeto.get('data'),
+                'url': page['path'],
+            })
+    return index
+
+_worker_env = None
+_worker_pipeline = None
+
+def _init_render_worker(template_dir, bytecode_cache_dir, use_bytecode_cache, pipeline=None):
+    global _worker_env, _worker_pipeline
+    _worker_env = create_environment(template_dir, bytecode_cache_dir, use_bytecode_cache)
+    _worker_pipeline = pipeline
+
+def _render_page(template_name, context, output_path):
+    """Render one page; returns whether it changed and the assets fingerprinted so far."""
+    html = _worker_env.get_template(template_name).render(**context)
+    if _worker_pipeline is not None:
+        html = _worker_pipeline.rewrite(html)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    changed = write_if_changed(output_path, html.encode('utf-8'))
+    return changed, _worker_pipeline.sources if _worker_pipeline is not None else {}
+
+def render_sharded(portfolio_data, template_path, index_template, output_path, page_size, env,
+                   workers=None, bytecode_cache_dir=None, use_bytecode_cache=True, pipeline=None):
+    """Render per-category pages in parallel, the search index and the index page.
+
+    Returns every file written besides output_path, relative to its directory.
+    """
+    root = output_path.parent
+    pages = shard_pages(portfolio_data, page_size)
+    tasks = [(template_path.name, page_context(page), root / page['path']) for page in pages]
+    init_args = (template_path.parent, bytecode_cache_dir, use_bytecode_cache, pipeline)
+    if workers == 1 or len(tasks) < 2:
+        global _worker_env, _worker_pipeline
+        _worker_env, _worker_pipeline = env, pipeline
+        results = [_render_page(*task) for task in tasks]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_render_worker, initargs=init_args
+        ) as executor:
+            results = list(executor.map(_render_page, *zip(*tasks), chunksize=max(1, len(tasks) // 32)))
+    if pipeline is not None:
+        for _, sources in results:
+            pipeline.sources.update(sources)
+    print(f"[INFO] Rendered {len(pages)} pages ({sum(changed for changed, _ in results)} changed)")
+
+    search_index = root / SEARCH_INDEX_NAME
+    write_if_changed(search_index, json.dumps(build_search_index(pages), ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+    categories = []
+    for page in pages:
+        if page['page'] == 1:
+            categories.append({'nome': page['categoria'], 'url': page['path'], 'total': page['total'], 'pages': page['pages']})
+    html = env.get_template(index_template).render(
+        portfolio=portfolio_data, categories=categories, search_index=SEARCH_INDEX_NAME
+    )
+    if pipeline is not None:
+        html = pipeline.rewrite(html)
+    if write_if_changed(output_path, html.encode('utf-8')):
+        print(f"[SUCCESS] Index generated at {output_path}")
+    return [SEARCH_INDEX_NAME] + [page['path'] for page in pages]
+
+def build(json_path, template_path, output_path, env, use_ai=False, force=False,
+          page_size=None, index_template=DEFAULT_INDEX_TEMPLATE, workers=None,
+          bytecode_cache_dir=None, use_bytecode_cache=True, stream=False,
+          assets=False, variant_map=None, image_sizes=DEFAULT_IMAGE_SIZES,
+          ai_backend=DEFAULT_BACKEND, ai_concurrency=DEFAULT_CONCURRENCY, ai_cache=None):
+    """Render output_path unless its inputs are unchanged; returns True if rendered.
+
+    With stream, portfolio.json is parsed incrementally (single-page output only).
+    With assets, the AssetPipeline runs over every page and text outputs are
+    precompressed; variant_map defaults to image_variants.json next to output_path.
+    With use_ai, projects are enriched by the ai_backend enricher, with results
+    cached in ai_cache (default: a hidden file next to output_path).
+    """
+    root = output_path.parent
+    template_names = [template_path.name] + ([index_template] if page_size else [])
+    settings = {'use_ai': use_ai, 'page_size': page_size}
+    enricher = None
+    if use_ai:
+        enricher = load_enricher(ai_backend)
+        settings['ai_backend'] = [enricher.name, enricher.version]
+    if assets:
+        variant_map = Path(variant_map) if variant_map else root / VARIANT_MAP_NAME
+        if not variant_map.exists():
+            variant_map = None
+        settings['assets'] = {
+            'sizes': image_sizes,
+            'variant_map': file_sha256(variant_map) if variant_map else None,
+            'brotli': brotli is not None,
+        }
+    fingerprint = build_fingerprint(file_sha256(json_path), env, template_names, settings)
+    cache = load_build_cache(output_path)
+    if (not force and output_path.exists() and cache.get('fingerprint') == fingerprint
+            and assets_unchanged(cache.get('assets', {}), root)):
+        print(f"[INFO] Inputs unchanged, skipping render of {output_path}")
+        return False
+
+    if stream and not page_size:
+        data = StreamingPortfolio(json_path)
+    else:
+        data = load_portfolio(json_path)
+    runner = None
+    if enricher is not None:
+        runner = EnrichmentRunner(enricher, Path(ai_cache) if ai_cache else enrichment_cache_path(output_path), ai_concurrency)
+        data = enrich_with_ai(data, runner)
+    pipeline = AssetPipeline(root, variant_map, image_sizes) if assets else None
+    files = []
+    rendered = False
+    try:
+        if page_size:
+            files = render_sharded(data, template_path, index_template, output_path, page_size, env,
+                                   workers, bytecode_cache_dir, use_bytecode_cache, pipeline)
+        else:
+            render_html(data, template_path, output_path, env=env, pipeline=pipeline)
+        rendered = True
+    finally:
+        # Keep what was enriched even if rendering failed; stale results are
+        # only pruned once a render has gone through the whole portfolio
+        if runner is not None:
+            runner.close(prune=rendered)
+            print(f"[INFO] Enriched {runner.enriched} projects with {enricher.name} "
+                  f"({runner.cached} cached, {runner.failed} failed) in {runner.duration:.1f}s")
+    if runner is not None and runner.failed:
+        # Do not let the next build skip the projects that failed
+        fingerprint = None
+
+    if pipeline is not None:
+        files += [entry['hashed'] for entry in pipeline.sources.values()]
+        for path in [output_path] + [root / name for name in files]:
+            if path.suffix.lower() in COMPRESSIBLE_SUFFIXES:
+                files += [sibling.relative_to(root).as_posix() for sibling in precompress(path)]
+        print(f"[INFO] Fingerprinted {len(pipeline.sources)} assets"
+              f"{'' if brotli is not None else ' (brotli not installed, .br files skipped)'}")
+
+    # Remove shards from the previous build that this one no longer produces
+    for stale in set(cache.get('files', [])) - set(files):
+        stale_path = output_path.parent / stale
+        stale_path.unlink(missing_ok=True)
+        if stale_path.parent != output_path.parent and stale_path.parent.exists() and not any(stale_path.parent.iterdir()):
+            stale_path.parent.rmdir()
+    save_build_cache(output_path, fingerprint, files, pipeline.sources if pipeline is not None else None)
+    return True
+
+def watched_files(env, json_path, template_names):
+    """The JSON file and every template file the build depends on."""
+    files = [json_path.resolve()]
+    dependencies = set()
+    for template_name in template_names:
+        template_dependencies(env, template_name, dependencies)
+    for name in dependencies:
+        files.append(Path(env.loader.get_source(env, name)[1]).resolve())
+    return files
+
+def _snapshot(paths):
+    state = {}
+    for path in paths:
+        try:
+            st = path.stat()
+            state[path] = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            state[path] = None
+    return state
+
+class ChangeWatcher:
+    """Reports changes to a set of files, including changes made between waits.
+
+    Uses inotify on the parent directories when available (editors often save
+    by renaming a new file over the old one), otherwise polls mtime and size
+    against the state seen by the previous wait. The watcher is armed on
+    creation, so a save made while a build runs is reported by the next wait.
+    """
+
+    MASK = 0 if INotify is None else inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO | inotify_flags.CREATE
+
+    def __init__(self, paths, interval=POLL_INTERVAL):
+        self.interval = interval
+        self.inotify = INotify() if INotify is not None else None
+        self.directories = {}
+        self.watched = set()
+        self.state = {}
+        self.set_paths(paths)
+
+    def set_paths(self, paths):
+        """Watch paths from now on; changes to files already watched are kept."""
+        if self.inotify is not None:
+            for path in paths:
+                if path.parent not in self.directories:
+                    self.directories[path.parent] = self.inotify.add_watch(str(path.parent), self.MASK)
+            self.watched = {(self.directories[path.parent], path.name) for path in paths}
+        else:
+            self.state = {**_snapshot(p for p in paths if p not in self.state),
+                          **{p: v for p, v in self.state.items() if p in paths}}
+
+    def wait(self):
+        """Block until a watched file is modified, created or replaced."""
+        if self.inotify is not None:
+            while True:
+                if any((event.wd, event.name) in self.watched for event in self.inotify.read()):
+                    break
+            # Saves often come as several events; one rebuild covers all of them
+            self.inotify.read(timeout=0)
+            return
+        while True:
+            current = _snapshot(self.state)
+            if current != self.state:
+                self.state = current
+                return
+            time.sleep(self.interval)
+
+    def close(self):
+        if self.inotify is not None:
+            self.inotify.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def watch(json_path, template_path, output_path, env, force=False, **options):
+    """Build, then rebuild on every change to the inputs until interrupted; options are passed to build.
+
+    A failed build, including the first one, is reported and the next save
+    retries it.
+    """
+    template_names = [template_path.name]
+    if options.get('page_size'):
+        template_names.append(options.get('index_template', DEFAULT_INDEX_TEMPLATE))
+    # Armed before the first build so that no save goes unnoticed; includes are
+    # added once the templates parse
+    with ChangeWatcher([json_path.resolve(), template_path.resolve()]) as watcher:
+        print(f"[INFO] Watching {json_path} and {template_path} (Ctrl+C to stop)")
+        first = True
+        while True:
+            start_time = time.perf_counter()
+            try:
+                # Includes may have been added or removed
+                watcher.set_paths(watched_files(env, json_path, template_names))
+                if build(json_path, template_path, output_path, env, force=force, **options) and not first:
+                    print(f"[INFO] Rebuilt in {(time.perf_counter() - start_time) * 1000:.0f}ms")
+                force = False
+            except Exception as e:
+                # Keep watching: the next save usually fixes a broken template or JSON
+                print(f"[ERROR] Build failed: {e}")
+            first = False
+            watcher.wait()
 
 def main():
     parser = argparse.ArgumentParser(description="Generate static HTML from portfolio.json")
     parser.add_argument('--use-ai', action='store_true', help='Enrich portfolio data using AI agent (optional)')
+    parser.add_argument('--ai-backend', default=DEFAULT_BACKEND, help=f'Enrichment backend: a registered name or module:Class (default: {DEFAULT_BACKEND})')
+    parser.add_argument('--ai-concurrency', type=int, default=DEFAULT_CONCURRENCY, help=f'Projects enriched concurrently (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--ai-cache', type=Path, help='Enrichment cache file (default: hidden file next to --output)')
     parser.add_argument('--json', type=Path, default=Path('../pyx-engenharia-portfolio/portfolio.json'), help='Path to portfolio.json')
     parser.add_argument('--template', type=Path, default=Path('portfolio_template.html'), help='Path to Jinja2 template')
     parser.add_argument('--output', type=Path, default=Path('../pyx-engenharia-portfolio/index.html'), help='Output HTML file')
+    parser.add_argument('--force', action='store_true', help='Render even if the inputs are unchanged since the last build')
+    parser.add_argument('--watch', action='store_true', help='Rebuild whenever the JSON or a template changes')
+    parser.add_argument('--bytecode-cache', type=Path, help='Directory for compiled templates (default: per-user temp directory)')
+    parser.add_argument('--no-bytecode-cache', action='store_true', help='Do not cache compiled templates')
+    parser.add_argument('--stream', action='store_true', help='Parse portfolio.json incrementally to keep memory flat (not with --page-size)')
+    parser.add_argument('--page-size', type=int, help='Split output per category, with at most this many projects per page')
+    parser.add_argument('--index-template', default=DEFAULT_INDEX_TEMPLATE, help='Index page template, next to --template (used with --page-size)')
+    parser.add_argument('--assets', action='store_true', help='Fingerprint CSS/images, add srcset from image variants and write .gz/.br files')
+    parser.add_argument('--variant-map', type=Path, help=f'Image variants written by optimize_images.py (default: {VARIANT_MAP_NAME} next to --output)')
+    parser.add_argument('--image-sizes', default=DEFAULT_IMAGE_SIZES, help=f'sizes attribute for images with a srcset (default: "{DEFAULT_IMAGE_SIZES}")')
+    parser.add_argument('--workers', type=int, help='Processes rendering pages in parallel (default: CPU count)')
     args = parser.parse_args()
-
-    data = load_portfolio(args.json)
+    if args.stream and args.page_size:
+        parser.error('--stream cannot be combined with --page-size')
     if args.use_ai:
-        data = enrich_with_ai(data)
-    render_html(data, args.template, args.output)
+        try:
+            load_enricher(args.ai_backend)
+        except (ImportError, AttributeError, TypeError, ValueError) as e:
+            parser.error(f'--ai-backend: {e}')
+
+    env = create_environment(args.template.parent, args.bytecode_cache, not args.no_bytecode_cache)
+    options = {
+        'use_ai': args.use_ai,
+        'ai_backend': args.ai_backend,
+        'ai_concurrency': args.ai_concurrency,
+        'ai_cache': args.ai_cache,
+        'page_size': args.page_size,
+        'index_template': args.index_template,
+        'workers': args.workers,
+        'bytecode_cache_dir': args.bytecode_cache,
+        'use_bytecode_cache': not args.no_bytecode_cache,
+        'stream': args.stream,
+        'assets': args.assets,
+        'variant_map': args.variant_map,
+        'image_sizes': args.image_sizes,
+    }
+    if not args.watch:
+        build(args.json, args.template, args.output, env, force=args.force, **options)
+        return
+    try:
+        watch(args.json, args.template, args.output, env, force=args.force, **options)
+    except KeyboardInterrupt:
+        print("\n[INFO] Stopped watching")
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
@@ -3,6 +3,27 @@
 Local development server for PYX Engenharia portfolio.
 Provides a simple HTTP server with proper MIME types and error handling.
 
+Connections are served concurrently by a bounded thread pool with HTTP/1.1
+keep-alive, so one slow client or large download does not block the others.
+Idle keep-alive connections wait in a selector instead of holding a worker and
+are closed after --keepalive-timeout seconds. Connections beyond
+--max-connections are refused with 503, and Ctrl+C or SIGTERM stop the server
+after the requests in flight are answered.
+
+File contents and metadata are kept in an LRU cache with a byte budget
+(--cache-size), invalidated through inotify when available and by mtime/size
+otherwise. Responses carry strong ETags and Last-Modified, conditional
+requests get 304, and Cache-Control is set per path pattern (--cache-control).
+Text responses are negotiated on Accept-Encoding: up-to-date .br/.gz siblings
+(generate_static_html.py --assets) are served when present, otherwise the
+content is compressed on the fly and the result kept in the cache.
+Files too large to cache are sent with os.sendfile (zero-copy), and Range
+requests get single or multipart/byteranges 206 responses.
+
+Request counts by status and path, latency (histogram and recent p50/p95/p99),
+bytes sent and the file cache hit ratio are exposed in Prometheus text format
+on /__metrics; --no-access-log drops the per-request log lines under load.
+
 Known Issues:
 - Different Python versions may require different server commands
 - Port conflicts are common - try different ports if default is busy
@@ -10,13 +31,42 @@ Known Issues:
 """
 
 import http.server
-import socketserver
+import bisect
+import collections
+import concurrent.futures
+import dataclasses
+import datetime
+import email.utils
+import fnmatch
+import functools
+import gzip
+import hashlib
+import io
+import math
+import secrets
+import shutil
 import os
+import selectors
+import signal
 import sys
 import socket
+import threading
+import time
 from pathlib import Path
 import logging
-from typing import Optional
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # Configure logging
 logging.basicConfig(
@@ -29,17 +79,729 @@ logger = logging.getLogger(__name__)
 DEFAULT_PORT = 8000
 DEFAULT_DIRECTORY = Path(__file__).parent.parent
 MAX_PORT_ATTEMPTS = 5
+DEFAULT_WORKERS = 32
+DEFAULT_MAX_CONNECTIONS = 128
+DEFAULT_KEEPALIVE_TIMEOUT = 5.0
+DEFAULT_CACHE_SIZE_MB = 64
+# First matching glob wins; content-hashed names (generate_static_html.py --assets) never change
+DEFAULT_CACHE_CONTROL = [
+    ("*." + "[0-9a-f]" * 10 + ".*", "public, max-age=31536000, immutable"),
+    ("*", "no-cache"),
+]
+# Content codings in order of preference -> precompressed sibling suffix
+CONTENT_CODINGS = {"br": ".br", "gzip": ".gz"}
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "application/xml",
+                      "application/manifest+json", "image/svg+xml")
+MIN_COMPRESS_SIZE = 256
+# On-the-fly levels favour speed; precompressed siblings use the maximum
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# More ranges than this in one request are ignored and the whole body is sent
+MAX_RANGES = 16
+COPY_BUFSIZE = 64 * 1024
+METRICS_PATH = "/__metrics"
+# Upper bounds (seconds) of the request duration histogram buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LATENCY_QUANTILES = (0.5, 0.95, 0.99)
+# Recent requests the quantiles are computed over
+LATENCY_WINDOW = 10000
+# Distinct path labels kept; further paths are counted as "other"
+MAX_METRIC_PATHS = 1000
+
+@dataclass
+class CachedFile:
+    """Metadata of a served file, and its contents if small enough to cache."""
+    path: str
+    size: int
+    mtime_ns: int
+    etag: str
+    last_modified: str
+    data: Optional[bytes] = None
+    # Content coding -> compressed data, filled on demand
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+    # Precompressed sibling suffix -> whether that file exists, filled on demand
+    siblings: Dict[str, bool] = field(default_factory=dict)
+
+class FileCache:
+    """LRU cache of file contents and metadata, bounded by max_bytes.
+
+    Files larger than max_file_bytes only have their metadata cached, with an
+    ETag built from inode, mtime and size instead of a hash of the contents.
+    Entries are dropped through inotify when the directory of the file is
+    watched; otherwise each lookup compares the file's mtime and size.
+    Whether a file has precompressed siblings is remembered in its entry in
+    watched directories, where creating or deleting a sibling drops the entry.
+    """
+
+    ENTRY_OVERHEAD = 512
+
+    def __init__(self, max_bytes: int, max_file_bytes: Optional[int] = None, use_inotify: bool = True):
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes if max_file_bytes is not None else max_bytes // 8
+        self.size = 0
+        self._entries: "collections.OrderedDict[str, CachedFile]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._inotify = None
+        self._watches = {}
+        self._closed = False
+        self.hits = 0
+        self.misses = 0
+        # Bumped by every invalidation, so a load racing with a change is not stored
+        self._generation = 0
+        if use_inotify and INotify is not None:
+            self._inotify = INotify()
+            threading.Thread(target=self._watch, name="file-cache", daemon=True).start()
+
+    def get(self, path: str) -> CachedFile:
+        """Return the entry for path, (re)loading it if it changed; raises OSError."""
+        with self._lock:
+            entry = self._entries.get(path)
+            trusted = entry is not None and os.path.dirname(path) in self._watches
+            if trusted:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry
+            generation = self._generation
+        # Watch before the stat so no later change can go unnoticed
+        self._add_watch(os.path.dirname(path))
+        st = os.stat(path)
+        if entry is not None and (entry.mtime_ns, entry.size) == (st.st_mtime_ns, st.st_size):
+            with self._lock:
+                if path in self._entries:
+                    self._entries.move_to_end(path)
+                self.hits += 1
+            return entry
+        with self._lock:
+            self.misses += 1
+        entry = self._load(path, st)
+        self._store(entry, generation)
+        return entry
+
+    def _load(self, path: str, st: os.stat_result) -> CachedFile:
+        data = None
+        if st.st_size <= self.max_file_bytes:
+            with open(path, 'rb') as f:
+                data = f.read()
+            etag = f'"{hashlib.sha256(data).hexdigest()[:32]}"'
+        else:
+            # Hashing would read the whole file before sendfile sends it again
+            etag = f'"{st.st_ino:x}-{st.st_mtime_ns:x}-{st.st_size:x}"'
+        return CachedFile(
+            path=path,
+            size=len(data) if data is not None else st.st_size,
+            mtime_ns=st.st_mtime_ns,
+            etag=etag,
+            last_modified=email.utils.formatdate(st.st_mtime, usegmt=True),
+            data=data,
+        )
+
+    def sibling(self, entry: CachedFile, suffix: str) -> Optional[CachedFile]:
+        """Entry for entry.path + suffix, or None if that file does not exist."""
+        if entry.siblings.get(suffix) is False:
+            return None
+        try:
+            sibling = self.get(entry.path + suffix)
+        except OSError:
+            sibling = None
+        with self._lock:
+            # Without a watch nothing would tell us when a missing sibling appears
+            if self._entries.get(entry.path) is entry and os.path.dirname(entry.path) in self._watches:
+                entry.siblings[suffix] = sibling is not None
+        return sibling
+
+    def _cost(self, entry: CachedFile) -> int:
+        size = self.ENTRY_OVERHEAD + sum(len(data) for data in entry.encoded.values())
+        return size + (len(entry.data) if entry.data is not None else 0)
+
+    def encode(self, entry: CachedFile, coding: str) -> bytes:
+        """Compressed entry.data for coding, computed once while entry is cached."""
+        with self._lock:
+            data = entry.encoded.get(coding)
+        if data is not None:
+            return data
+        if coding == "br":
+            data = brotli.compress(entry.data, quality=BROTLI_QUALITY)
+        else:
+            data = gzip.compress(entry.data, compresslevel=GZIP_LEVEL, mtime=0)
+        with self._lock:
+            if self._entries.get(entry.path) is entry and coding not in entry.encoded:
+                entry.encoded[coding] = data
+                self.size += len(data)
+                self._evict()
+        return data
+
+    def _evict(self) -> None:
+        while self.size > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= self._cost(evicted)
+
+    def _store(self, entry: CachedFile, generation: int) -> None:
+        with self._lock:
+            if generation != self._generation:
+                return
+            old = self._entries.pop(entry.path, None)
+            if old is not None:
+                self.size -= self._cost(old)
+            self._entries[entry.path] = entry
+            self.size += self._cost(entry)
+            self._evict()
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Drop path, or every entry if path is None."""
+        with self._lock:
+            self._generation += 1
+            if path is None:
+                self._entries.clear()
+                self.size = 0
+            else:
+                # A sibling appearing or going away changes what its file negotiates to
+                paths = [path] + [path[:-len(suffix)] for suffix in CONTENT_CODINGS.values() if path.endswith(suffix)]
+                for changed in paths:
+                    entry = self._entries.pop(changed, None)
+                    if entry is not None:
+                        self.size -= self._cost(entry)
+
+    def _add_watch(self, directory: str) -> None:
+        if self._inotify is None or directory in self._watches:
+            return
+        mask = (inotify_flags.MODIFY | inotify_flags.ATTRIB | inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_FROM
+                | inotify_flags.MOVED_TO | inotify_flags.CREATE | inotify_flags.DELETE | inotify_flags.DELETE_SELF | inotify_flags.MOVE_SELF)
+        try:
+            wd = self._inotify.add_watch(directory, mask)
+        except OSError as e:
+            # e.g. the watch limit is reached: this directory falls back to stat checks
+            logger.debug(f"Cannot watch {directory}: {e}")
+            return
+        with self._lock:
+            self._watches[directory] = wd
+
+    def _watch(self) -> None:
+        directories = {}
+        while not self._closed:
+            events = self._inotify.read(timeout=500)
+            with self._lock:
+                directories = {wd: d for d, wd in self._watches.items()}
+            for event in events:
+                if event.mask & inotify_flags.Q_OVERFLOW:
+                    self.invalidate()
+                    continue
+                directory = directories.get(event.wd)
+                if directory is None:
+                    continue
+                if event.mask & (inotify_flags.IGNORED | inotify_flags.DELETE_SELF | inotify_flags.MOVE_SELF):
+                    # Entries under the old name can no longer be trusted
+                    with self._lock:
+                        if self._watches.get(directory) == event.wd:
+                            del self._watches[directory]
+                    self.invalidate()
+                    continue
+                self.invalidate(os.path.join(directory, event.name))
+        self._inotify.close()
+
+    def close(self) -> None:
+        self._closed = True
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class ServerMetrics:
+    """Request counters and latency statistics shared by all handlers.
+
+    Latency goes into a cumulative histogram (LATENCY_BUCKETS) and a window of
+    the last LATENCY_WINDOW requests, from which quantiles are computed when
+    the metrics are read.
+    """
+
+    def __init__(self, window: int = LATENCY_WINDOW, max_paths: int = MAX_METRIC_PATHS):
+        self.max_paths = max_paths
+        self.requests: Dict[Tuple[str, int], int] = collections.Counter()
+        self.paths = set()
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.duration_sum = 0.0
+        self.count = 0
+        self.bytes_sent = 0
+        self.recent = collections.deque(maxlen=window)
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, status: int, path: str, duration: float, sent: int) -> None:
+        with self._lock:
+            if path not in self.paths:
+                if len(self.paths) < self.max_paths:
+                    self.paths.add(path)
+                else:
+                    path = "other"
+            self.requests[(path, status)] += 1
+            self.bucket_counts[bisect.bisect_left(LATENCY_BUCKETS, duration)] += 1
+            self.duration_sum += duration
+            self.count += 1
+            self.bytes_sent += sent
+            self.recent.append(duration)
+
+    @staticmethod
+    def _quantiles(recent: List[float]) -> Dict[float, float]:
+        recent = sorted(recent)
+        if not recent:
+            return {}
+        return {q: recent[max(0, math.ceil(q * len(recent)) - 1)] for q in LATENCY_QUANTILES}
+
+    def quantiles(self) -> Dict[float, float]:
+        """Nearest-rank LATENCY_QUANTILES of the recent request durations."""
+        with self._lock:
+            recent = list(self.recent)
+        return self._quantiles(recent)
+
+    def render(self, file_cache: Optional[FileCache] = None) -> str:
+        """The metrics in Prometheus text exposition format.
+
+        The summary's quantiles, _sum and _count all cover the same window of
+        recent requests; totals since start are in the histogram.
+        """
+        with self._lock:
+            recent = list(self.recent)
+            requests = sorted(self.requests.items())
+            bucket_counts = list(self.bucket_counts)
+            duration_sum, count, bytes_sent = self.duration_sum, self.count, self.bytes_sent
+        lines = [
+            "# HELP local_server_requests_total Requests answered, by path and status.",
+            "# TYPE local_server_requests_total counter",
+        ]
+        for (path, status), value in requests:
+            lines.append(f'local_server_requests_total{{path="{_label(path)}",status="{status}"}} {value}')
+        lines += [
+            "# HELP local_server_request_duration_seconds Time from the request line to the end of the response.",
+            "# TYPE local_server_request_duration_seconds histogram",
+        ]
+        cumulative = 0
+        for bound, value in zip(LATENCY_BUCKETS + ("+Inf",), bucket_counts):
+            cumulative += value
+            lines.append(f'local_server_request_duration_seconds_bucket{{le="{bound}"}} {cumulative}')
+        lines += [
+            f"local_server_request_duration_seconds_sum {duration_sum}",
+            f"local_server_request_duration_seconds_count {count}",
+            f"# HELP local_server_recent_request_duration_seconds Duration quantiles of the last {self.recent.maxlen} requests.",
+            "# TYPE local_server_recent_request_duration_seconds summary",
+        ]
+        for q, value in self._quantiles(recent).items():
+            lines.append(f'local_server_recent_request_duration_seconds{{quantile="{q}"}} {value}')
+        lines += [
+            f"local_server_recent_request_duration_seconds_sum {sum(recent)}",
+            f"local_server_recent_request_duration_seconds_count {len(recent)}",
+            "# HELP local_server_sent_bytes_total Bytes written to clients, headers included.",
+            "# TYPE local_server_sent_bytes_total counter",
+            f"local_server_sent_bytes_total {bytes_sent}",
+            "# HELP local_server_start_time_seconds Unix time the server started.",
+            "# TYPE local_server_start_time_seconds gauge",
+            f"local_server_start_time_seconds {self.started}",
+        ]
+        if file_cache is not None:
+            hits, misses = file_cache.hits, file_cache.misses
+            lines += [
+                "# HELP local_server_file_cache_hits_total File lookups answered from the cache.",
+                "# TYPE local_server_file_cache_hits_total counter",
+                f"local_server_file_cache_hits_total {hits}",
+                "# HELP local_server_file_cache_misses_total File lookups that (re)loaded the file.",
+                "# TYPE local_server_file_cache_misses_total counter",
+                f"local_server_file_cache_misses_total {misses}",
+                "# HELP local_server_file_cache_hit_ratio Hits over all file lookups.",
+                "# TYPE local_server_file_cache_hit_ratio gauge",
+                f"local_server_file_cache_hit_ratio {hits / (hits + misses) if hits + misses else 0.0}",
+                "# HELP local_server_file_cache_bytes Memory held by cached contents.",
+                "# TYPE local_server_file_cache_bytes gauge",
+                f"local_server_file_cache_bytes {file_cache.size}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def summary(self, file_cache: Optional[FileCache] = None) -> str:
+        """One line for the log: requests, latency quantiles, bytes and cache hit ratio."""
+        line = f"{self.count} requests, {self.bytes_sent / 1024 / 1024:.1f}MB sent"
+        quantiles = self.quantiles()
+        if quantiles:
+            line += ", " + " ".join(f"p{int(q * 100)}={value * 1000:.1f}ms" for q, value in quantiles.items())
+        if file_cache is not None and file_cache.hits + file_cache.misses:
+            line += f", cache hit ratio {file_cache.hits / (file_cache.hits + file_cache.misses):.1%}"
+        return line
+
+class CountingWriter:
+    """Wraps a handler's wfile, counting the bytes written through it."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.written = 0
+
+    def write(self, data) -> int:
+        n = self.raw.write(data)
+        self.written += len(data) if n is None else n
+        return n
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Map each content coding in an Accept-Encoding header to its q-value."""
+    accepted = {}
+    for item in header.split(","):
+        coding, *params = item.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted["gzip" if coding == "x-gzip" else coding] = q
+    return accepted
+
+def parse_range(header: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """Inclusive byte ranges requested by a Range header for a body of size bytes.
+
+    Returns None when the header should be ignored (other units, syntax
+    errors, too many ranges) and an empty list when no range is satisfiable.
+    Overlapping and adjacent ranges are merged.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes":
+        return None
+    ranges = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, separator, last = part.partition("-")
+        if not separator:
+            return None
+        try:
+            if not first:
+                suffix = int(last)
+                if suffix < 0:
+                    return None
+                if suffix == 0:
+                    continue
+                start, end = max(0, size - suffix), size - 1
+            else:
+                start = int(first)
+                end = int(last) if last else size - 1
+                if start < 0 or (last and end < start):
+                    return None
+        except ValueError:
+            return None
+        if start < size:
+            ranges.append((start, min(end, size - 1)))
+    if len(ranges) > MAX_RANGES:
+        return None
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def parse_cache_control(rule: str) -> Tuple[str, str]:
+    """Parse a PATTERN=VALUE command-line rule."""
+    pattern, separator, value = rule.partition("=")
+    if not separator or not pattern:
+        raise ValueError(f"expected PATTERN=VALUE, got {rule!r}")
+    return pattern, value
 
 class CustomHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
     """Custom HTTP request handler with proper MIME types and error handling."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes: with Nagle's algorithm the body of
+    # a keep-alive response waits for the client's delayed ACK (~40ms)
+    disable_nagle_algorithm = True
     
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, directory: Optional[Path] = None, file_cache: Optional[FileCache] = None,
+                 cache_control: Optional[List[Tuple[str, str]]] = None, use_sendfile: bool = True,
+                 metrics: Optional[ServerMetrics] = None, access_log: bool = True, **kwargs):
+        self.file_cache = file_cache if file_cache is not None else FileCache(0, use_inotify=False)
+        self.cache_control = cache_control if cache_control is not None else DEFAULT_CACHE_CONTROL
+        self.use_sendfile = use_sendfile and hasattr(os, "sendfile")
+        self.metrics = metrics
+        self.access_log = access_log
+        self.status_code = None
+        self.request_started = None
+        # Literal bytes and (offset, count) spans of the source making up the body; None for all of it
+        self.body_plan = None
         try:
-            super().__init__(*args, directory=str(DEFAULT_DIRECTORY), **kwargs)
+            super().__init__(*args, directory=str(directory or DEFAULT_DIRECTORY), **kwargs)
+        except ConnectionError:
+            # The client went away; reported by the server's handle_error
+            raise
         except Exception as e:
             logger.error(f"Error initializing server: {e}")
             raise
+
+    def setup(self):
+        # Bounds how long a partly received request can hold a worker
+        self.timeout = getattr(self.server, "keepalive_timeout", None)
+        self.parked = False
+        super().setup()
+        self.wfile = CountingWriter(self.wfile)
+
+    def handle(self):
+        self.close_connection = True
+        self.handle_one_request()
+        self.serve_until_idle()
+
+    def serve_until_idle(self):
+        """Answer requests while more are waiting; park the connection once it is idle."""
+        while not self.close_connection:
+            if hasattr(self.server, "park") and not self.input_pending():
+                self.parked = True
+                return
+            self.handle_one_request()
+
+    def resume(self):
+        """Continue a parked connection whose next request has arrived."""
+        self.parked = False
+        self.handle_one_request()
+        self.serve_until_idle()
+
+    def input_pending(self) -> bool:
+        """True if (part of) the next request is already buffered or received."""
+        self.connection.setblocking(False)
+        try:
+            return bool(self.rfile.peek(1))
+        except BlockingIOError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+
+    def handle_one_request(self):
+        started = time.perf_counter()
+        written = self.wfile.written
+        self.status_code = self.request_started = None
+        self.path = "-"
+        try:
+            super().handle_one_request()
+        finally:
+            if self.metrics is not None and self.status_code is not None:
+                self.metrics.record(
+                    self.status_code, self.path.split('?', 1)[0].split('#', 1)[0],
+                    time.perf_counter() - (self.request_started or started), self.wfile.written - written
+                )
+        if getattr(self.server, "shutting_down", False):
+            self.close_connection = True
+
+    def parse_request(self):
+        # Latency is measured from here, excluding the wait for the request line
+        self.request_started = time.perf_counter()
+        return super().parse_request()
+
+    def send_response(self, code, message=None):
+        self.status_code = int(code)
+        super().send_response(code, message)
+
+    def finish(self):
+        # A parked connection keeps its buffered streams for the next request
+        if not self.parked:
+            super().finish()
     
+    def send_head(self):
+        """Serve files through the file cache with validators; directories as before."""
+        self.body_plan = None
+        if self.metrics is not None and self.path.split('?', 1)[0] == METRICS_PATH:
+            return self.send_metrics()
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            if not self.path.split('?', 1)[0].split('#', 1)[0].endswith('/'):
+                return super().send_head()
+            for index in ("index.html", "index.htm"):
+                if os.path.isfile(os.path.join(path, index)):
+                    path = os.path.join(path, index)
+                    break
+            else:
+                return super().send_head()
+        if path.endswith("/"):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+        try:
+            entry = self.file_cache.get(path)
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+
+        ctype = self.guess_type(path)
+        compressible = ctype.startswith(COMPRESSIBLE_TYPES)
+        coding, body = self.negotiate_encoding(entry) if compressible else (None, entry)
+
+        if self.not_modified(body):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_validators(body, path, compressible)
+            self.end_headers()
+            return None
+
+        if body.data is not None:
+            source = io.BytesIO(body.data)
+        else:
+            try:
+                source = open(body.path, 'rb')
+            except OSError:
+                self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+                return None
+            if os.fstat(source.fileno()).st_size != body.size:
+                # Replaced since it was cached; start over with fresh metadata
+                source.close()
+                self.file_cache.invalidate(body.path)
+                return self.send_head()
+
+        ranges = None
+        if "Range" in self.headers and self.if_range_matches(body):
+            ranges = parse_range(self.headers["Range"], body.size)
+        if ranges == []:
+            source.close()
+            self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+            self.send_header("Content-Range", f"bytes */{body.size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+
+        self.send_response(HTTPStatus.PARTIAL_CONTENT if ranges else HTTPStatus.OK)
+        self.send_header("Accept-Ranges", "bytes")
+        if coding is not None:
+            self.send_header("Content-Encoding", coding)
+        if not ranges:
+            self.send_header("Content-type", ctype)
+            self.send_header("Content-Length", str(body.size))
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            self.body_plan = [(start, end - start + 1)]
+            self.send_header("Content-type", ctype)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{body.size}")
+            self.send_header("Content-Length", str(end - start + 1))
+        else:
+            boundary = secrets.token_hex(16)
+            self.body_plan = []
+            for start, end in ranges:
+                separator = "\r\n" if self.body_plan else ""
+                self.body_plan.append((
+                    f"{separator}--{boundary}\r\n"
+                    f"Content-Type: {ctype}\r\nContent-Range: bytes {start}-{end}/{body.size}\r\n\r\n"
+                ).encode("latin-1"))
+                self.body_plan.append((start, end - start + 1))
+            self.body_plan.append(f"\r\n--{boundary}--\r\n".encode("latin-1"))
+            length = sum(len(item) if isinstance(item, bytes) else item[1] for item in self.body_plan)
+            self.send_header("Content-type", f"multipart/byteranges; boundary={boundary}")
+            self.send_header("Content-Length", str(length))
+        self.send_validators(body, path, compressible)
+        self.end_headers()
+        return source
+
+    def send_metrics(self):
+        body = self.metrics.render(self.file_cache).encode("utf-8")
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        return io.BytesIO(body)
+
+    def if_range_matches(self, entry: CachedFile) -> bool:
+        """False if an If-Range precondition fails, in which case Range is ignored."""
+        if_range = self.headers.get("If-Range")
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith(('"', 'W/')):
+            # Strong comparison: a weak tag never matches
+            return if_range == entry.etag
+        return if_range == entry.last_modified
+
+    def copyfile(self, source, outputfile):
+        """Write the planned body: whole source, one range or multipart parts."""
+        for item in self.body_plan if self.body_plan is not None else [(0, None)]:
+            if isinstance(item, bytes):
+                outputfile.write(item)
+            else:
+                self.copy_span(source, outputfile, *item)
+
+    def copy_span(self, source, outputfile, offset: int, count: Optional[int]) -> None:
+        """Send count bytes of source from offset (to the end if count is None).
+
+        Real files go through os.sendfile (socket.sendfile), avoiding copies
+        through Python buffers; the copy path remains for cached contents and
+        platforms without sendfile.
+        """
+        if self.use_sendfile and not isinstance(source, io.BytesIO):
+            self.wfile.written += self.connection.sendfile(source, offset, count)
+            return
+        source.seek(offset)
+        if count is None:
+            shutil.copyfileobj(source, outputfile, COPY_BUFSIZE)
+            return
+        while count > 0:
+            block = source.read(min(count, COPY_BUFSIZE))
+            if not block:
+                break
+            outputfile.write(block)
+            count -= len(block)
+
+    def negotiate_encoding(self, entry: CachedFile) -> Tuple[Optional[str], CachedFile]:
+        """Pick the representation of entry to send for the request's Accept-Encoding.
+
+        Returns the content coding (None for identity) and an entry for the
+        encoded bytes, whose ETag is derived from the original one.
+        """
+        accepted = parse_accept_encoding(self.headers.get("Accept-Encoding", ""))
+        quality = {coding: accepted.get(coding, accepted.get("*", 0.0)) for coding in CONTENT_CODINGS}
+        # Highest q-value first; ties keep the server's order of preference
+        for coding in sorted(CONTENT_CODINGS, key=lambda c: -quality[c]):
+            if quality[coding] <= 0:
+                continue
+            sibling = self.file_cache.sibling(entry, CONTENT_CODINGS[coding])
+            # A sibling older than the file was left behind by a previous build
+            if sibling is not None and sibling.mtime_ns >= entry.mtime_ns:
+                return coding, dataclasses.replace(
+                    sibling, etag=f'{entry.etag[:-1]}-{coding}"', last_modified=entry.last_modified,
+                    mtime_ns=entry.mtime_ns, encoded={}, siblings={}
+                )
+            if entry.data is None or entry.size < MIN_COMPRESS_SIZE or (coding == "br" and brotli is None):
+                continue
+            data = self.file_cache.encode(entry, coding)
+            return coding, dataclasses.replace(
+                entry, size=len(data), etag=f'{entry.etag[:-1]}-{coding}"', data=data, encoded={}, siblings={}
+            )
+        return None, entry
+
+    def send_validators(self, entry: CachedFile, path: str, vary: bool = False) -> None:
+        self.send_header("ETag", entry.etag)
+        self.send_header("Last-Modified", entry.last_modified)
+        self.send_header("Cache-Control", self.cache_control_for(path))
+        if vary:
+            self.send_header("Vary", "Accept-Encoding")
+
+    def cache_control_for(self, path: str) -> str:
+        relative = os.path.relpath(path, self.directory).replace(os.sep, "/")
+        for pattern, value in self.cache_control:
+            if fnmatch.fnmatchcase(relative, pattern):
+                return value
+        return "no-cache"
+
+    def not_modified(self, entry: CachedFile) -> bool:
+        """Evaluate If-None-Match, or If-Modified-Since when there is no If-None-Match."""
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            # Weak comparison, as RFC 9110 requires for If-None-Match
+            return "*" in tags or entry.etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is None:
+            return False
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since)
+        except (TypeError, IndexError, OverflowError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=datetime.timezone.utc)
+        modified = datetime.datetime.fromtimestamp(entry.mtime_ns // 1_000_000_000, datetime.timezone.utc)
+        return modified <= since
+
     def end_headers(self):
         # Add security headers
         self.send_header('X-Content-Type-Options', 'nosniff')
@@ -47,35 +809,199 @@ class CustomHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
         self.send_header('X-XSS-Protection', '1; mode=block')
         super().end_headers()
     
+    def log_request(self, code='-', size='-'):
+        if not self.access_log:
+            return
+        level = logging.WARNING if code == HTTPStatus.NOT_FOUND else logging.INFO
+        if logger.isEnabledFor(level):
+            logger.log(level, '%s - "%s" %s %s', self.address_string(), self.requestline, int(code), size)
+
     def log_message(self, format, *args):
-        if "404" in format % args:
-            logger.warning("%s - %s", self.address_string(), format % args)
-        else:
-            logger.info("%s - %s", self.address_string(), format % args)
+        logger.info("%s - %s", self.address_string(), format % args)
 
     def log_error(self, format, *args):
         logger.error("%s - %s", self.address_string(), format % args)
 
+class PooledHTTPServer(http.server.HTTPServer):
+    """HTTP server that serves connections from a bounded thread pool.
+
+    Up to max_connections connections are open at once; further ones are
+    refused with 503. A worker serves a connection while requests keep coming,
+    then parks it: a watcher thread waits for the next request on all parked
+    connections at once and hands the connection back to the pool, or closes
+    it after keepalive_timeout seconds. Closing the server stops reading from
+    open connections, lets requests in flight complete and waits for the
+    workers.
+    """
+
+    allow_reuse_address = True
+
+    def __init__(self, server_address, handler_class, workers: int = DEFAULT_WORKERS,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT):
+        self.keepalive_timeout = keepalive_timeout
+        self.request_queue_size = max_connections
+        self.shutting_down = False
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="http")
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._connections = set()
+        self._lock = threading.Lock()
+        self._parked = []
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        super().__init__(server_address, handler_class)
+        self._watcher = threading.Thread(target=self._watch_idle, name="http-idle", daemon=True)
+        self._watcher.start()
+
+    def finish_request(self, request, client_address):
+        return self.RequestHandlerClass(request, client_address, self)
+
+    def process_request(self, request, client_address):
+        if self.shutting_down or not self._slots.acquire(blocking=False):
+            logger.warning(f"Connection limit reached, refusing {client_address[0]}")
+            self._refuse(request)
+            return
+        with self._lock:
+            self._connections.add(request)
+        self._executor.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            handler = self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+            self._close(request)
+            return
+        self._after_requests(handler)
+
+    def _resume(self, handler):
+        try:
+            handler.resume()
+        except Exception:
+            self.handle_error(handler.request, handler.client_address)
+            handler.parked = False
+        self._after_requests(handler)
+
+    def _after_requests(self, handler):
+        if handler.parked and not self.shutting_down:
+            self.park(handler)
+            return
+        handler.parked = False
+        try:
+            handler.finish()
+        except OSError:
+            pass
+        self._close(handler.request)
+
+    def _close(self, request):
+        with self._lock:
+            self._connections.discard(request)
+        self.shutdown_request(request)
+        self._slots.release()
+
+    def park(self, handler):
+        """Hand an idle keep-alive connection to the watcher thread."""
+        with self._lock:
+            self._parked.append(handler)
+        self._wakeup_w.send(b"\0")
+
+    def _watch_idle(self):
+        """Resubmit parked connections when readable; close them when idle too long."""
+        deadlines = {}
+        with selectors.DefaultSelector() as selector:
+            selector.register(self._wakeup_r, selectors.EVENT_READ)
+            while not self.shutting_down:
+                for handler in self._take_parked():
+                    selector.register(handler.connection, selectors.EVENT_READ, handler)
+                    deadlines[handler] = time.monotonic() + self.keepalive_timeout
+                timeout = max(0.0, min(deadlines.values()) - time.monotonic()) if deadlines else None
+                for key, _ in selector.select(timeout):
+                    if key.data is None:
+                        self._wakeup_r.recv(4096)
+                        continue
+                    selector.unregister(key.fileobj)
+                    del deadlines[key.data]
+                    self._executor.submit(self._resume, key.data)
+                now = time.monotonic()
+                for handler in [h for h, deadline in deadlines.items() if deadline <= now or self.shutting_down]:
+                    selector.unregister(handler.connection)
+                    del deadlines[handler]
+                    self._after_requests(handler)
+            for handler in list(deadlines) + self._take_parked():
+                self._after_requests(handler)
+
+    def _take_parked(self):
+        with self._lock:
+            parked, self._parked = self._parked, []
+        return parked
+
+    def _refuse(self, request):
+        try:
+            request.sendall(
+                b"HTTP/1.1 503 Service Unavailable\r\nRetry-After: 1\r\n"
+                b"Content-Length: 0\r\nConnection: close\r\n\r\n"
+            )
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def handle_error(self, request, client_address):
+        error = sys.exc_info()[1]
+        if isinstance(error, ConnectionError):
+            logger.debug(f"{client_address[0]} disconnected: {error}")
+        else:
+            logger.exception(f"Error serving {client_address[0]}")
+
+    def server_close(self):
+        self.shutting_down = True
+        super().server_close()
+        self._wakeup_w.send(b"\0")
+        self._watcher.join()
+        # Wake handlers blocked reading the next request; responses still go out
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+        self._executor.shutdown(wait=True)
+        # Connections parked by requests that finished while the watcher stopped
+        for handler in self._take_parked():
+            self._after_requests(handler)
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
 def find_available_port(start_port: int) -> int:
     """Find an available port starting from start_port."""
     for port in range(start_port, start_port + MAX_PORT_ATTEMPTS):
         try:
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                # Same as the server, so connections in TIME_WAIT do not count as busy
+                s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
                 s.bind(('', port))
                 return port
         except socket.error:
             continue
     raise RuntimeError(f"No available ports found between {start_port} and {start_port + MAX_PORT_ATTEMPTS - 1}")
 
-def run_server(port: int = DEFAULT_PORT, directory: Optional[Path] = None) -> None:
+def run_server(port: int = DEFAULT_PORT, directory: Optional[Path] = None,
+               workers: int = DEFAULT_WORKERS, max_connections: int = DEFAULT_MAX_CONNECTIONS,
+               keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+               cache_size_mb: float = DEFAULT_CACHE_SIZE_MB,
+               cache_control: Optional[List[Tuple[str, str]]] = None,
+               use_sendfile: bool = True, access_log: bool = True) -> None:
     """Run the local development server."""
     try:
         if directory:
             if not directory.exists():
                 logger.error(f"Directory not found: {directory}")
                 sys.exit(1)
-            os.chdir(str(directory))
             logger.info(f"Serving directory: {directory.absolute()}")
+        else:
+            directory = DEFAULT_DIRECTORY
         
         # Try to find an available port
         try:
@@ -85,19 +1011,34 @@ def run_server(port: int = DEFAULT_PORT, directory: Optional[Path] = None) -> No
             logger.info("Try using a different port with: python local_server.py -p <port>")
             sys.exit(1)
         
-        handler = CustomHTTPRequestHandler
+        file_cache = FileCache(int(cache_size_mb * 1024 * 1024))
+        metrics = ServerMetrics()
+        handler = functools.partial(
+            CustomHTTPRequestHandler,
+            directory=directory,
+            file_cache=file_cache,
+            cache_control=(cache_control or []) + DEFAULT_CACHE_CONTROL,
+            use_sendfile=use_sendfile,
+            metrics=metrics,
+            access_log=access_log
+        )
+        signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
         
-        with socketserver.TCPServer(("", port), handler) as httpd:
+        with PooledHTTPServer(("", port), handler, workers, max_connections, keepalive_timeout) as httpd:
             logger.info(f"Server started successfully!")
             logger.info(f"Access your site at: http://localhost:{port}")
+            logger.info(f"Serving with {workers} workers, up to {max_connections} connections")
+            logger.info(f"Metrics at: http://localhost:{port}{METRICS_PATH}")
             logger.info("Press Ctrl+C to stop the server")
             
             try:
                 httpd.serve_forever()
             except KeyboardInterrupt:
                 logger.info("\nShutting down server...")
-                httpd.server_close()
-                sys.exit(0)
+        file_cache.close()
+        logger.info(f"Served {metrics.summary(file_cache)}")
+        logger.info("Server stopped")
+        sys.exit(0)
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         logger.info("\nTroubleshooting tips:")
@@ -118,6 +1059,22 @@ if __name__ == "__main__":
                       help=f"Port to run the server on (default: {DEFAULT_PORT})")
     parser.add_argument("-d", "--directory", type=Path,
                       help="Directory to serve (default: project root)")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS,
+                      help=f"Worker threads serving connections (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--max-connections", type=int, default=DEFAULT_MAX_CONNECTIONS,
+                      help=f"Open connections before new ones are refused (default: {DEFAULT_MAX_CONNECTIONS})")
+    parser.add_argument("--keepalive-timeout", type=float, default=DEFAULT_KEEPALIVE_TIMEOUT,
+                      help=f"Seconds an idle keep-alive connection is kept open (default: {DEFAULT_KEEPALIVE_TIMEOUT})")
+    parser.add_argument("--cache-size", type=float, default=DEFAULT_CACHE_SIZE_MB, metavar="MB",
+                      help=f"Memory for cached file contents (default: {DEFAULT_CACHE_SIZE_MB}MB, 0 disables)")
+    parser.add_argument("--cache-control", action="append", default=[], metavar="PATTERN=VALUE",
+                      help="Cache-Control for paths matching a glob, e.g. 'img/*=public, max-age=86400'; "
+                           "repeatable, first match wins, before the defaults (hashed names: immutable, "
+                           "everything else: no-cache)")
+    parser.add_argument("--no-sendfile", action="store_true",
+                      help="Copy file bodies through Python buffers instead of os.sendfile")
+    parser.add_argument("--no-access-log", action="store_true",
+                      help=f"Do not log every request (counts and latency stay available on {METRICS_PATH})")
     parser.add_argument("-v", "--verbose", action="store_true",
                       help="Enable verbose logging")
     
@@ -126,4 +1083,10 @@ if __name__ == "__main__":
     if args.verbose:
         logger.setLevel(logging.DEBUG)
     
-    run_server(args.port, args.directory) 
\ No newline at end of file
+    try:
+        cache_control = [parse_cache_control(rule) for rule in args.cache_control]
+    except ValueError as e:
+        parser.error(f"--cache-control: {e}")
+    
+    run_server(args.port, args.directory, args.workers, args.max_connections, args.keepalive_timeout,
+               args.cache_size, cache_control, not args.no_sendfile, not args.no_access_log) 
\ No newline at end of file
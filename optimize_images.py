@@ -7,11 +7,31 @@ Optimizes images for web use while maintaining quality.
 import os
 from pathlib import Path
 import logging
-from typing import List, Tuple
-from PIL import Image
+import hashlib
+import io
+import json
+import re
+import time
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from PIL import Image, features
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 import argparse
+import csv
 import concurrent.futures
-from dataclasses import dataclass
+import copy
+import dataclasses
+import shutil
+import itertools
+import threading
+from contextlib import contextmanager
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from resource_usage import peak_rss_mb
 
 # Configure logging
 logging.basicConfig(
@@ -20,101 +40,1054 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+MANIFEST_NAME = ".optimize_manifest.json"
+MANIFEST_VERSION = 2
+VARIANT_MAP_NAME = "image_variants.json"
+OPTIMIZED_SUFFIX = "_optimized"
+# Matches the stem of any file this script writes: <stem>_optimized or <stem>_<ext>_optimized_<width>w
+OUTPUT_STEM_RE = re.compile(rf"{OPTIMIZED_SUFFIX}(_\d+w)?$")
+# Content-hashed copies written by generate_static_html.py --assets
+FINGERPRINT_STEM_RE = re.compile(r"\.[0-9a-f]{10}$")
+# Variant format name -> (file extension, Pillow feature that must be available)
+VARIANT_FORMATS = {
+    "jpeg": (".jpg", None),
+    "png": (".png", None),
+    "webp": (".webp", "webp"),
+    "avif": (".avif", "avif"),
+}
+DEFAULT_VARIANT_FORMATS = ["jpeg", "webp"]
+# Formats whose size/quality trade-off is tuned by --target-ssim
+LOSSY_FORMATS = {"JPEG", "WEBP", "AVIF"}
+QUALITY_SEARCH_RANGE = (30, 95)
+SSIM_SAMPLE_WIDTH = 512
+SSIM_WINDOW = 8
+DEDUPE_MODES = ("off", "exact", "near")
+DEDUPE_ACTIONS = ("link", "report")
+# dHash compares a (DHASH_SIZE + 1) x DHASH_SIZE grayscale thumbnail, giving 64 bits
+DHASH_SIZE = 8
+DEFAULT_NEAR_THRESHOLD = 4
+STAGES = ("decode", "resize", "encode", "write")
+PROGRESS_INTERVAL = 2.0
+REPORT_FIELDS = [
+    "path", "skipped", "duplicate_of", "format", "width", "height",
+    "original_size", "optimized_size", "baseline_size", "duration",
+] + [f"{stage}_time" for stage in STAGES]
+HASH_CHUNK_SIZE = 1024 * 1024
+# Bumped when variant file names change, so variants under older names are re-encoded and removed
+VARIANT_NAMES_VERSION = 2
+EXECUTOR_BACKENDS = ("threads", "processes", "hybrid")
+MAX_CHUNK_SIZE = 16
+
 @dataclass
 class ImageStats:
-    """Statistics for image optimization."""
+    """Statistics for image optimization.
+
+    In variant mode optimized_size is the size of the largest variant in the
+    first output format, and variants lists every file written. In target-SSIM
+    mode, qualities holds the chosen quality per output and baseline_size the
+    size the primary output would have had at the fixed quality. timings
+    holds seconds spent per stage (see STAGES); path is the source path
+    relative to the processed directory.
+    """
     original_size: int
     optimized_size: int
     format: str
     dimensions: Tuple[int, int]
+    duration: float = 0.0
+    skipped: bool = False
+    variants: List[dict] = field(default_factory=list)
+    qualities: Dict[str, dict] = field(default_factory=dict)
+    baseline_size: int = 0
+    sha256: Optional[str] = None
+    duplicate_of: Optional[str] = None
+    path: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Write data through a temporary file so readers and hard links never see partial output."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+@contextmanager
+def stage_timer(stats: ImageStats, stage: str) -> Iterator[None]:
+    """Add the time spent in the block to stats.timings[stage]."""
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.timings[stage] = stats.timings.get(stage, 0.0) + time.perf_counter() - start_time
+
+def file_digest(file_path: Path) -> str:
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ImageManifest:
+    """Persistent record of optimized images, used to skip unchanged sources.
+
+    Entries are keyed by source path relative to the processed directory and
+    store the source size, mtime and content hash together with the settings
+    used to produce the output. An entry is reused only when all of them match
+    and the output file is still present. quality_cache keeps the qualities
+    chosen in target-SSIM mode by content hash, so renamed or re-encoded
+    sources do not repeat the search.
+    """
+
+    def __init__(self, path: Path, root: Path):
+        self.path = path
+        self.root = root
+        self.entries: Dict[str, dict] = {}
+        self.quality_cache: Dict[str, Dict[str, dict]] = {}
+
+    @classmethod
+    def load(cls, path: Path, root: Path) -> "ImageManifest":
+        """Load a manifest from disk, starting empty if it is missing or invalid."""
+        manifest = cls(path, root)
+        if path.exists():
+            try:
+                data = json.loads(path.read_text(encoding='utf-8'))
+                if data.get("version") == MANIFEST_VERSION:
+                    manifest.entries = data.get("entries", {})
+                    manifest.quality_cache = data.get("quality_cache", {})
+                else:
+                    logger.info(f"Ignoring manifest with unknown version: {path}")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read manifest {path}: {e}")
+        return manifest
+
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        hashes = {entry["sha256"] for entry in self.entries.values()}
+        data = {
+            "version": MANIFEST_VERSION,
+            "entries": self.entries,
+            "quality_cache": {h: q for h, q in self.quality_cache.items() if h in hashes},
+        }
+        write_atomic(self.path, json.dumps(data, indent=2, sort_keys=True).encode('utf-8'))
+
+    def key(self, file_path: Path) -> str:
+        return file_path.relative_to(self.root).as_posix()
+
+    def lookup(self, file_path: Path, settings: dict) -> Optional[dict]:
+        """Return the entry for file_path if its output is still up to date."""
+        entry = self.entries.get(self.key(file_path))
+        if not entry or entry.get("settings") != settings:
+            return None
+        if not all((self.root / output).exists() for output in entry["outputs"]):
+            return None
+
+        st = file_path.stat()
+        if entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns:
+            return entry
+        # Size or mtime changed (e.g. a fresh checkout): fall back to the content hash
+        if entry["size"] == st.st_size and entry["sha256"] == file_digest(file_path):
+            entry["mtime_ns"] = st.st_mtime_ns
+            return entry
+        return None
+
+    def record(self, file_path: Path, output_paths: List[Path], settings: dict, stats: ImageStats) -> List[Path]:
+        """Store the entry for file_path and delete outputs it no longer produces."""
+        outputs = [p.relative_to(self.root).as_posix() for p in output_paths]
+        stale = []
+        previous = self.entries.get(self.key(file_path))
+        for output in (previous or {}).get("outputs", []):
+            output_path = self.root / output
+            if output not in outputs and output_path.exists():
+                output_path.unlink()
+                stale.append(output_path)
+
+        st = file_path.stat()
+        digest = stats.sha256 or file_digest(file_path)
+        if stats.qualities:
+            self.quality_cache.setdefault(digest, {}).update(stats.qualities)
+        self.entries[self.key(file_path)] = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha256": digest,
+            "settings": settings,
+            "outputs": outputs,
+            "optimized_size": stats.optimized_size,
+            "format": stats.format,
+            "dimensions": list(stats.dimensions),
+            "duration": stats.duration,
+            "variants": stats.variants,
+            "baseline_size": stats.baseline_size,
+            "duplicate_of": stats.duplicate_of,
+        }
+        return stale
+
+    def remove_orphans(self, sources: List[Path]) -> List[Path]:
+        """Drop entries whose source is gone and delete their outputs."""
+        current = {self.key(f) for f in sources}
+        removed = []
+        for key in [k for k in self.entries if k not in current]:
+            entry = self.entries.pop(key)
+            for output in entry["outputs"]:
+                output_path = self.root / output
+                if output_path.exists():
+                    output_path.unlink()
+                    removed.append(output_path)
+        return removed
+
+def ssim_sample(img: Image.Image) -> "np.ndarray":
+    """Grayscale float array of img, downscaled to at most SSIM_SAMPLE_WIDTH wide."""
+    sample = img.convert('L')
+    if sample.width > SSIM_SAMPLE_WIDTH:
+        height = max(1, round(sample.height * SSIM_SAMPLE_WIDTH / sample.width))
+        sample = sample.resize((SSIM_SAMPLE_WIDTH, height), Image.Resampling.BOX)
+    return np.asarray(sample, dtype=np.float64)
+
+def ssim(a: "np.ndarray", b: "np.ndarray") -> float:
+    """Mean structural similarity of two grayscale images over SSIM_WINDOW boxes."""
+    window = max(1, min(SSIM_WINDOW, *a.shape))
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+
+    def box_mean(x: "np.ndarray") -> "np.ndarray":
+        # Sliding-window mean from a summed-area table
+        table = np.pad(x, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+        w = window
+        return (table[w:, w:] - table[:-w, w:] - table[w:, :-w] + table[:-w, :-w]) / (w * w)
+
+    mu_a = box_mean(a)
+    mu_b = box_mean(b)
+    var_a = box_mean(a * a) - mu_a ** 2
+    var_b = box_mean(b * b) - mu_b ** 2
+    covariance = box_mean(a * b) - mu_a * mu_b
+    numerator = (2 * mu_a * mu_b + c1) * (2 * covariance + c2)
+    denominator = (mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2)
+    return float((numerator / denominator).mean())
+
+class MemoryBudget:
+    """Limits the estimated decoded-pixel memory of images in flight at once.
+
+    A reservation larger than the whole budget is still admitted when nothing
+    else is in flight, so a single oversized image cannot deadlock the run.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def reserve(self, nbytes: int) -> Iterator[None]:
+        with self._cond:
+            self._cond.wait_for(lambda: self.in_use == 0 or self.in_use + nbytes <= self.limit)
+            self.in_use += nbytes
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_use -= nbytes
+                self._cond.notify_all()
+
+# One budget per process: threads share it, worker processes each get their own
+_memory_budgets: Dict[int, MemoryBudget] = {}
+_memory_budgets_lock = threading.Lock()
+
+def get_memory_budget(limit: int) -> MemoryBudget:
+    with _memory_budgets_lock:
+        if limit not in _memory_budgets:
+            _memory_budgets[limit] = MemoryBudget(limit)
+        return _memory_budgets[limit]
+
+def estimate_decoded_bytes(img: Image.Image) -> int:
+    """Estimate memory for decoding img plus its converted/resized copy."""
+    width, height = img.size
+    return width * height * max(3, len(img.getbands())) * 2
 
 class ImageOptimizer:
-    """Handles image optimization with various quality settings."""
+    """Handles image optimization with various quality settings.
+
+    By default each source produces one <stem>_optimized<suffix> file. When
+    widths are given, the source is decoded once and written as
+    <stem>_<source ext>_optimized_<width>w.<ext> for every width and format,
+    each width downscaled from the previous (larger) one rather than from the
+    original. The source extension keeps photo.jpg and photo.png apart.
+
+    low_memory lets JPEGs be decoded at a reduced scale (Pillow draft mode)
+    close to the target width. memory_budget, in bytes, bounds the estimated
+    decoded size of images being processed at once in this process.
+    target_ssim replaces the fixed quality with the lowest quality whose output
+    reaches that SSIM against the resized source.
+    """
     
-    def __init__(self, quality: int = 85, max_width: int = 1920):
+    def __init__(
+        self,
+        quality: int = 85,
+        max_width: int = 1920,
+        widths: Optional[List[int]] = None,
+        formats: Optional[List[str]] = None,
+        low_memory: bool = False,
+        memory_budget: Optional[int] = None,
+        target_ssim: Optional[float] = None
+    ):
         self.quality = quality
         self.max_width = max_width
+        self.low_memory = low_memory
+        self.memory_budget = memory_budget
+        if target_ssim is not None and np is None:
+            raise RuntimeError("--target-ssim requires NumPy (pip install numpy)")
+        self.target_ssim = target_ssim
+        # Chosen qualities by source SHA-256, filled from the manifest
+        self.quality_cache: Dict[str, Dict[str, dict]] = {}
         self.supported_formats = {'.jpg', '.jpeg', '.png', '.webp'}
+        self.widths = sorted(set(widths or []), reverse=True)
+        self.formats = []
+        for fmt in formats or (DEFAULT_VARIANT_FORMATS if self.widths else []):
+            if fmt not in VARIANT_FORMATS:
+                raise ValueError(f"Unknown variant format {fmt!r}, expected one of {', '.join(VARIANT_FORMATS)}")
+            feature = VARIANT_FORMATS[fmt][1]
+            if feature and not features.check(feature):
+                logger.warning(f"Pillow was built without {fmt} support; skipping {fmt} variants")
+                continue
+            self.formats.append(fmt)
+        if self.widths and not self.formats:
+            raise ValueError("No usable variant formats")
     
     def should_optimize(self, file_path: Path) -> bool:
         """Check if file should be optimized."""
         return (
             file_path.suffix.lower() in self.supported_formats
+            and not OUTPUT_STEM_RE.search(file_path.stem)
+            and not FINGERPRINT_STEM_RE.search(file_path.stem)
             and file_path.is_file()
         )
+
+    @property
+    def settings(self) -> dict:
+        """Settings that affect the output; a change invalidates manifest entries."""
+        settings = {
+            "quality": self.quality,
+            "max_width": self.max_width,
+            "widths": self.widths,
+            "formats": self.formats,
+            "low_memory": self.low_memory,
+            "target_ssim": self.target_ssim,
+        }
+        if self.widths:
+            settings["variant_names"] = VARIANT_NAMES_VERSION
+        return settings
     
     def get_output_path(self, file_path: Path) -> Path:
         """Get the output path for the optimized image."""
-        return file_path.parent / f"{file_path.stem}_optimized{file_path.suffix}"
+        return file_path.parent / f"{file_path.stem}{OPTIMIZED_SUFFIX}{file_path.suffix}"
+
+    def get_variant_path(self, file_path: Path, width: int, fmt: str) -> Path:
+        """Get the output path for one width/format variant."""
+        source_ext = file_path.suffix[1:]
+        return file_path.parent / f"{file_path.stem}_{source_ext}{OPTIMIZED_SUFFIX}_{width}w{VARIANT_FORMATS[fmt][0]}"
     
+    @property
+    def target_width(self) -> int:
+        return self.widths[0] if self.widths else self.max_width
+
+    def apply_draft(self, img: Image.Image) -> None:
+        """Ask the JPEG decoder to load img at the smallest scale not below the target.
+
+        Must be called before the image data is loaded.
+        """
+        width, height = img.size
+        if self.low_memory and img.format == 'JPEG' and width > self.target_width:
+            img.draft('RGB', (self.target_width, max(1, height * self.target_width // width)))
+
+    @contextmanager
+    def reserve_memory(self, img: Image.Image) -> Iterator[None]:
+        """Hold a share of the memory budget while img is being processed."""
+        if not self.memory_budget:
+            yield
+            return
+        with get_memory_budget(self.memory_budget).reserve(estimate_decoded_bytes(img)):
+            yield
+
+    def prepare(self, img: Image.Image) -> Image.Image:
+        """Convert and downscale a decoded image according to the settings."""
+        # Convert to RGB if necessary
+        if img.mode in ('RGBA', 'P'):
+            img = img.convert('RGB')
+        
+        # Calculate new dimensions
+        max_width = self.target_width
+        width, height = img.size
+        if width > max_width:
+            ratio = max_width / width
+            new_size = (max_width, int(height * ratio))
+            img = img.resize(new_size, Image.Resampling.LANCZOS)
+        return img
+
+    def _save_bytes(self, img: Image.Image, image_format: str, quality: Optional[int] = None) -> bytes:
+        buffer = io.BytesIO()
+        img.save(
+            buffer,
+            format=image_format,
+            quality=self.quality if quality is None else quality,
+            optimize=True
+        )
+        return buffer.getvalue()
+
+    def search_quality(self, img: Image.Image, image_format: str) -> int:
+        """Binary-search the lowest quality whose output reaches target_ssim.
+
+        Similarity is measured on grayscale copies no wider than SSIM_SAMPLE_WIDTH;
+        returns the top of QUALITY_SEARCH_RANGE if no quality reaches the target.
+        """
+        reference = ssim_sample(img)
+        low, high = QUALITY_SEARCH_RANGE
+        best = high
+        while low <= high:
+            quality = (low + high) // 2
+            with Image.open(io.BytesIO(self._save_bytes(img, image_format, quality))) as candidate:
+                score = ssim(reference, ssim_sample(candidate))
+            if score >= self.target_ssim:
+                best = quality
+                high = quality - 1
+            else:
+                low = quality + 1
+        return best
+
+    def pick_quality(self, img: Image.Image, image_format: str, digest: Optional[str], stats: ImageStats) -> int:
+        """Quality to encode img with, using the quality cache in target mode."""
+        if not self.target_ssim or image_format not in LOSSY_FORMATS:
+            return self.quality
+        key = f"{image_format.lower()}:{img.width}:{self.target_ssim}"
+        cached = self.quality_cache.get(digest, {}).get(key) if digest else None
+        if cached is None:
+            cached = {"quality": self.search_quality(img, image_format)}
+        if cached.get("baseline_quality") != self.quality:
+            # The searched quality does not depend on -q, but the size it is compared with does
+            cached = {
+                **cached,
+                "baseline_size": len(self._save_bytes(img, image_format)),
+                "baseline_quality": self.quality,
+            }
+        stats.qualities[key] = cached
+        if not stats.baseline_size:
+            stats.baseline_size = cached["baseline_size"]
+        return cached["quality"]
+
+    def encode(self, img: Image.Image, file_path: Path, digest: Optional[str] = None) -> Tuple[Dict[Path, bytes], ImageStats]:
+        """Encode every output for a decoded source.
+
+        Returns the encoded bytes keyed by output path and stats describing the
+        outputs; the caller fills in the source size, format and timing.
+        """
+        stats = ImageStats(original_size=0, optimized_size=0, format=None, dimensions=img.size)
+        with stage_timer(stats, "decode"):
+            img.load()
+        with stage_timer(stats, "resize"):
+            img = self.prepare(img)
+        stats.dimensions = img.size
+        if not self.widths:
+            image_format = Image.registered_extensions()[file_path.suffix.lower()]
+            with stage_timer(stats, "encode"):
+                quality = self.pick_quality(img, image_format, digest, stats)
+                data = self._save_bytes(img, image_format, quality)
+            stats.optimized_size = len(data)
+            return {self.get_output_path(file_path): data}, stats
+
+        outputs = {}
+        current = img
+        for width in self.widths:
+            if width < current.width:
+                height = max(1, round(current.height * width / current.width))
+                with stage_timer(stats, "resize"):
+                    current = current.resize((width, height), Image.Resampling.LANCZOS)
+            elif stats.variants:
+                # Source is narrower than this width and was already emitted at full size
+                continue
+            for fmt in self.formats:
+                output_path = self.get_variant_path(file_path, current.width, fmt)
+                with stage_timer(stats, "encode"):
+                    quality = self.pick_quality(current, fmt.upper(), digest, stats)
+                    data = self._save_bytes(current, fmt.upper(), quality)
+                outputs[output_path] = data
+                stats.variants.append({
+                    "path": str(output_path),
+                    "width": current.width,
+                    "height": current.height,
+                    "format": fmt,
+                    "size": len(data),
+                })
+        stats.optimized_size = stats.variants[0]["size"]
+        return outputs, stats
+
     def optimize_image(self, file_path: Path) -> ImageStats:
         """Optimize a single image."""
+        start_time = time.perf_counter()
         try:
+            digest = file_digest(file_path) if self.target_ssim else None
             with Image.open(file_path) as img:
-                # Convert to RGB if necessary
-                if img.mode in ('RGBA', 'P'):
-                    img = img.convert('RGB')
-                
-                # Calculate new dimensions
-                width, height = img.size
-                if width > self.max_width:
-                    ratio = self.max_width / width
-                    new_size = (self.max_width, int(height * ratio))
-                    img = img.resize(new_size, Image.Resampling.LANCZOS)
-                
-                # Prepare output path
-                output_path = self.get_output_path(file_path)
-                
-                # Save optimized image
-                img.save(
-                    output_path,
-                    quality=self.quality,
-                    optimize=True
-                )
-                
-                return ImageStats(
-                    original_size=file_path.stat().st_size,
-                    optimized_size=output_path.stat().st_size,
-                    format=img.format,
-                    dimensions=img.size
-                )
+                source_format = img.format
+                self.apply_draft(img)
+                with self.reserve_memory(img):
+                    outputs, stats = self.encode(img, file_path, digest)
+
+            # Save optimized image(s)
+            with stage_timer(stats, "write"):
+                for output_path, data in outputs.items():
+                    write_atomic(output_path, data)
+
+            stats.original_size = file_path.stat().st_size
+            stats.format = source_format
+            stats.sha256 = digest
+            stats.duration = time.perf_counter() - start_time
+            return stats
                 
         except Exception as e:
             logger.error(f"Error optimizing {file_path}: {e}")
             raise
 
-def process_directory(directory: Path, quality: int = 85, max_width: int = 1920) -> List[ImageStats]:
-    """Process all images in a directory."""
-    optimizer = ImageOptimizer(quality=quality, max_width=max_width)
-    stats = []
+    def encode_bytes(self, data: bytes, file_path: Path) -> Tuple[Dict[Path, bytes], ImageStats]:
+        """Optimize an image held in memory; the caller writes the outputs."""
+        start_time = time.perf_counter()
+        digest = hashlib.sha256(data).hexdigest() if self.target_ssim else None
+        with Image.open(io.BytesIO(data)) as img:
+            source_format = img.format
+            self.apply_draft(img)
+            with self.reserve_memory(img):
+                outputs, stats = self.encode(img, file_path, digest)
+        stats.original_size = len(data)
+        stats.format = source_format
+        stats.sha256 = digest
+        stats.duration = time.perf_counter() - start_time
+        return outputs, stats
+
+def _optimize_chunk(optimizer: ImageOptimizer, files: List[Path]) -> List[Tuple[Path, Optional[ImageStats], Optional[str]]]:
+    """Optimize a batch of files in a worker; errors are returned, not raised."""
+    results = []
+    for file_path in files:
+        try:
+            results.append((file_path, optimizer.optimize_image(file_path), None))
+        except Exception as e:
+            results.append((file_path, None, str(e)))
+    return results
+
+def _encode_chunk(optimizer: ImageOptimizer, payloads: List[Tuple[Path, bytes]]) -> List[Tuple[Path, Optional[Dict[Path, bytes]], Optional[ImageStats], Optional[str]]]:
+    """Encode a batch of in-memory sources in a worker process."""
+    results = []
+    for file_path, data in payloads:
+        try:
+            outputs, stat = optimizer.encode_bytes(data, file_path)
+            results.append((file_path, outputs, stat, None))
+        except Exception as e:
+            results.append((file_path, None, None, str(e)))
+    return results
+
+def _read_source(file_path: Path) -> Tuple[Path, Union[bytes, Exception]]:
+    """Read a source file on an I/O thread; a failed read is returned, not raised."""
+    try:
+        return file_path, file_path.read_bytes()
+    except OSError as e:
+        return file_path, e
+
+def _chunked(items: List, size: int) -> Iterator[List]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def default_chunk_size(count: int, workers: int) -> int:
+    """Pick a chunk size giving each worker about four batches."""
+    return max(1, min(MAX_CHUNK_SIZE, count // (workers * 4)))
+
+def run_optimizer(
+    optimizer: ImageOptimizer,
+    files: List[Path],
+    backend: str = "threads",
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None
+) -> Iterator[Tuple[Path, Optional[ImageStats], Optional[str]]]:
+    """Optimize files on the selected executor backend.
+
+    Yields ``(file_path, stats, error)`` as results complete. ``threads`` runs
+    optimize_image in a thread pool; ``processes`` sends chunks of paths to a
+    process pool; ``hybrid`` reads and writes files on I/O threads and only ships
+    the decode/resize/encode work to the process pool.
+    """
+    if backend not in EXECUTOR_BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {', '.join(EXECUTOR_BACKENDS)}")
+    if not files:
+        return
+    workers = workers or os.cpu_count() or 1
+
+    if backend == "threads":
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            future_to_file = {
+                executor.submit(optimizer.optimize_image, f): f
+                for f in files
+            }
+            for future in concurrent.futures.as_completed(future_to_file):
+                file_path = future_to_file[future]
+                try:
+                    yield file_path, future.result(), None
+                except Exception as e:
+                    yield file_path, None, str(e)
+        return
+
+    chunk_size = chunk_size or default_chunk_size(len(files), workers)
+    if optimizer.memory_budget:
+        # Each worker process enforces its own budget; split the total between them
+        optimizer = copy.copy(optimizer)
+        optimizer.memory_budget = max(1, optimizer.memory_budget // workers)
+
+    if backend == "processes":
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_optimize_chunk, optimizer, chunk)
+                for chunk in _chunked(files, chunk_size)
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                yield from future.result()
+        return
+
+    def write_outputs(outputs: Dict[Path, bytes], stats: ImageStats) -> None:
+        with stage_timer(stats, "write"):
+            for output_path, data in outputs.items():
+                write_atomic(output_path, data)
+
+    io_workers = min(32, workers * 2)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=io_workers) as io_pool, \
+            concurrent.futures.ProcessPoolExecutor(max_workers=workers) as cpu_pool:
+        # Files that could not be read, reported with the results of their chunk
+        read_errors: Dict[concurrent.futures.Future, List[Tuple[Path, str]]] = {}
+
+        def submit_chunk(chunk: List[Path]) -> concurrent.futures.Future:
+            payloads, errors = [], []
+            for file_path, data in io_pool.map(_read_source, chunk):
+                if isinstance(data, Exception):
+                    errors.append((file_path, str(data)))
+                else:
+                    payloads.append((file_path, data))
+            future = cpu_pool.submit(_encode_chunk, optimizer, payloads)
+            read_errors[future] = errors
+            return future
+
+        # Keep a bounded number of chunks in flight so sources are not all held in memory
+        chunks = _chunked(files, chunk_size)
+        in_flight = {submit_chunk(chunk) for chunk in itertools.islice(chunks, workers * 2)}
+        while in_flight:
+            done, in_flight = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                next_chunk = next(chunks, None)
+                if next_chunk is not None:
+                    in_flight.add(submit_chunk(next_chunk))
+
+                for file_path, error in read_errors.pop(future):
+                    yield file_path, None, error
+                results = future.result()
+                writes = [
+                    (file_path, stat, io_pool.submit(write_outputs, outputs, stat))
+                    for file_path, outputs, stat, error in results if error is None
+                ]
+                for file_path, _, _, error in results:
+                    if error is not None:
+                        yield file_path, None, error
+                for file_path, stat, write in writes:
+                    try:
+                        write.result()
+                        yield file_path, stat, None
+                    except Exception as e:
+                        yield file_path, None, str(e)
+
+def dhash(file_path: Path) -> Tuple[int, int]:
+    """Return the 64-bit difference hash of an image and its pixel count."""
+    with Image.open(file_path) as img:
+        pixels = img.width * img.height
+        img.draft('L', (DHASH_SIZE * 4, DHASH_SIZE * 4))
+        thumb = img.convert('L').resize((DHASH_SIZE + 1, DHASH_SIZE), Image.Resampling.BOX)
+    values = np.asarray(thumb, dtype=np.int16)
+    bits = (values[:, 1:] > values[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big'), pixels
+
+def _near_duplicate_groups(files: List[Path], threshold: int) -> List[List[Path]]:
+    """Group files whose dHashes differ in at most threshold bits.
+
+    Hashes are split into threshold + 1 bands; two hashes within threshold bits
+    agree on at least one whole band, so only hashes sharing a band value are
+    compared and memory stays linear in the number of files.
+    """
+    hashes, pixels = [], []
+    for f in files:
+        h, n = dhash(f)
+        hashes.append(h)
+        pixels.append(n)
+
+    # Union-find over all pairs within the threshold
+    parent = list(range(len(files)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i: int, j: int) -> None:
+        parent[find(i)] = find(j)
+
+    # Identical hashes are joined directly; only distinct ones are compared
+    by_hash: Dict[int, List[int]] = defaultdict(list)
+    for i, h in enumerate(hashes):
+        by_hash[h].append(i)
+    for members in by_hash.values():
+        for i in members[1:]:
+            union(members[0], i)
+
+    bits = DHASH_SIZE * DHASH_SIZE
+    if threshold >= bits:
+        for i in range(1, len(files)):
+            union(0, i)
+    else:
+        bounds = [bits * k // (threshold + 1) for k in range(threshold + 2)]
+        for low, high in zip(bounds, bounds[1:]):
+            mask = (1 << (high - low)) - 1
+            buckets: Dict[int, List[int]] = defaultdict(list)
+            for h in by_hash:
+                buckets[(h >> low) & mask].append(h)
+            for bucket in buckets.values():
+                for n, a in enumerate(bucket):
+                    for b in bucket[n + 1:]:
+                        if bin(a ^ b).count("1") <= threshold:
+                            union(by_hash[a][0], by_hash[b][0])
+
+    groups = defaultdict(list)
+    for i in range(len(files)):
+        groups[find(i)].append(i)
+    # The largest image represents its group
+    return [
+        [files[i] for i in sorted(members, key=lambda i: (-pixels[i], files[i]))]
+        for members in groups.values() if len(members) > 1
+    ]
+
+def find_duplicate_groups(
+    files: List[Path],
+    optimizer: ImageOptimizer,
+    mode: str = "exact",
+    threshold: int = DEFAULT_NEAR_THRESHOLD
+) -> List[List[Path]]:
+    """Group identical (and, in near mode, visually similar) images.
+
+    The first path of each group is the one to encode. Only files that would
+    be encoded to the same output format are grouped together.
+    """
+    if mode not in DEDUPE_MODES:
+        raise ValueError(f"Unknown dedupe mode {mode!r}, expected one of {', '.join(DEDUPE_MODES)}")
+    if mode == "off":
+        return []
+    if mode == "near" and np is None:
+        raise RuntimeError("--dedupe near requires NumPy (pip install numpy)")
+
+    def output_format(f: Path) -> Optional[str]:
+        return None if optimizer.widths else Image.registered_extensions().get(f.suffix.lower())
+
+    # Exact duplicates: only files sharing size and output format need hashing
+    by_size = defaultdict(list)
+    for f in files:
+        by_size[(f.stat().st_size, output_format(f))].append(f)
+    groups = []
+    for candidates in by_size.values():
+        if len(candidates) < 2:
+            continue
+        by_digest = defaultdict(list)
+        for f in candidates:
+            by_digest[file_digest(f)].append(f)
+        groups.extend(sorted(g) for g in by_digest.values() if len(g) > 1)
+    if mode == "exact":
+        return groups
+
+    # Near duplicates among the remaining files and exact-group representatives
+    grouped = {f: g for g in groups for f in g}
+    by_format = defaultdict(list)
+    for f in files:
+        if f not in grouped or grouped[f][0] == f:
+            by_format[output_format(f)].append(f)
+    merged = []
+    for candidates in by_format.values():
+        for near_group in _near_duplicate_groups(sorted(candidates), threshold) if len(candidates) > 1 else []:
+            members = []
+            for f in near_group:
+                exact_group = grouped.get(f, [f])
+                for member in exact_group:
+                    grouped.pop(member, None)
+                members.extend(exact_group)
+            merged.append(members)
+    seen = set()
+    for g in grouped.values():
+        if g[0] not in seen:
+            seen.add(g[0])
+            merged.append(g)
+    return merged
+
+def link_or_copy(source: Path, target: Path) -> None:
+    """Hard-link target to source, copying if the filesystem does not allow it."""
+    if target.exists():
+        target.unlink()
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+def link_duplicate_outputs(optimizer: ImageOptimizer, source: Path, duplicate: Path, stat: ImageStats) -> List[Path]:
+    """Give duplicate the outputs already written for source; returns the new paths."""
+    if stat.variants:
+        pairs = [
+            (optimizer.get_variant_path(source, v["width"], v["format"]),
+             optimizer.get_variant_path(duplicate, v["width"], v["format"]))
+            for v in stat.variants
+        ]
+    else:
+        pairs = [(optimizer.get_output_path(source), optimizer.get_output_path(duplicate))]
+    for output_path, duplicate_path in pairs:
+        link_or_copy(output_path, duplicate_path)
+    return [duplicate_path for _, duplicate_path in pairs]
+
+def write_variant_map(path: Path, variant_map: Dict[str, List[dict]]) -> None:
+    """Write the source -> variants map consumed by generate_static_html.py."""
+    write_atomic(path, json.dumps(variant_map, indent=2, sort_keys=True).encode('utf-8'))
+
+class ProgressReporter:
+    """Logs throughput and ETA for images being encoded, at most every interval seconds."""
+
+    def __init__(self, interval: float = PROGRESS_INTERVAL):
+        self.interval = interval
+        self.total = 0
+        self.done = 0
+        self.bytes_in = 0
+        self.start_time = 0.0
+        self.last_report = 0.0
+
+    def start(self, total: int) -> None:
+        self.total = total
+        self.start_time = self.last_report = time.perf_counter()
+
+    def update(self, stats: ImageStats) -> None:
+        self.done += 1
+        self.bytes_in += stats.original_size
+        now = time.perf_counter()
+        if now - self.last_report >= self.interval or self.done == self.total:
+            self.last_report = now
+            logger.info(self.format(now - self.start_time))
+
+    def format(self, elapsed: float) -> str:
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = (self.total - self.done) / rate if rate else 0.0
+        return (
+            f"Progress: {self.done}/{self.total} ({self.done / max(self.total, 1) * 100:.0f}%) "
+            f"{rate:.1f} img/s, {self.bytes_in / 1024 / 1024 / max(elapsed, 1e-9):.1f} MB/s, "
+            f"ETA {remaining:.0f}s"
+        )
+
+def write_report(path: Path, stats: List[ImageStats]) -> None:
+    """Write per-image results as CSV (by .csv suffix) or JSON, sorted by path for diffing."""
+    rows = []
+    for stat in sorted(stats, key=lambda s: s.path or ""):
+        row = {
+            "path": stat.path,
+            "skipped": stat.skipped,
+            "duplicate_of": stat.duplicate_of,
+            "format": stat.format,
+            "width": stat.dimensions[0],
+            "height": stat.dimensions[1],
+            "original_size": stat.original_size,
+            "optimized_size": stat.optimized_size,
+            "baseline_size": stat.baseline_size,
+            "duration": round(stat.duration, 4),
+        }
+        for stage in STAGES:
+            row[f"{stage}_time"] = round(stat.timings.get(stage, 0.0), 4)
+        rows.append(row)
+
+    if path.suffix.lower() == ".csv":
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        return
+
+    processed = [s for s in stats if not s.skipped]
+    summary = {
+        "images": len(stats),
+        "processed": len(processed),
+        "skipped": len(stats) - len(processed),
+        "original_size": sum(s.original_size for s in stats),
+        "optimized_size": sum(s.optimized_size for s in stats),
+        "duration": round(sum(s.duration for s in processed), 4),
+        "stage_times": {
+            stage: round(sum(s.timings.get(stage, 0.0) for s in processed), 4)
+            for stage in STAGES
+        },
+    }
+    path.write_text(json.dumps({"summary": summary, "images": rows}, indent=2), encoding='utf-8')
+
+def iter_directory(
+    directory: Path,
+    quality: int = 85,
+    max_width: int = 1920,
+    use_manifest: bool = True,
+    force: bool = False,
+    backend: str = "threads",
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    widths: Optional[List[int]] = None,
+    formats: Optional[List[str]] = None,
+    low_memory: bool = False,
+    memory_budget: Optional[int] = None,
+    target_ssim: Optional[float] = None,
+    dedupe: str = "exact",
+    dedupe_action: str = "link",
+    near_threshold: int = DEFAULT_NEAR_THRESHOLD,
+    progress: Optional[ProgressReporter] = None
+) -> Iterator[ImageStats]:
+    """Process all images in a directory, yielding stats as each image completes.
+
+    With use_manifest, images whose source and settings are unchanged since the
+    last run are skipped and returned with ``skipped=True``; outputs of deleted
+    sources are removed. force re-encodes everything but still updates the manifest.
+    backend, workers and chunk_size select the executor, see run_optimizer.
+    With widths, every source is written in each width and format and a
+    VARIANT_MAP_NAME file mapping source paths to their variants is written;
+    without, a variant map left by an earlier run is removed.
+    low_memory and memory_budget (bytes) bound decoding memory, see ImageOptimizer.
+    target_ssim searches the encoder quality per image; chosen qualities are
+    cached in the manifest.
+    dedupe groups the images to be encoded by content hash ("exact") and also
+    by perceptual hash ("near"); with dedupe_action "link" only the first image
+    of a group is encoded and the others get hard links to its outputs, with
+    "report" the groups are only logged.
+    progress, if given, is started with the number of images to encode and
+    updated for each of them. The manifest and variant map are written when
+    the generator is exhausted or closed.
+    """
+    optimizer = ImageOptimizer(
+        quality=quality,
+        max_width=max_width,
+        widths=widths,
+        formats=formats,
+        low_memory=low_memory,
+        memory_budget=memory_budget,
+        target_ssim=target_ssim
+    )
+    variant_map = {}
     
     # Find all image files
     image_files = [
         f for f in directory.rglob("*")
         if optimizer.should_optimize(f)
     ]
-    
-    # Process images in parallel
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        future_to_file = {
-            executor.submit(optimizer.optimize_image, f): f
-            for f in image_files
-        }
-        
-        for future in concurrent.futures.as_completed(future_to_file):
-            file_path = future_to_file[future]
-            try:
-                stat = future.result()
-                stats.append(stat)
-                logger.info(
-                    f"Optimized {file_path.name}: "
-                    f"{stat.original_size/1024:.1f}KB -> {stat.optimized_size/1024:.1f}KB "
-                    f"({(1 - stat.optimized_size/stat.original_size)*100:.1f}% reduction)"
+
+    manifest = None
+    pending = image_files
+    if use_manifest:
+        manifest = ImageManifest.load(directory / MANIFEST_NAME, directory)
+        optimizer.quality_cache = manifest.quality_cache
+        for orphan in manifest.remove_orphans(image_files):
+            logger.info(f"Removed orphaned output {orphan.relative_to(directory)}")
+        if not force:
+            pending = []
+            for f in image_files:
+                entry = manifest.lookup(f, optimizer.settings)
+                if entry is None:
+                    pending.append(f)
+                    continue
+                yield ImageStats(
+                    original_size=entry["size"],
+                    optimized_size=entry["optimized_size"],
+                    format=entry["format"],
+                    dimensions=tuple(entry["dimensions"]),
+                    duration=entry["duration"],
+                    skipped=True,
+                    variants=entry["variants"],
+                    baseline_size=entry["baseline_size"],
+                    duplicate_of=entry.get("duplicate_of"),
+                    path=manifest.key(f)
                 )
-            except Exception as e:
-                logger.error(f"Failed to process {file_path}: {e}")
+                variant_map[manifest.key(f)] = entry["variants"]
+                logger.debug(f"Skipped unchanged {f.name}")
+
+    # Group duplicates so each is encoded once
+    duplicates: Dict[Path, List[Path]] = {}
+    for group in find_duplicate_groups(pending, optimizer, dedupe, near_threshold):
+        logger.info(
+            f"Duplicate images: {group[0].relative_to(directory)} <- "
+            f"{', '.join(str(f.relative_to(directory)) for f in group[1:])}"
+        )
+        if dedupe_action == "link":
+            duplicates[group[0]] = group[1:]
+    linked = {f for group in duplicates.values() for f in group}
+    pending = [f for f in pending if f not in linked]
+
+    def record(file_path: Path, stat: ImageStats, output_paths: List[Path]) -> ImageStats:
+        stat.path = file_path.relative_to(directory).as_posix()
+        variant_map[stat.path] = stat.variants
+        if manifest is not None:
+            for stale in manifest.record(file_path, output_paths, optimizer.settings, stat):
+                logger.info(f"Removed stale output {stale.relative_to(directory)}")
+        if progress is not None:
+            progress.update(stat)
+        return stat
+
+    # Per-image lines are only logged at INFO when there is no progress reporter
+    image_log_level = logging.INFO if progress is None else logging.DEBUG
+    if progress is not None:
+        progress.start(len(pending) + len(linked))
     
-    return stats
+    # Process images in parallel
+    try:
+        for file_path, stat, error in run_optimizer(optimizer, pending, backend, workers, chunk_size):
+            if error is not None:
+                logger.error(f"Failed to process {file_path}: {error}")
+                for duplicate in duplicates.get(file_path, []):
+                    logger.error(f"Failed to process {duplicate}: duplicate of {file_path.name}")
+                continue
+            output_paths = [Path(v["path"]) for v in stat.variants] or [optimizer.get_output_path(file_path)]
+            stat.variants = [
+                dict(v, path=Path(v["path"]).relative_to(directory).as_posix())
+                for v in stat.variants
+            ]
+            logger.log(
+                image_log_level,
+                f"Optimized {file_path.name}: "
+                f"{stat.original_size/1024:.1f}KB -> {stat.optimized_size/1024:.1f}KB "
+                f"({(1 - stat.optimized_size/stat.original_size)*100:.1f}% reduction)"
+            )
+            yield record(file_path, stat, output_paths)
+
+            for duplicate in duplicates.get(file_path, []):
+                try:
+                    duplicate_paths = link_duplicate_outputs(optimizer, file_path, duplicate, stat)
+                except OSError as e:
+                    logger.error(f"Failed to link {duplicate}: {e}")
+                    continue
+                logger.log(image_log_level, f"Linked {duplicate.name} to outputs of {file_path.name}")
+                yield record(duplicate, dataclasses.replace(
+                    stat,
+                    original_size=duplicate.stat().st_size,
+                    duration=0.0,
+                    sha256=None,
+                    duplicate_of=stat.path,
+                    timings={},
+                    variants=[
+                        dict(v, path=p.relative_to(directory).as_posix())
+                        for v, p in zip(stat.variants, duplicate_paths)
+                    ]
+                ), duplicate_paths)
+    finally:
+        if manifest is not None:
+            manifest.save()
+        variant_map_path = directory / VARIANT_MAP_NAME
+        if optimizer.widths:
+            write_variant_map(variant_map_path, variant_map)
+        elif variant_map_path.exists():
+            # Left by an earlier run with --widths; its srcset entries would point at
+            # variants the manifest removes as each source is re-encoded
+            variant_map_path.unlink()
+            logger.info(f"Removed stale variant map {VARIANT_MAP_NAME}")
+
+def process_directory(directory: Path, **kwargs) -> List[ImageStats]:
+    """Process all images in a directory; see iter_directory for the options."""
+    return list(iter_directory(directory, **kwargs))
 
 def main():
     parser = argparse.ArgumentParser(description="Optimize images for web use")
@@ -135,6 +1108,89 @@ def main():
         default=1920,
         help="Maximum image width in pixels (default: 1920)"
     )
+    parser.add_argument(
+        "--widths",
+        type=int,
+        nargs="+",
+        help="Emit responsive variants at these widths (e.g. 480 960 1920) instead of a single output"
+    )
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        choices=list(VARIANT_FORMATS),
+        help=f"Variant formats to emit with --widths (default: {' '.join(DEFAULT_VARIANT_FORMATS)})"
+    )
+    parser.add_argument(
+        "--target-ssim",
+        type=float,
+        metavar="SCORE",
+        help="Pick the lowest quality per image reaching this SSIM (e.g. 0.98) instead of --quality; requires NumPy"
+    )
+    parser.add_argument(
+        "--dedupe",
+        choices=DEDUPE_MODES,
+        default="exact",
+        help="Group identical images (exact) or also visually similar ones (near, requires NumPy) and encode each group once (default: exact)"
+    )
+    parser.add_argument(
+        "--dedupe-action",
+        choices=DEDUPE_ACTIONS,
+        default="link",
+        help="Hard-link duplicate outputs, or only report duplicate groups (default: link)"
+    )
+    parser.add_argument(
+        "--near-threshold",
+        type=int,
+        default=DEFAULT_NEAR_THRESHOLD,
+        help=f"Maximum differing dHash bits for near duplicates (default: {DEFAULT_NEAR_THRESHOLD})"
+    )
+    parser.add_argument(
+        "--low-memory",
+        action="store_true",
+        help="Decode JPEGs at reduced scale near the target width (Pillow draft mode)"
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        metavar="MB",
+        help="Limit the estimated decoded size of images processed at once"
+    )
+    parser.add_argument(
+        "-b", "--backend",
+        choices=EXECUTOR_BACKENDS,
+        default="threads",
+        help="Executor backend: threads, processes, or hybrid I/O threads + process pool (default: threads)"
+    )
+    parser.add_argument(
+        "-j", "--workers",
+        type=int,
+        help="Number of worker threads/processes (default: CPU count)"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        help="Images per task sent to the process pool (default: automatic)"
+    )
+    parser.add_argument(
+        "--report",
+        type=Path,
+        help="Write per-image results and stage timings to a .json or .csv file"
+    )
+    parser.add_argument(
+        "--no-progress",
+        action="store_true",
+        help="Log every image instead of periodic progress lines"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-encode all images even if they are unchanged since the last run"
+    )
+    parser.add_argument(
+        "--no-manifest",
+        action="store_true",
+        help=f"Do not read or write the {MANIFEST_NAME} incremental manifest"
+    )
     
     args = parser.parse_args()
     
@@ -146,19 +1202,53 @@ def main():
         stats = process_directory(
             args.directory,
             quality=args.quality,
-            max_width=args.max_width
+            max_width=args.max_width,
+            use_manifest=not args.no_manifest,
+            force=args.force,
+            backend=args.backend,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            widths=args.widths,
+            formats=args.formats,
+            low_memory=args.low_memory,
+            memory_budget=args.memory_budget * 1024 * 1024 if args.memory_budget else None,
+            target_ssim=args.target_ssim,
+            dedupe=args.dedupe,
+            dedupe_action=args.dedupe_action,
+            near_threshold=args.near_threshold,
+            progress=None if args.no_progress else ProgressReporter()
         )
         
         if stats:
             total_original = sum(s.original_size for s in stats)
             total_optimized = sum(s.optimized_size for s in stats)
             reduction = (1 - total_optimized/total_original) * 100
+            skipped = [s for s in stats if s.skipped]
             
             logger.info("\nOptimization Summary:")
-            logger.info(f"Total images processed: {len(stats)}")
+            logger.info(f"Total images processed: {len(stats) - len(skipped)}")
+            logger.info(f"Unchanged images skipped: {len(skipped)}")
+            logger.info(f"Duplicates linked: {sum(1 for s in stats if s.duplicate_of and not s.skipped)}")
+            logger.info(f"Estimated time saved: {sum(s.duration for s in skipped):.1f}s")
             logger.info(f"Total size reduction: {reduction:.1f}%")
             logger.info(f"Original size: {total_original/1024/1024:.1f}MB")
             logger.info(f"Optimized size: {total_optimized/1024/1024:.1f}MB")
+            tuned = [s for s in stats if s.baseline_size]
+            if tuned:
+                saved = sum(s.baseline_size - s.optimized_size for s in tuned)
+                logger.info(f"Saved vs. fixed quality {args.quality}: {saved/1024/1024:.1f}MB")
+            processed = [s for s in stats if not s.skipped]
+            stage_times = ", ".join(
+                f"{stage} {sum(s.timings.get(stage, 0.0) for s in processed):.1f}s"
+                for stage in STAGES
+            )
+            logger.info(f"Stage times: {stage_times}")
+            peak_rss = peak_rss_mb()
+            if peak_rss is not None:
+                logger.info(f"Peak memory (RSS): {peak_rss:.1f}MB")
+            if args.report:
+                write_report(args.report, stats)
+                logger.info(f"Report saved to {args.report}")
         else:
             logger.info("No images found to optimize")
             
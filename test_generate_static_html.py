@@ -10,16 +10,22 @@ Requirements:
     - beautifulsoup4
     - Python 3.8+
 """
+import gzip
 import json
 import subprocess
 from pathlib import Path
 from bs4 import BeautifulSoup
 import pytest
 
+import ai_enrichment
+import benchmark_generator
+import generate_static_html as gen
+
 PORTFOLIO_JSON = Path('../pyx-engenharia-portfolio/portfolio.json')
 TEMPLATE = Path('portfolio_template.html')
 OUTPUT_HTML = Path('../pyx-engenharia-portfolio/index.html')
 SCRIPT = Path('generate_static_html.py')
+GENERATOR_BASELINE = Path('test_data/generator-baseline.json')
 
 # --- JSON Validation ---
 def test_portfolio_json_exists():
@@ -58,4 +64,229 @@ def test_html_content():
 # --- Clean up (optional) ---
 # def teardown_module(module):
 #     if OUTPUT_HTML.exists():
-#         OUTPUT_HTML.unlink() 
\ No newline at end of file
+#         OUTPUT_HTML.unlink()
+
+# --- In-process rendering and build cache ---
+SAMPLE_PORTFOLIO = {
+    "aeronautica": [{"empresas": [{"nome": "Projeto A", "localizacao": "SP", "periodo": "2020", "imagem": "img/a.jpg"}]}],
+    "mecanica": [{"itens": [{"descricao": "Item B", "empresa": "ACME", "data": "2019"}]}],
+}
+
+def test_render_html_in_process(tmp_path):
+    output = tmp_path / 'index.html'
+    gen.render_html(SAMPLE_PORTFOLIO, TEMPLATE, output)
+    soup = BeautifulSoup(output.read_text(encoding='utf-8'), 'html.parser')
+    assert len(soup.find_all(class_='project-card')) == 2
+
+def test_write_if_changed_keeps_identical_file(tmp_path):
+    output = tmp_path / 'index.html'
+    assert gen.write_if_changed(output, b'<html></html>')
+    mtime = output.stat().st_mtime_ns
+    assert not gen.write_if_changed(output, b'<html></html>')
+    assert output.stat().st_mtime_ns == mtime
+    assert gen.write_if_changed(output, b'<html>changed</html>')
+
+def test_build_fingerprint_tracks_includes(tmp_path):
+    (tmp_path / 'page.html').write_text('{% include "footer.html" %}', encoding='utf-8')
+    footer = tmp_path / 'footer.html'
+    footer.write_text('v1', encoding='utf-8')
+    env = gen.create_environment(tmp_path)
+    before = gen.build_fingerprint('data', env, ['page.html'], {})
+    assert gen.build_fingerprint('data', env, ['page.html'], {}) == before
+    footer.write_text('v2', encoding='utf-8')
+    assert gen.build_fingerprint('data', env, ['page.html'], {}) != before
+
+@pytest.mark.parametrize('use_inotify', [True, False])
+def test_change_watcher_reports_saves_made_before_wait(tmp_path, monkeypatch, use_inotify):
+    if use_inotify and gen.INotify is None:
+        pytest.skip('inotify_simple not installed')
+    if not use_inotify:
+        monkeypatch.setattr(gen, 'INotify', None)
+    data = tmp_path / 'portfolio.json'
+    data.write_text('{}', encoding='utf-8')
+    with gen.ChangeWatcher([data], interval=0.01) as watcher:
+        # Saved while a build would be running, before wait is called
+        data.write_text('{"a": []}', encoding='utf-8')
+        watcher.wait()
+
+def test_watch_reports_a_broken_first_build_and_keeps_watching(tmp_path, monkeypatch, capsys):
+    json_path = tmp_path / 'portfolio.json'
+    json_path.write_text('{}', encoding='utf-8')
+    template = tmp_path / 'page.html'
+    template.write_text('{% if %}', encoding='utf-8')
+    output = tmp_path / 'index.html'
+
+    def wait(watcher):
+        # The first wait returns after the fix is saved, the next one stops watching
+        if template.read_text(encoding='utf-8') == 'fixed':
+            raise KeyboardInterrupt
+        template.write_text('fixed', encoding='utf-8')
+    monkeypatch.setattr(gen, 'INotify', None)
+    monkeypatch.setattr(gen.ChangeWatcher, 'wait', wait)
+    env = gen.create_environment(tmp_path, use_bytecode_cache=False)
+    with pytest.raises(KeyboardInterrupt):
+        gen.watch(json_path, template, output, env, force=True)
+    assert '[ERROR] Build failed' in capsys.readouterr().out
+    assert output.read_text(encoding='utf-8') == 'fixed'
+
+def test_sharded_build_paginates_categories(tmp_path):
+    portfolio = {"aeronáutica": [{"empresas": [{"nome": f"Projeto {i}"} for i in range(25)]}]}
+    json_path = tmp_path / 'portfolio.json'
+    json_path.write_text(json.dumps(portfolio), encoding='utf-8')
+    output = tmp_path / 'index.html'
+    env = gen.create_environment(TEMPLATE.parent, use_bytecode_cache=False)
+    gen.build(json_path, TEMPLATE, output, env, page_size=10, workers=1)
+
+    pages = sorted(p.name for p in (tmp_path / 'aeronautica').iterdir())
+    assert pages == ['index.html', 'page-2.html', 'page-3.html']
+    last = BeautifulSoup((tmp_path / 'aeronautica' / 'page-3.html').read_text(encoding='utf-8'), 'html.parser')
+    assert len(last.find_all(class_='project-card')) == 5
+    index = json.loads((tmp_path / gen.SEARCH_INDEX_NAME).read_text(encoding='utf-8'))
+    assert len(index) == 25 and index[-1]['url'] == 'aeronautica/page-3.html'
+
+    # Shrinking the data removes pages that are no longer produced
+    portfolio["aeronáutica"][0]["empresas"] = portfolio["aeronáutica"][0]["empresas"][:5]
+    json_path.write_text(json.dumps(portfolio), encoding='utf-8')
+    gen.build(json_path, TEMPLATE, output, env, page_size=10, workers=1)
+    assert sorted(p.name for p in (tmp_path / 'aeronautica').iterdir()) == ['index.html']
+
+def test_streaming_build_matches_in_memory(tmp_path):
+    json_path = tmp_path / 'portfolio.json'
+    json_path.write_text(json.dumps({'featured_image': 'hero.jpg', **SAMPLE_PORTFOLIO}, indent=2), encoding='utf-8')
+    # A tiny chunk size forces values to straddle read boundaries
+    assert dict(gen.iter_portfolio(json_path, chunk_size=3)) == json.loads(json_path.read_text(encoding='utf-8'))
+
+    env = gen.create_environment(TEMPLATE.parent, use_bytecode_cache=False)
+    gen.build(json_path, TEMPLATE, tmp_path / 'memory.html', env)
+    gen.build(json_path, TEMPLATE, tmp_path / 'stream.html', env, stream=True)
+    assert (tmp_path / 'stream.html').read_bytes() == (tmp_path / 'memory.html').read_bytes()
+    assert 'hero.jpg' in (tmp_path / 'stream.html').read_text(encoding='utf-8')
+
+def test_asset_pipeline_fingerprints_and_precompresses(tmp_path):
+    (tmp_path / 'style.css').write_text('body { color: #333; }', encoding='utf-8')
+    (tmp_path / 'img').mkdir()
+    for name in ('a.jpg', 'a_optimized_480w.jpg', 'a_optimized_960w.jpg'):
+        (tmp_path / 'img' / name).write_bytes(name.encode('utf-8'))
+    (tmp_path / 'img' / gen.VARIANT_MAP_NAME).write_text(json.dumps({'a.jpg': [
+        {'path': 'a_optimized_960w.jpg', 'width': 960, 'height': 640, 'format': 'jpeg', 'size': 20},
+        {'path': 'a_optimized_480w.jpg', 'width': 480, 'height': 320, 'format': 'jpeg', 'size': 20},
+    ]}), encoding='utf-8')
+    json_path = tmp_path / 'portfolio.json'
+    json_path.write_text(json.dumps(SAMPLE_PORTFOLIO), encoding='utf-8')
+    output = tmp_path / 'index.html'
+    env = gen.create_environment(TEMPLATE.parent, use_bytecode_cache=False)
+    gen.build(json_path, TEMPLATE, output, env, assets=True, variant_map=tmp_path / 'img' / gen.VARIANT_MAP_NAME)
+
+    soup = BeautifulSoup(output.read_text(encoding='utf-8'), 'html.parser')
+    css = soup.find('link', rel='stylesheet')['href']
+    assert css != 'style.css' and (tmp_path / css).read_bytes() == (tmp_path / 'style.css').read_bytes()
+    img = soup.find('img', src=lambda src: src.startswith('img/a.'))
+    assert [c.split()[1] for c in img['srcset'].split(', ')] == ['480w', '960w'] and img['sizes']
+    assert gzip.decompress((tmp_path / 'index.html.gz').read_bytes()) == output.read_bytes()
+
+def test_asset_pipeline_handles_quoted_gt_across_chunks(tmp_path):
+    (tmp_path / 'a.jpg').write_bytes(b'a')
+    (tmp_path / 'a_optimized_480w.jpg').write_bytes(b'a480')
+    (tmp_path / gen.VARIANT_MAP_NAME).write_text(json.dumps({'a.jpg': [
+        {'path': 'a_optimized_480w.jpg', 'width': 480, 'height': 320, 'format': 'jpeg', 'size': 4},
+    ]}), encoding='utf-8')
+    html = '<p>x</p><img alt="a > b" loading="lazy" src="a.jpg"><img alt=\'c > d\' src=\'a.jpg\'>'
+    pipeline = gen.AssetPipeline(tmp_path, tmp_path / gen.VARIANT_MAP_NAME)
+    expected = pipeline.rewrite(html)
+    images = BeautifulSoup(expected, 'html.parser').find_all('img')
+    assert [img['alt'] for img in images] == ['a > b', 'c > d']
+    assert all(img['src'].startswith('a.') and img['src'] != 'a.jpg' for img in images)
+    assert images[0]['srcset'].startswith('a_optimized_480w.') and 'srcset' not in images[1].attrs
+    # Every split point, including inside the quoted '>', gives the same output
+    for cut in range(1, len(html)):
+        assert ''.join(pipeline.rewrite_stream([html[:cut], html[cut:]])) == expected
+
+def test_enrichment_runs_only_new_projects(tmp_path):
+    class CountingEnricher(ai_enrichment.StubEnricher):
+        calls = 0
+
+        async def enrich(self, project, categoria):
+            CountingEnricher.calls += 1
+            return await super().enrich(project, categoria)
+
+    cache = tmp_path / 'enrichment.json'
+    data = json.loads(json.dumps(SAMPLE_PORTFOLIO))
+    runner = ai_enrichment.EnrichmentRunner(CountingEnricher(), cache, concurrency=2)
+    runner.enrich_portfolio(data)
+    runner.close()
+    assert CountingEnricher.calls == 2
+    assert data['mecanica'][0]['itens'][0]['resumo'].startswith('Item B')
+
+    data = json.loads(json.dumps(SAMPLE_PORTFOLIO))
+    data['aeronautica'][0]['empresas'][0]['nome'] = 'Projeto A2'
+    runner = ai_enrichment.EnrichmentRunner(CountingEnricher(), cache, concurrency=2)
+    runner.enrich_portfolio(data)
+    runner.close()
+    assert CountingEnricher.calls == 3 and runner.cached == 1
+
+def test_enrichment_cache_prunes_only_after_a_full_run(tmp_path):
+    cache = tmp_path / 'enrichment.json'
+
+    def edited_portfolio():
+        data = json.loads(json.dumps(SAMPLE_PORTFOLIO))
+        data['aeronautica'][0]['empresas'][0]['nome'] = 'Projeto A2'
+        return data
+
+    def cached_entries():
+        return len(json.loads(cache.read_text(encoding='utf-8'))['entries'])
+    runner = ai_enrichment.EnrichmentRunner(ai_enrichment.StubEnricher(), cache)
+    runner.enrich_portfolio(json.loads(json.dumps(SAMPLE_PORTFOLIO)))
+    runner.close(prune=True)
+    assert cached_entries() == 2
+
+    # A run that stops after the first category keeps the results of the others
+    runner = ai_enrichment.EnrichmentRunner(ai_enrichment.StubEnricher(), cache)
+    runner.enrich_category('aeronautica', edited_portfolio()['aeronautica'])
+    runner.close()
+    assert cached_entries() == 3
+
+    runner = ai_enrichment.EnrichmentRunner(ai_enrichment.StubEnricher(), cache)
+    runner.enrich_portfolio(edited_portfolio())
+    runner.close(prune=True)
+    assert runner.cached == 2 and cached_entries() == 2
+
+# --- Scaling with synthetic portfolios (in-process) ---
+def test_render_scales_linearly(tmp_path):
+    runs = {}
+    for entries in (100, 10_000):
+        json_path = tmp_path / f'portfolio-{entries}.json'
+        benchmark_generator.write_synthetic_portfolio(json_path, entries)
+        assert benchmark_generator.count_projects(gen.load_portfolio(json_path)) == entries
+        for mode in benchmark_generator.MODES:
+            output = tmp_path / f'{mode}-{entries}.html'
+            runs[mode, entries] = benchmark_generator.run_render(json_path, TEMPLATE, output, mode)
+            assert output.read_text(encoding='utf-8').count('class="project-card"') == entries
+        assert (tmp_path / f'stream-{entries}.html').read_bytes() == (tmp_path / f'memory-{entries}.html').read_bytes()
+
+    for mode in benchmark_generator.MODES:
+        small, large = runs[mode, 100], runs[mode, 10_000]
+        # 100x the entries: linear work grows ~100x, quadratic work ~10000x
+        assert 90 < large['output_bytes'] / small['output_bytes'] < 110
+        assert large['total_time'] / small['total_time'] < 1000
+
+def test_regression_check_flags_regressions_above_noise_floor():
+    baseline = {'runs': [{'mode': 'memory', 'entries': 100, 'total_time': 1.0, 'load_time': 0.001,
+                          'peak_rss_mb': 50.0, 'output_bytes': 1000}]}
+    run = dict(baseline['runs'][0], total_time=1.5, load_time=0.01, peak_rss_mb=52.0)
+    regressions = benchmark_generator.REGRESSION_CHECK.compare([run], baseline, threshold=0.1)
+    # load_time grew 10x but stays below the noise floor
+    assert len(regressions) == 1 and 'total_time' in regressions[0]
+
+def test_output_size_matches_recorded_baseline(tmp_path):
+    # Recorded with benchmark_generator.py -n 100 1000 -o, keeping only output_bytes:
+    # the timings and memory depend on the machine, the output size only on the template
+    baseline = json.loads(GENERATOR_BASELINE.read_text(encoding='utf-8'))
+    runs = []
+    for entries in sorted({run['entries'] for run in baseline['runs']}):
+        json_path = tmp_path / f'portfolio-{entries}.json'
+        benchmark_generator.write_synthetic_portfolio(json_path, entries, baseline['corpus']['seed'])
+        for mode in benchmark_generator.MODES:
+            result = benchmark_generator.run_render(json_path, TEMPLATE, tmp_path / 'index.html', mode)
+            runs.append({'mode': mode, 'entries': entries, **result})
+    assert len(runs) == len(baseline['runs'])
+    assert benchmark_generator.REGRESSION_CHECK.compare(runs, baseline, threshold=0.1) == []
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Automated tests for local_server.py.
+
+Usage:
+    pytest test_local_server.py
+
+Requirements:
+    - pytest
+    - Python 3.8+
+"""
+import contextlib
+import functools
+import gzip
+import http.client
+import os
+import threading
+import time
+import pytest
+
+import local_server
+
+@contextlib.contextmanager
+def serving(directory, **options):
+    """Serve directory from a background thread; yields a function returning new connections."""
+    handler = functools.partial(
+        local_server.CustomHTTPRequestHandler,
+        directory=directory,
+        file_cache=local_server.FileCache(1024 * 1024, max_file_bytes=64 * 1024, use_inotify=False),
+        access_log=False
+    )
+    httpd = local_server.PooledHTTPServer(('127.0.0.1', 0), handler, **{'workers': 4, 'keepalive_timeout': 2, **options})
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield lambda: http.client.HTTPConnection('127.0.0.1', httpd.server_address[1], timeout=5)
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        thread.join()
+
+@pytest.fixture
+def server(tmp_path):
+    with serving(tmp_path) as connect:
+        yield connect
+
+def get(connection, path, **headers):
+    connection.request('GET', path, headers=headers)
+    response = connection.getresponse()
+    return response, response.read()
+
+# --- File cache ---
+def test_file_cache_evicts_least_recently_used(tmp_path):
+    paths = []
+    for name in 'abc':
+        path = tmp_path / f'{name}.txt'
+        path.write_bytes(name.encode() * 1000)
+        paths.append(str(path))
+    cost = 1000 + local_server.FileCache.ENTRY_OVERHEAD
+    cache = local_server.FileCache(2 * cost, max_file_bytes=1000, use_inotify=False)
+    a, b, c = paths
+    cache.get(a)
+    cache.get(b)
+    cache.get(a)  # b is now the least recently used
+    cache.get(c)
+    assert cache.size == 2 * cost
+    assert (cache.hits, cache.misses) == (1, 3)
+    cache.get(a)
+    cache.get(b)
+    assert (cache.hits, cache.misses) == (2, 4)
+
+def test_file_cache_reloads_changed_and_invalidated_files(tmp_path):
+    path = tmp_path / 'page.html'
+    path.write_bytes(b'v1')
+    cache = local_server.FileCache(1024 * 1024, use_inotify=False)
+    first = cache.get(str(path))
+    assert cache.get(str(path)) is first
+
+    path.write_bytes(b'v22')
+    changed = cache.get(str(path))
+    assert changed.data == b'v22' and changed.etag != first.etag
+
+    cache.invalidate(str(path))
+    assert cache.get(str(path)) is not changed and cache.misses == 3
+    cache.invalidate()
+    assert cache.size == 0
+
+def test_file_cache_does_not_read_uncached_files(tmp_path):
+    path = tmp_path / 'large.bin'
+    path.write_bytes(b'\0' * 4096)
+    cache = local_server.FileCache(1024 * 1024, max_file_bytes=1024, use_inotify=False)
+    entry = cache.get(str(path))
+    st = os.stat(path)
+    assert entry.data is None and entry.size == 4096
+    assert entry.etag == f'"{st.st_ino:x}-{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+@pytest.mark.parametrize('use_inotify', [True, False])
+def test_file_cache_remembers_missing_siblings_while_watched(tmp_path, monkeypatch, use_inotify):
+    if use_inotify and local_server.INotify is None:
+        pytest.skip('inotify_simple not installed')
+    path = str(tmp_path / 'page.html')
+    (tmp_path / 'page.html').write_bytes(b'<p>page</p>')
+    cache = local_server.FileCache(1024 * 1024, use_inotify=use_inotify)
+    entry = cache.get(path)
+    assert cache.sibling(entry, '.gz') is None
+    if use_inotify:
+        # Known to be missing: no further lookup until the directory changes
+        with monkeypatch.context() as m:
+            m.setattr(cache, 'get', lambda path: pytest.fail(f'looked up {path}'))
+            assert cache.sibling(entry, '.gz') is None
+    else:
+        assert entry.siblings == {}
+
+    (tmp_path / 'page.html.gz').write_bytes(gzip.compress(b'<p>page</p>'))
+    deadline = time.monotonic() + 5
+    while use_inotify and cache.get(path) is entry and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.sibling(cache.get(path), '.gz').path == path + '.gz'
+    cache.close()
+
+# --- Metrics ---
+def test_metrics_summary_covers_the_recent_window():
+    metrics = local_server.ServerMetrics(window=4)
+    for i in range(1, 11):
+        metrics.record(200, '/', i / 100, 100)
+    metrics.record(404, '/missing', 0.5, 10)
+    text = metrics.render()
+    assert 'local_server_requests_total{path="/",status="200"} 10' in text
+    assert 'local_server_request_duration_seconds_count 11' in text
+    assert 'local_server_recent_request_duration_seconds_count 4' in text
+    recent_sum = float(text.split('local_server_recent_request_duration_seconds_sum ')[1].split()[0])
+    assert recent_sum == pytest.approx(0.08 + 0.09 + 0.1 + 0.5)
+    assert metrics.quantiles()[0.5] == 0.09
+
+# --- Byte ranges ---
+def test_parse_range():
+    assert local_server.parse_range('bytes=0-99', 1000) == [(0, 99)]
+    assert local_server.parse_range('bytes=900-', 1000) == [(900, 999)]
+    # Suffix ranges count from the end, and may be longer than the body
+    assert local_server.parse_range('bytes=-100', 1000) == [(900, 999)]
+    assert local_server.parse_range('bytes=-5000', 1000) == [(0, 999)]
+    assert local_server.parse_range('bytes=0-1999', 1000) == [(0, 999)]
+    # Multiple ranges are sorted, and overlapping or adjacent ones merged
+    assert local_server.parse_range('bytes=500-599, 0-9, 10-19, 550-649', 1000) == [(0, 19), (500, 649)]
+
+def test_parse_range_unsatisfiable_and_ignored():
+    assert local_server.parse_range('bytes=1000-', 1000) == []
+    assert local_server.parse_range('bytes=-0', 1000) == []
+    for header in ('items=0-1', 'bytes=5-1', 'bytes=abc', 'bytes=1',
+                   'bytes=' + ','.join(f'{i * 2}-{i * 2}' for i in range(local_server.MAX_RANGES + 1))):
+        assert local_server.parse_range(header, 1000) is None
+
+@pytest.mark.parametrize('size', [1000, 100 * 1024])
+def test_range_responses(tmp_path, server, size):
+    body = bytes(i % 251 for i in range(size))
+    (tmp_path / 'data.bin').write_bytes(body)
+    connection = server()
+    response, data = get(connection, '/data.bin', Range='bytes=-10')
+    assert response.status == 206 and data == body[-10:]
+    assert response.getheader('Content-Range') == f'bytes {size - 10}-{size - 1}/{size}'
+
+    response, data = get(connection, '/data.bin', Range='bytes=0-1,100-101')
+    assert response.status == 206
+    assert response.getheader('Content-Type').startswith('multipart/byteranges; boundary=')
+    assert f'Content-Range: bytes 0-1/{size}\r\n\r\n'.encode() + body[0:2] in data
+    assert f'Content-Range: bytes 100-101/{size}\r\n\r\n'.encode() + body[100:102] in data
+
+    response, _ = get(connection, '/data.bin', Range=f'bytes={size}-')
+    assert response.status == 416 and response.getheader('Content-Range') == f'bytes */{size}'
+
+def test_if_range(tmp_path, server):
+    (tmp_path / 'data.bin').write_bytes(b'0123456789')
+    connection = server()
+    response, _ = get(connection, '/data.bin')
+    etag, last_modified = response.getheader('ETag'), response.getheader('Last-Modified')
+
+    for validator in (etag, last_modified):
+        response, data = get(connection, '/data.bin', Range='bytes=2-4', **{'If-Range': validator})
+        assert response.status == 206 and data == b'234'
+    # A changed or weak validator sends the whole current body
+    for validator in ('"stale"', 'W/' + etag):
+        response, data = get(connection, '/data.bin', Range='bytes=2-4', **{'If-Range': validator})
+        assert response.status == 200 and data == b'0123456789'
+
+# --- Content negotiation ---
+def test_parse_accept_encoding():
+    assert local_server.parse_accept_encoding('gzip, deflate, br;q=0.8') == {'gzip': 1.0, 'deflate': 1.0, 'br': 0.8}
+    assert local_server.parse_accept_encoding('x-gzip;q=0.5, *;q=0, identity;q=bad') == {
+        'gzip': 0.5, '*': 0.0, 'identity': 0.0}
+    assert local_server.parse_accept_encoding('') == {}
+
+def test_negotiates_encoding(tmp_path, server):
+    page = ('<p>' + 'portfolio ' * 200 + '</p>').encode()
+    (tmp_path / 'page.html').write_bytes(page)
+    connection = server()
+
+    response, data = get(connection, '/page.html', **{'Accept-Encoding': 'gzip'})
+    assert response.getheader('Content-Encoding') == 'gzip' and gzip.decompress(data) == page
+    assert response.getheader('Vary') == 'Accept-Encoding'
+    assert int(response.getheader('Content-Length')) == len(data) < len(page)
+    gzip_etag = response.getheader('ETag')
+
+    response, data = get(connection, '/page.html', **{'Accept-Encoding': 'gzip;q=0, *;q=0'})
+    assert response.getheader('Content-Encoding') is None and data == page
+    assert response.getheader('ETag') != gzip_etag
+
+    response, _ = get(connection, '/page.html', **{'Accept-Encoding': 'gzip', 'If-None-Match': gzip_etag})
+    assert response.status == 304
+
+    # An up-to-date precompressed sibling is sent as is
+    sibling = gzip.compress(page, compresslevel=1, mtime=0)
+    assert sibling != gzip.compress(page, compresslevel=local_server.GZIP_LEVEL, mtime=0)
+    (tmp_path / 'page.html.gz').write_bytes(sibling)
+    response, data = get(connection, '/page.html', **{'Accept-Encoding': 'gzip'})
+    assert response.getheader('Content-Encoding') == 'gzip' and data == sibling
+
+    # Small bodies and non-text types are not compressed
+    (tmp_path / 'small.txt').write_bytes(b'tiny')
+    (tmp_path / 'photo.jpg').write_bytes(page)
+    for path in ('/small.txt', '/photo.jpg'):
+        response, _ = get(connection, path, **{'Accept-Encoding': 'gzip'})
+        assert response.getheader('Content-Encoding') is None
+
+# --- Connection handling ---
+def test_keep_alive_and_connection_limit(tmp_path):
+    (tmp_path / 'index.html').write_bytes(b'ok')
+    with serving(tmp_path, max_connections=1) as connect:
+        first = connect()
+        response, data = get(first, '/')
+        sock = first.sock
+        for _ in range(3):
+            response, data = get(first, '/index.html')
+            assert response.status == 200 and data == b'ok'
+        assert first.sock is sock
+
+        # The idle keep-alive connection still holds the only slot
+        response, _ = get(connect(), '/index.html')
+        assert response.status == 503 and response.getheader('Retry-After') == '1'
+        first.close()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Automated tests for optimize_images.py.
+
+Usage:
+    pytest test_optimize_images.py
+
+Requirements:
+    - pytest
+    - Pillow
+    - Python 3.8+
+"""
+import csv
+import json
+import threading
+from PIL import Image
+import pytest
+
+import optimize_images
+
+def make_images(directory, count, size=(64, 64)):
+    paths = []
+    for i in range(count):
+        path = directory / f'img{i}.jpg'
+        Image.new('RGB', size, (i * 40 % 256, 80, 160)).save(path)
+        paths.append(path)
+    return paths
+
+# --- Executor backends ---
+@pytest.mark.parametrize('backend', optimize_images.EXECUTOR_BACKENDS)
+def test_backends_report_unreadable_files(tmp_path, backend):
+    files = make_images(tmp_path, 4) + [tmp_path / 'missing.jpg']
+    results = {
+        path.name: error
+        for path, _, error in optimize_images.run_optimizer(
+            optimize_images.ImageOptimizer(), files, backend=backend, workers=2, chunk_size=2)
+    }
+    assert sorted(results) == sorted(f.name for f in files)
+    assert results['missing.jpg'] and not any(results[f.name] for f in files[:-1])
+
+# --- Target-SSIM quality cache ---
+def test_quality_cache_reuses_search_but_not_stale_baseline(monkeypatch):
+    img = Image.radial_gradient('L').convert('RGB')
+    optimizer = optimize_images.ImageOptimizer(quality=90, target_ssim=0.95)
+    stats = optimize_images.ImageStats(original_size=0, optimized_size=0, format=None, dimensions=img.size)
+    chosen = optimizer.pick_quality(img, 'JPEG', 'digest', stats)
+    optimizer.quality_cache = {'digest': stats.qualities}
+
+    def no_search(*args):
+        raise AssertionError('quality searched again')
+    monkeypatch.setattr(optimizer, 'search_quality', no_search)
+    optimizer.quality = 60
+    again = optimize_images.ImageStats(original_size=0, optimized_size=0, format=None, dimensions=img.size)
+    assert optimizer.pick_quality(img, 'JPEG', 'digest', again) == chosen
+    assert again.baseline_size == len(optimizer._save_bytes(img, 'JPEG')) < stats.baseline_size
+
+def test_save_bytes_honours_quality_zero():
+    img = Image.radial_gradient('L').convert('RGB')
+    optimizer = optimize_images.ImageOptimizer(quality=85)
+    assert len(optimizer._save_bytes(img, 'JPEG', 0)) < len(optimizer._save_bytes(img, 'JPEG'))
+
+# --- Duplicate detection ---
+def test_find_duplicate_groups(tmp_path):
+    gradient = Image.linear_gradient('L').convert('RGB')
+    gradient.save(tmp_path / 'a.jpg', quality=90)
+    (tmp_path / 'a_copy.jpg').write_bytes((tmp_path / 'a.jpg').read_bytes())
+    gradient.resize((128, 128)).save(tmp_path / 'a_small.jpg', quality=60)
+    Image.radial_gradient('L').convert('RGB').save(tmp_path / 'b.jpg')
+    gradient.save(tmp_path / 'a.png')
+    files = sorted(tmp_path.iterdir())
+    optimizer = optimize_images.ImageOptimizer()
+
+    exact = optimize_images.find_duplicate_groups(files, optimizer, 'exact')
+    assert exact == [[tmp_path / 'a.jpg', tmp_path / 'a_copy.jpg']]
+
+    # The PNG looks the same but is encoded to another format, so it is not grouped
+    near = optimize_images.find_duplicate_groups(files, optimizer, 'near')
+    assert [sorted(g) for g in near] == [[tmp_path / 'a.jpg', tmp_path / 'a_copy.jpg', tmp_path / 'a_small.jpg']]
+    assert near[0][0] in (tmp_path / 'a.jpg', tmp_path / 'a_copy.jpg')
+
+# --- Incremental runs and variants ---
+def test_manifest_skips_unchanged_and_removes_orphans(tmp_path):
+    a, b = make_images(tmp_path, 2)
+    first = optimize_images.process_directory(tmp_path)
+    assert sorted(s.skipped for s in first) == [False, False]
+    assert (tmp_path / optimize_images.MANIFEST_NAME).exists()
+
+    second = optimize_images.process_directory(tmp_path)
+    assert all(s.skipped for s in second)
+
+    b.unlink()
+    third = optimize_images.process_directory(tmp_path)
+    assert [s.path for s in third] == [a.name]
+    assert not (tmp_path / 'img1_optimized.jpg').exists()
+    assert (tmp_path / 'img0_optimized.jpg').exists()
+
+def test_orphan_cleanup_keeps_files_it_did_not_write(tmp_path):
+    make_images(tmp_path, 1)
+    Image.new('RGB', (8, 8)).save(tmp_path / 'logo_optimized.png')
+    optimize_images.process_directory(tmp_path)
+    optimize_images.process_directory(tmp_path)
+    assert (tmp_path / 'logo_optimized.png').exists()
+
+def test_run_without_widths_removes_variants(tmp_path):
+    make_images(tmp_path, 1, size=(800, 600))
+    optimize_images.process_directory(tmp_path, widths=[320, 640], formats=['jpeg'])
+    variant_map = tmp_path / optimize_images.VARIANT_MAP_NAME
+    assert variant_map.exists()
+    assert sorted(p.name for p in tmp_path.glob('img0_*optimized_*')) == ['img0_jpg_optimized_320w.jpg', 'img0_jpg_optimized_640w.jpg']
+
+    optimize_images.process_directory(tmp_path)
+    assert not variant_map.exists()
+    assert sorted(p.name for p in tmp_path.glob('img0_*optimized*')) == ['img0_optimized.jpg']
+
+def test_variants_of_sources_sharing_a_stem_do_not_collide(tmp_path):
+    Image.new('RGB', (800, 600), (200, 0, 0)).save(tmp_path / 'photo.jpg')
+    Image.new('RGB', (800, 600), (0, 0, 200)).save(tmp_path / 'photo.png')
+    optimize_images.process_directory(tmp_path, widths=[320], formats=['jpeg'])
+    variant_map = json.loads((tmp_path / optimize_images.VARIANT_MAP_NAME).read_text(encoding='utf-8'))
+    assert [v['path'] for v in variant_map['photo.jpg']] == ['photo_jpg_optimized_320w.jpg']
+    assert [v['path'] for v in variant_map['photo.png']] == ['photo_png_optimized_320w.jpg']
+    with Image.open(tmp_path / 'photo_png_optimized_320w.jpg') as img:
+        assert img.getpixel((0, 0))[2] > 150
+
+def test_variants_under_old_names_are_replaced(tmp_path):
+    make_images(tmp_path, 1, size=(800, 600))
+    optimize_images.process_directory(tmp_path, widths=[320], formats=['jpeg'])
+    # Rewrite the manifest as a run before the source extension was in the names
+    manifest_path = tmp_path / optimize_images.MANIFEST_NAME
+    manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+    entry = manifest['entries']['img0.jpg']
+    del entry['settings']['variant_names']
+    entry['outputs'] = ['img0_optimized_320w.jpg']
+    (tmp_path / 'img0_jpg_optimized_320w.jpg').rename(tmp_path / 'img0_optimized_320w.jpg')
+    manifest_path.write_text(json.dumps(manifest), encoding='utf-8')
+
+    stats = optimize_images.process_directory(tmp_path, widths=[320], formats=['jpeg'])
+    assert not stats[0].skipped
+    assert sorted(p.name for p in tmp_path.glob('img0_*optimized*')) == ['img0_jpg_optimized_320w.jpg']
+
+# --- Memory ---
+def test_low_memory_decodes_jpegs_at_reduced_scale(tmp_path):
+    Image.linear_gradient('L').convert('RGB').resize((2000, 1000)).save(tmp_path / 'big.jpg')
+    optimizer = optimize_images.ImageOptimizer(max_width=400, low_memory=True)
+    with Image.open(tmp_path / 'big.jpg') as img:
+        optimizer.apply_draft(img)
+        # The smallest DCT scale (1/2, 1/4, 1/8) that is still at least the target width
+        assert img.size == (500, 250)
+    optimize_images.process_directory(tmp_path, max_width=400, low_memory=True, use_manifest=False)
+    with Image.open(tmp_path / 'big_optimized.jpg') as out:
+        assert out.size == (400, 200)
+
+def test_memory_budget_waits_for_room():
+    budget = optimize_images.MemoryBudget(100)
+    entered = threading.Event()
+
+    def second():
+        with budget.reserve(60):
+            entered.set()
+    with budget.reserve(60):
+        thread = threading.Thread(target=second)
+        thread.start()
+        assert not entered.wait(0.2)
+    thread.join(5)
+    assert entered.is_set()
+    # A reservation larger than the budget is admitted when nothing else is in flight
+    with budget.reserve(500):
+        assert budget.in_use == 500
+    assert budget.in_use == 0
+
+# --- Report ---
+@pytest.mark.parametrize('suffix', ['.json', '.csv'])
+def test_write_report(tmp_path, suffix):
+    images = tmp_path / 'images'
+    images.mkdir()
+    make_images(images, 2)
+    stats = optimize_images.process_directory(images)
+    stats += optimize_images.process_directory(images)
+    report = tmp_path / f'report{suffix}'
+    optimize_images.write_report(report, stats)
+    if suffix == '.csv':
+        with open(report, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        assert list(rows[0]) == optimize_images.REPORT_FIELDS
+        assert [(row['path'], row['skipped']) for row in rows] == [
+            ('img0.jpg', 'False'), ('img0.jpg', 'True'), ('img1.jpg', 'False'), ('img1.jpg', 'True')]
+        return
+    data = json.loads(report.read_text(encoding='utf-8'))
+    summary = data['summary']
+    assert (summary['images'], summary['processed'], summary['skipped']) == (4, 2, 2)
+    assert summary['optimized_size'] == sum(s.optimized_size for s in stats)
+    assert set(summary['stage_times']) == set(optimize_images.STAGES)
+    assert [row['path'] for row in data['images']] == ['img0.jpg', 'img0.jpg', 'img1.jpg', 'img1.jpg']
+    assert data['images'][0]['width'] == 64
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Automated tests for validate_web.py.
+
+Usage:
+    pytest test_validate_web.py
+
+Requirements:
+    - pytest
+    - requests
+    - Pillow
+    - Python 3.8+
+"""
+import contextlib
+import functools
+import http.server
+import threading
+from PIL import Image
+import pytest
+
+import validate_web
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>Portfolio</title><link rel="stylesheet" href="style.css"></head>
+<body>
+  <a href="#contato">Contato</a>
+  <a href="#missing">Missing</a>
+  <a>No href</a>
+  <a href="projetos/">Projetos</a>
+  <img src="img/a.jpg" alt="A" loading="lazy" srcset="img/a-480.webp 480w, img/a-960.webp 960w">
+  <img src="img/b.jpg">
+  <section id="contato"></section>
+</body></html>"""
+
+@pytest.fixture(params=['lxml', 'html.parser'])
+def parser(request, monkeypatch):
+    if request.param == 'lxml':
+        if validate_web.etree is None:
+            pytest.skip('lxml not installed')
+    else:
+        monkeypatch.setattr(validate_web, 'etree', None)
+    return request.param
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+@contextlib.contextmanager
+def serving(directory, handler_class=QuietHandler):
+    """Serve directory over HTTP from a background thread; yields its base URL."""
+    handler = functools.partial(handler_class, directory=str(directory))
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{httpd.server_address[1]}/'
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+        thread.join()
+
+# --- Rule engine ---
+def test_rules_report_page_problems(parser):
+    page = validate_web.RuleEngine().analyze(PAGE, 'http://localhost/', collect_links=False)
+    assert page.issues == [
+        'Link missing href attribute',
+        'Image missing alt text: img/b.jpg',
+        'Broken anchor link: #missing',
+    ]
+    assert page.warnings == ['Image missing loading attribute: img/b.jpg', 'Missing meta description']
+    # Anchors are resolved against ids found anywhere in the page, even after the link
+    assert 'contato' in page.ids and page.links == []
+
+def test_rule_selection_and_link_collection(parser):
+    engine = validate_web.RuleEngine([validate_web.RULES['images']])
+    page = engine.analyze(PAGE, 'http://localhost/index.html')
+    assert page.issues == ['Image missing alt text: img/b.jpg']
+    assert ('http://localhost/projetos/', 'page') in page.links
+    assert ('http://localhost/img/a-960.webp', 'asset') in page.links
+    assert ('http://localhost/style.css', 'asset') in page.links
+    assert not any('#' in url for url, _ in page.links)
+    assert engine.pages == 1 and engine.timings['images'][0] == 2
+
+# --- Load test ---
+def test_percentile_uses_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert validate_web.percentile(values, 50) == 50.0
+    assert validate_web.percentile(values, 99) == 99.0
+    assert validate_web.percentile([0.2], 90) == 0.2
+    assert validate_web.percentile([], 50) == 0.0
+
+def test_summary_leaves_failed_requests_out_of_ttfb():
+    samples = [validate_web.LoadSample('/', 200, 0.1 * i, 0.01 * i, 100) for i in range(1, 11)]
+    samples += [
+        validate_web.LoadSample('/', 0, 5.0, None, 0, 'ConnectTimeout'),
+        validate_web.LoadSample('/', 500, 0.05, 0.001, 10, 'HTTP 500'),
+    ]
+    stats = validate_web.summarize_samples(samples, duration=2.0)
+    assert stats['requests'] == 12 and stats['errors'] == 2
+    assert stats['throughput'] == 6.0
+    assert stats['latency_p99'] == 5.0
+    assert stats['ttfb_p50'] == pytest.approx(0.05) and stats['ttfb_p99'] == pytest.approx(0.1)
+    assert stats['error_kinds'] == {'ConnectTimeout': 1, 'HTTP 500': 1}
+
+def test_parse_budget():
+    assert validate_web.parse_budget('p99=0.25') == ('p99', 0.25)
+    assert validate_web.parse_budget(' throughput =100') == ('throughput', 100.0)
+    for spec in ('p99', 'p42=1', 'p99=fast'):
+        with pytest.raises(ValueError):
+            validate_web.parse_budget(spec)
+
+def test_check_budgets_per_scope():
+    report = {
+        'overall': {'latency_p99': 0.3, 'throughput': 50.0, 'error_rate': 0.0},
+        'paths': {
+            '/': {'latency_p99': 0.1, 'throughput': 40.0, 'error_rate': 0.0},
+            '/slow': {'latency_p99': 0.5, 'throughput': 10.0, 'error_rate': 0.0},
+        },
+    }
+    checks = validate_web.check_budgets(report, [('p99', 0.2), ('throughput', 45.0)])
+    failed = [(c['budget'], c['scope']) for c in checks if not c['passed']]
+    assert failed == [('p99', 'overall'), ('p99', '/slow')]
+    # Throughput is only meaningful for the whole run
+    assert [c['scope'] for c in checks if c['budget'] == 'throughput'] == ['overall']
+
+# --- Asset audit ---
+def test_parse_page_budget():
+    assert validate_web.parse_size('2048') == 2048
+    assert validate_web.parse_size('500kb') == 500 * 1024
+    assert validate_web.parse_size(' 1.5MB') == int(1.5 * 1024 * 1024)
+    assert validate_web.parse_page_budget('images=100KB') == ('images', 100 * 1024)
+    assert validate_web.parse_page_budget('total = 1MB') == ('total', 1024 * 1024)
+    for spec in ('images', 'fonts=10KB', 'css=big'):
+        with pytest.raises(ValueError):
+            validate_web.parse_page_budget(spec)
+
+def test_audit_checks_page_weight_against_budgets(tmp_path):
+    Image.effect_noise((2400, 40), 64).convert('RGB').save(tmp_path / 'wide.jpg', quality=95)
+    Image.new('RGB', (8, 8)).save(tmp_path / 'icon.png')
+    (tmp_path / 'style.css').write_text('body { margin: 0; }')
+    (tmp_path / 'index.html').write_text(
+        '<html><head><meta name="description" content="x"><link rel="stylesheet" href="style.css"></head><body>'
+        '<img src="wide.jpg" alt="Wide" loading="lazy"><img src="icon.png" alt="Icon" loading="lazy">'
+        '<img src="icon.png" alt="Again" loading="lazy"><script src="missing.js"></script></body></html>'
+    )
+    sizes = {name: (tmp_path / name).stat().st_size for name in ('index.html', 'wide.jpg', 'icon.png', 'style.css')}
+    assert sizes['wide.jpg'] > validate_web.MODERN_FORMAT_MIN_BYTES
+    cache = tmp_path / 'audit-cache.json'
+
+    with serving(tmp_path) as base_url:
+        validator = validate_web.WebValidator(base_url, audit=True, audit_cache=cache,
+                                              page_budgets={'images': sizes['wide.jpg'], 'css': 1024})
+        result = validator.validate_page('/index.html')
+        validator.close()
+        # An image used twice counts once; the broken script adds a request but no bytes
+        assert result.weight == {
+            'html': sizes['index.html'], 'images': sizes['wide.jpg'] + sizes['icon.png'],
+            'css': sizes['style.css'], 'scripts': 0, 'total': sum(sizes.values()), 'requests': 5,
+        }
+        assert result.issues[0].startswith(f'Broken scripts asset: {base_url}missing.js (HTTP 404')
+        assert result.issues[1].startswith('Page weight over budget: images ')
+        assert len(result.issues) == 2
+        assert result.warnings == [
+            f'Image wider than {validate_web.MAX_IMAGE_WIDTH}px: {base_url}wide.jpg (2400x40)',
+            f'Image not offered in a modern format: {base_url}wide.jpg '
+            f'(image/jpeg, {validate_web.format_size(sizes["wide.jpg"])}; add WebP/AVIF)',
+        ]
+        assert validator.auditor.downloaded == 4
+
+        # A later run revalidates the cached assets instead of downloading them
+        again = validate_web.WebValidator(base_url, audit=True, audit_cache=cache)
+        assert again.validate_page('/index.html').weight == result.weight
+        again.close()
+        assert (again.auditor.revalidated, again.auditor.downloaded) == (3, 1)
+
+# --- Crawl ---
+def test_crawl_follows_same_origin_links_to_max_depth(tmp_path):
+    (tmp_path / 'index.html').write_text(
+        '<a href="a.html">A</a><a href="a.html#top">A again</a><a href="http://example.com/">External</a>'
+        '<img src="logo.png" alt="Logo" loading="lazy"><img src="gone.png" alt="Gone" loading="lazy">'
+    )
+    (tmp_path / 'a.html').write_text('<a href="b.html">B</a><a href="/">Home</a>')
+    (tmp_path / 'b.html').write_text('<a href="c.html">C</a>')
+    Image.new('RGB', (8, 8)).save(tmp_path / 'logo.png')
+    with serving(tmp_path) as base_url:
+        results = validate_web.crawl_site(base_url, max_depth=2, concurrency=4)
+    assert sorted(results) == ['/', '/a.html', '/b.html', '/gone.png', '/logo.png']
+    assert [results[path].depth for path in ('/', '/a.html', '/b.html')] == [0, 1, 2]
+    assert results['/b.html'].referrer == '/a.html'
+    assert results['/gone.png'].kind == 'asset' and results['/gone.png'].issues == ['HTTP 404']
+    assert not results['/logo.png'].issues
+
+def test_crawl_stops_at_max_urls(tmp_path):
+    (tmp_path / 'index.html').write_text(''.join(f'<a href="p{i}.html">{i}</a>' for i in range(10)))
+    for i in range(10):
+        (tmp_path / f'p{i}.html').write_text('page')
+    with serving(tmp_path) as base_url:
+        results = validate_web.crawl_site(base_url, max_urls=4)
+    assert len(results) == 4 and '/' in results
+
+def test_crawl_with_audit_requests_each_asset_once(tmp_path):
+    requests_seen = []
+
+    class RecordingHandler(QuietHandler):
+        def send_head(self):
+            requests_seen.append((self.command, self.path))
+            return super().send_head()
+    Image.new('RGB', (8, 8)).save(tmp_path / 'logo.png')
+    (tmp_path / 'style.css').write_text('body { margin: 0; }')
+    (tmp_path / 'index.html').write_text(
+        '<link rel="stylesheet" href="style.css"><img src="logo.png" alt="Logo" loading="lazy">'
+        '<img src="gone.png" alt="Gone" loading="lazy">'
+    )
+    with serving(tmp_path, RecordingHandler) as base_url:
+        results = validate_web.crawl_site(base_url, audit=True)
+    assert sorted(requests_seen) == [('GET', '/'), ('GET', '/gone.png'), ('GET', '/logo.png'), ('GET', '/style.css')]
+    assert results['/gone.png'].issues == ['HTTP 404'] and results['/gone.png'].status_code == 404
+    assert results['/logo.png'].status_code == 200 and not results['/logo.png'].issues
@@ -2,19 +2,58 @@
 """
 Web validation script for PYX Engenharia portfolio.
 Validates HTML, accessibility, and performance metrics.
+
+Pages are fetched concurrently, each worker thread with its own pooled
+requests session. With --crawl the site is explored breadth-first from the
+given paths (default /): same-origin links are validated as pages up to
+--max-depth, and the stylesheets, scripts and images they reference are
+checked for broken URLs; every URL is fetched once.
+
+HTML is analyzed in a single pass by a rule engine: each rule registers the
+elements it visits, ids are indexed during the same pass so anchor links are
+checked in constant time, and the time spent in each rule is recorded
+(--rule-stats). lxml's parser is used when installed, html.parser otherwise.
+
+--load N sends N requests per path over keep-alive connections, either
+back-to-back from --concurrency workers or at a fixed --rate, and reports
+throughput, latency and time-to-first-byte percentiles and error rates;
+--budget turns these into pass/fail gates for CI.
+
+--audit measures page weight: images, stylesheets and scripts referenced by
+each page are fetched concurrently (once per run, whichever pages share
+them), totals are compared with --page-budget limits, and images that are
+much larger than displayed or not offered in a modern format are reported.
+Asset metadata is kept in --audit-cache and revalidated with conditional
+requests, so unchanged assets cost a 304 on the next run.
 """
 
 import os
 from pathlib import Path
 import logging
 import argparse
+import collections
+import html.parser
+import io
+import itertools
 import json
-from typing import Dict, List, Optional
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
 import requests
-from bs4 import BeautifulSoup
 import concurrent.futures
-from dataclasses import dataclass
-from urllib.parse import urljoin
+from dataclasses import asdict, dataclass, field
+from urllib.parse import urldefrag, urljoin, urlsplit
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
 
 # Configure logging
 logging.basicConfig(
@@ -23,6 +62,45 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+DEFAULT_CONCURRENCY = 16
+DEFAULT_MAX_DEPTH = 5
+DEFAULT_MAX_URLS = 2000
+DEFAULT_TIMEOUT = 10.0
+# Elements whose URL attributes are followed while crawling: tag -> (attribute, kind)
+LINK_ATTRIBUTES = {
+    "a": ("href", "page"),
+    "iframe": ("src", "page"),
+    "link": ("href", "asset"),
+    "script": ("src", "asset"),
+    "img": ("src", "asset"),
+    "source": ("src", "asset"),
+    "video": ("poster", "asset"),
+}
+SRCSET_TAGS = ("img", "source")
+SLOW_PAGE_SECONDS = 3.0
+LOAD_PERCENTILES = (50, 90, 99)
+# --budget names -> (statistic, "max" or "min")
+BUDGET_METRICS = {
+    **{f"p{p}": (f"latency_p{p}", "max") for p in LOAD_PERCENTILES},
+    **{f"ttfb_p{p}": (f"ttfb_p{p}", "max") for p in LOAD_PERCENTILES},
+    "error_rate": ("error_rate", "max"),
+    "throughput": ("throughput", "min"),
+}
+DEFAULT_AUDIT_CACHE = Path(".validate_web_cache.json")
+AUDIT_CACHE_VERSION = 1
+# Asset categories of a page's weight, and the --page-budget names
+WEIGHT_KINDS = ("html", "images", "css", "scripts")
+PAGE_BUDGET_KINDS = ("total",) + WEIGHT_KINDS
+SIZE_UNITS = {"B": 1, "KB": 1024, "MB": 1024 * 1024}
+MODERN_IMAGE_TYPES = ("image/webp", "image/avif", "image/svg+xml")
+MODERN_IMAGE_SUFFIXES = (".webp", ".avif", ".svg")
+# Images are "much larger than needed" past this many pixels per displayed
+# pixel (high-density screens use 2), or past this width when none is declared
+MAX_IMAGE_DENSITY = 2.0
+MAX_IMAGE_WIDTH = 1920
+# Legacy-format images smaller than this are not worth converting
+MODERN_FORMAT_MIN_BYTES = 10 * 1024
+
 @dataclass
 class ValidationResult:
     """Results from web validation."""
@@ -31,57 +109,567 @@ class ValidationResult:
     load_time: float
     issues: List[str]
     warnings: List[str]
+    kind: str = "page"
+    depth: int = 0
+    # First page that linked here (crawl mode)
+    referrer: Optional[str] = None
+    # Transfer bytes by WEIGHT_KINDS, plus total and requests (--audit)
+    weight: Optional[Dict[str, int]] = None
+
+@dataclass
+class AssetRef:
+    """A resource a page loads, as referenced in its HTML."""
+    kind: str
+    url: str
+    # Displayed width from the width attribute, if any (images)
+    width: Optional[int] = None
+    srcset: bool = False
+    # A webp/avif alternative is offered through srcset or <picture>
+    modern_alternative: bool = False
+
+@dataclass
+class AssetInfo:
+    """What fetching an asset revealed; cached between runs by URL."""
+    url: str
+    status_code: int
+    content_type: str = ""
+    transfer_bytes: int = 0
+    width: Optional[int] = None
+    height: Optional[int] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    error: Optional[str] = None
+    # Seconds taken by this run's request (a 304 when revalidated)
+    load_time: float = 0.0
+
+def normalize_url(url: str) -> str:
+    """URL without fragment and with an explicit root path, used for deduplication."""
+    url = urldefrag(url).url
+    parts = urlsplit(url)
+    if not parts.path:
+        url = parts._replace(path="/").geturl()
+    return url
+
+def result_key(url: str) -> str:
+    """Path (and query) of url, the key of crawl results."""
+    parts = urlsplit(url)
+    return parts.path + (f"?{parts.query}" if parts.query else "")
+
+@dataclass
+class PageContext:
+    """What rules know about, and report on, the page being analyzed."""
+    url: str
+    issues: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    # Every id attribute seen so far
+    ids: Set[str] = field(default_factory=set)
+    # (absolute URL, "page" or "asset") of every link and resource reference
+    links: List[Tuple[str, str]] = field(default_factory=list)
+    # Resources counted in the page weight (--audit)
+    assets: List[AssetRef] = field(default_factory=list)
+
+class Rule:
+    """A check run during the single pass over a page.
+
+    A new instance is created for every page. visit is called for each start
+    tag listed in tags, with the attributes as a dict (None for attributes
+    without a value); finish runs after the whole document, when page.ids is
+    complete.
+    """
+
+    name = "base"
+    tags: Tuple[str, ...] = ()
+
+    def __init__(self, page: PageContext):
+        self.page = page
+
+    def visit(self, tag: str, attrs: Dict[str, Optional[str]]) -> None:
+        pass
+
+    def finish(self) -> None:
+        pass
+
+class MetaDescriptionRule(Rule):
+    name = "meta-description"
+    tags = ("meta",)
+
+    def __init__(self, page: PageContext):
+        super().__init__(page)
+        self.found = False
+
+    def visit(self, tag, attrs):
+        if attrs.get("name") == "description":
+            self.found = True
+
+    def finish(self):
+        if not self.found:
+            self.page.warnings.append("Missing meta description")
+
+class ImageRule(Rule):
+    name = "images"
+    tags = ("img",)
+
+    def visit(self, tag, attrs):
+        src = attrs.get("src") or "unknown"
+        if not attrs.get("alt"):
+            self.page.issues.append(f"Image missing alt text: {src}")
+        if not attrs.get("loading"):
+            self.page.warnings.append(f"Image missing loading attribute: {src}")
+
+class AnchorRule(Rule):
+    name = "links"
+    tags = ("a",)
+
+    def __init__(self, page: PageContext):
+        super().__init__(page)
+        self.fragments = []
+
+    def visit(self, tag, attrs):
+        href = attrs.get("href")
+        if not href:
+            self.page.issues.append("Link missing href attribute")
+        elif href.startswith("#"):
+            self.fragments.append(href)
+
+    def finish(self):
+        for href in self.fragments:
+            if href[1:] not in self.page.ids:
+                self.page.issues.append(f"Broken anchor link: {href}")
+
+class LinkCollector(Rule):
+    """Gathers the URLs followed in crawl mode."""
+
+    name = "collect-links"
+    tags = tuple(LINK_ATTRIBUTES)
+
+    def visit(self, tag, attrs):
+        attribute, kind = LINK_ATTRIBUTES[tag]
+        value = attrs.get(attribute)
+        if value and not value.startswith("#"):
+            self.page.links.append((urljoin(self.page.url, value.strip()), kind))
+        if tag in SRCSET_TAGS and attrs.get("srcset"):
+            for candidate in attrs["srcset"].split(","):
+                candidate = candidate.strip().split(" ")[0]
+                if candidate:
+                    self.page.links.append((urljoin(self.page.url, candidate), "asset"))
+
+def _is_modern_srcset(srcset: Optional[str]) -> bool:
+    return any(candidate.strip().split(" ")[0].lower().endswith(MODERN_IMAGE_SUFFIXES)
+               for candidate in (srcset or "").split(","))
+
+class AssetCollector(Rule):
+    """Gathers the images, stylesheets and scripts counted by --audit."""
+
+    name = "collect-assets"
+    tags = ("img", "link", "script", "picture", "source")
+
+    def __init__(self, page: PageContext):
+        super().__init__(page)
+        # A modern <source> seen in the current <picture>, which ends with its <img>
+        self.modern_source = False
+
+    def add(self, kind: str, value: Optional[str], **details) -> None:
+        if not value:
+            return
+        url = urljoin(self.page.url, value.strip())
+        if urlsplit(url).scheme in ("http", "https"):
+            self.page.assets.append(AssetRef(kind, url, **details))
+
+    def visit(self, tag, attrs):
+        if tag == "picture":
+            self.modern_source = False
+        elif tag == "source":
+            if (attrs.get("type") or "").lower() in MODERN_IMAGE_TYPES or _is_modern_srcset(attrs.get("srcset")):
+                self.modern_source = True
+        elif tag == "img":
+            width = attrs.get("width") or ""
+            self.add(
+                "images", attrs.get("src"),
+                width=int(width) if width.isdigit() else None,
+                srcset=bool(attrs.get("srcset")),
+                modern_alternative=self.modern_source or _is_modern_srcset(attrs.get("srcset"))
+            )
+            self.modern_source = False
+        elif tag == "link":
+            if "stylesheet" in (attrs.get("rel") or "").lower().split():
+                self.add("css", attrs.get("href"))
+        elif tag == "script":
+            self.add("scripts", attrs.get("src"))
+
+RULES = {rule.name: rule for rule in (MetaDescriptionRule, ImageRule, AnchorRule)}
+
+class _StartTagParser(html.parser.HTMLParser):
+    def __init__(self, start: Callable[[str, dict], None]):
+        super().__init__(convert_charrefs=True)
+        self._start = start
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, dict(attrs))
+
+class _LxmlTarget:
+    def __init__(self, start: Callable[[str, dict], None]):
+        self._start = start
+
+    def start(self, tag, attrib):
+        if isinstance(tag, str):
+            self._start(tag, dict(attrib))
+
+    def end(self, tag):
+        pass
+
+    def data(self, data):
+        pass
+
+    def close(self):
+        return None
+
+def parse_start_tags(text: str, start: Callable[[str, dict], None]) -> None:
+    """Call start(tag, attrs) for every start tag of the document, without building a tree."""
+    if not text.strip():
+        return
+    if etree is not None:
+        parser = etree.HTMLParser(target=_LxmlTarget(start))
+    else:
+        parser = _StartTagParser(start)
+    parser.feed(text)
+    parser.close()
+
+class RuleEngine:
+    """Runs rules over pages in one parsing pass and accumulates per-rule timings.
+
+    Shared between threads; timings are merged under a lock once per page.
+    """
+
+    def __init__(self, rules: Optional[List[type]] = None):
+        self.rules = list(RULES.values()) if rules is None else list(rules)
+        self.pages = 0
+        # Rule name ("parse" for the parser itself) -> [elements visited, seconds]
+        self.timings: Dict[str, List[float]] = collections.defaultdict(lambda: [0, 0.0])
+        self._lock = threading.Lock()
+
+    def analyze(self, text: str, url: str, collect_links: bool = True) -> PageContext:
+        page = PageContext(url)
+        rules = [rule(page) for rule in self.rules] + ([LinkCollector(page)] if collect_links else [])
+        visitors: Dict[str, List[Rule]] = collections.defaultdict(list)
+        for rule in rules:
+            for tag in rule.tags:
+                visitors[tag].append(rule)
+        timings = {rule.name: [0, 0.0] for rule in rules}
+        perf_counter = time.perf_counter
+
+        def start(tag, attrs):
+            element_id = attrs.get("id")
+            if element_id:
+                page.ids.add(element_id)
+            for rule in visitors.get(tag, ()):
+                visit_start = perf_counter()
+                rule.visit(tag, attrs)
+                timing = timings[rule.name]
+                timing[0] += 1
+                timing[1] += perf_counter() - visit_start
+
+        start_time = perf_counter()
+        parse_start_tags(text, start)
+        parse_time = perf_counter() - start_time - sum(t[1] for t in timings.values())
+        for rule in rules:
+            finish_start = perf_counter()
+            rule.finish()
+            timings[rule.name][1] += perf_counter() - finish_start
+
+        with self._lock:
+            self.pages += 1
+            self.timings["parse"][1] += parse_time
+            for name, (count, seconds) in timings.items():
+                self.timings[name][0] += count
+                self.timings[name][1] += seconds
+        return page
+
+    def report(self) -> List[str]:
+        """One line per rule, slowest first."""
+        with self._lock:
+            timings = sorted(self.timings.items(), key=lambda item: -item[1][1])
+        lines = []
+        for name, (count, seconds) in timings:
+            elements = f" ({count} elements)" if name != "parse" else ""
+            lines.append(f"{name:<18} {seconds * 1000:9.1f}ms{elements}")
+        return lines
+
+def parse_size(value: str) -> int:
+    """Bytes from a size such as 500KB, 1.5MB or 2048."""
+    value = value.strip().upper()
+    for unit in sorted(SIZE_UNITS, key=len, reverse=True):
+        if value.endswith(unit):
+            return int(float(value[:-len(unit)]) * SIZE_UNITS[unit])
+    return int(float(value))
+
+def parse_page_budget(spec: str) -> Tuple[str, int]:
+    """Parse a --page-budget KIND=SIZE argument."""
+    kind, sep, size = spec.partition("=")
+    kind = kind.strip()
+    if not sep or kind not in PAGE_BUDGET_KINDS:
+        raise ValueError(f"expected KIND=SIZE with KIND one of {', '.join(PAGE_BUDGET_KINDS)}, got {spec!r}")
+    return kind, parse_size(size)
+
+def format_size(size: int) -> str:
+    return f"{size / 1024:.1f}KB" if size < 1024 * 1024 else f"{size / 1024 / 1024:.2f}MB"
+
+class AssetAuditor:
+    """Fetches page assets concurrently and checks page weight and images.
+
+    Each URL is fetched at most once per run however many pages use it.
+    Results are kept in cache_path and revalidated with If-None-Match /
+    If-Modified-Since, so an unchanged asset costs a 304 on later runs.
+    """
+
+    def __init__(self, validator: "WebValidator", concurrency: int = DEFAULT_CONCURRENCY,
+                 cache_path: Optional[Path] = None, budgets: Optional[Dict[str, int]] = None):
+        self.validator = validator
+        self.cache_path = cache_path
+        self.budgets = budgets or {}
+        self.cached: Dict[str, dict] = {}
+        self.used: Dict[str, dict] = {}
+        self.revalidated = 0
+        self.downloaded = 0
+        self._futures: Dict[str, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(concurrency, thread_name_prefix="audit")
+        if cache_path is not None and cache_path.exists():
+            try:
+                data = json.loads(cache_path.read_text(encoding="utf-8"))
+                if data.get("version") == AUDIT_CACHE_VERSION:
+                    self.cached = data.get("assets", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read audit cache {cache_path}: {e}")
+
+    def fetch(self, url: str) -> concurrent.futures.Future:
+        with self._lock:
+            future = self._futures.get(url)
+            if future is None:
+                future = self._futures[url] = self._executor.submit(self._fetch, url)
+        return future
+
+    def requested(self, url: str) -> Optional[concurrent.futures.Future]:
+        """The fetch of url if one was started in this run, else None."""
+        with self._lock:
+            return self._futures.get(url)
+
+    def _fetch(self, url: str) -> AssetInfo:
+        cached = self.cached.get(url)
+        headers = {}
+        if cached is not None:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        try:
+            start_time = time.perf_counter()
+            response = self.validator.session.get(url, headers=headers, timeout=self.validator.timeout)
+            load_time = time.perf_counter() - start_time
+        except requests.RequestException as e:
+            return AssetInfo(url=url, status_code=0, error=type(e).__name__)
+        if response.status_code == 304 and cached is not None:
+            info = AssetInfo(**{**cached, "load_time": load_time})
+            with self._lock:
+                self.revalidated += 1
+                self.used[url] = cached
+            return info
+
+        content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        # Bytes on the wire: Content-Length is the encoded size when the body was compressed
+        length = response.headers.get("Content-Length", "")
+        info = AssetInfo(
+            url=url,
+            status_code=response.status_code,
+            content_type=content_type,
+            transfer_bytes=int(length) if length.isdigit() else len(response.content),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            load_time=load_time,
+        )
+        if response.status_code == 200 and content_type.startswith("image/") and Image is not None:
+            try:
+                with Image.open(io.BytesIO(response.content)) as img:
+                    info.width, info.height = img.size
+            except Exception:
+                # SVG and formats Pillow cannot read have no intrinsic size check
+                pass
+        with self._lock:
+            self.downloaded += 1
+            if response.status_code == 200 and (info.etag or info.last_modified):
+                self.used[url] = asdict(info)
+        return info
+
+    def audit(self, page: PageContext, html_bytes: int) -> Tuple[Dict[str, int], List[str], List[str]]:
+        """Page weight by kind, and the issues and warnings about its assets."""
+        refs = {}
+        for ref in page.assets:
+            # The same URL counts once per page, as the browser loads it once
+            refs.setdefault(ref.url, ref)
+        futures = {url: self.fetch(url) for url in refs}
+        weight = dict.fromkeys(WEIGHT_KINDS, 0)
+        weight["html"] = html_bytes
+        issues, warnings = [], []
+        for url, ref in refs.items():
+            info = futures[url].result()
+            if info.error or info.status_code >= 400:
+                issues.append(f"Broken {ref.kind} asset: {url} ({info.error or f'HTTP {info.status_code}'})")
+                continue
+            weight[ref.kind] += info.transfer_bytes
+            if ref.kind == "images":
+                warnings += self.check_image(ref, info)
+        weight["total"] = sum(weight[kind] for kind in WEIGHT_KINDS)
+        weight["requests"] = 1 + len(refs)
+        for kind, limit in self.budgets.items():
+            if weight[kind] > limit:
+                issues.append(f"Page weight over budget: {kind} {format_size(weight[kind])} > {format_size(limit)}")
+        return weight, issues, warnings
+
+    def check_image(self, ref: AssetRef, info: AssetInfo) -> List[str]:
+        warnings = []
+        # With srcset the browser picks a candidate, so src is only the fallback
+        if info.width and not ref.srcset:
+            if ref.width and info.width > ref.width * MAX_IMAGE_DENSITY:
+                warnings.append(f"Image much larger than displayed: {ref.url} ({info.width}px wide for width={ref.width})")
+            elif not ref.width and info.width > MAX_IMAGE_WIDTH:
+                warnings.append(f"Image wider than {MAX_IMAGE_WIDTH}px: {ref.url} ({info.width}x{info.height})")
+        if (info.content_type not in MODERN_IMAGE_TYPES and not ref.modern_alternative
+                and info.transfer_bytes >= MODERN_FORMAT_MIN_BYTES):
+            warnings.append(
+                f"Image not offered in a modern format: {ref.url} "
+                f"({info.content_type or 'unknown type'}, {format_size(info.transfer_bytes)}; add WebP/AVIF)"
+            )
+        return warnings
+
+    def close(self) -> None:
+        """Wait for pending fetches and merge the assets seen in this run into the cache."""
+        self._executor.shutdown(wait=True)
+        if self.cache_path is None or not self.used:
+            return
+        # Runs over different pages share the file, so earlier entries are kept
+        data = {"version": AUDIT_CACHE_VERSION, "assets": {**self.cached, **self.used}}
+        tmp_path = self.cache_path.with_name(f".{self.cache_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(data, indent=1, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, self.cache_path)
 
 class WebValidator:
-    """Validates web pages for various aspects."""
+    """Validates web pages for various aspects.
+
+    Safe to share between threads: every thread gets its own session, with a
+    connection pool sized for pool_size concurrent requests.
+    """
     
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    def __init__(self, base_url: str = "http://localhost:8000", timeout: float = DEFAULT_TIMEOUT,
+                 pool_size: int = DEFAULT_CONCURRENCY, rules: Optional[List[type]] = None,
+                 audit: bool = False, audit_cache: Optional[Path] = None,
+                 page_budgets: Optional[Dict[str, int]] = None):
         self.base_url = base_url
-        self.session = requests.Session()
-        self.session.headers.update({
+        rules = list(RULES.values()) if rules is None else list(rules)
+        self.engine = RuleEngine(rules + [AssetCollector] if audit else rules)
+        self.auditor = AssetAuditor(self, pool_size, audit_cache, page_budgets) if audit else None
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (compatible; PYX-Validator/1.0)'
-        })
-    
+        }
+        self._local = threading.local()
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        """The calling thread's session."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.headers)
+            adapter = requests.adapters.HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    def close(self) -> None:
+        if self.auditor is not None:
+            self.auditor.close()
+        with self._sessions_lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+
     def validate_page(self, path: str = "/") -> ValidationResult:
         """Validate a single page."""
-        url = urljoin(self.base_url, path)
+        return self.check_page(urljoin(self.base_url, path), collect_links=False)[0]
+
+    def check_asset(self, url: str) -> ValidationResult:
+        """Check that a referenced resource loads, without downloading its body.
+
+        Assets the auditor already requested for a page are not requested again.
+        """
+        future = self.auditor.requested(url) if self.auditor is not None else None
+        if future is not None:
+            info = future.result()
+            if info.error:
+                issues = [f"Validation error: {info.error}"]
+            else:
+                issues = [f"HTTP {info.status_code}"] if info.status_code >= 400 else []
+            return ValidationResult(url=url, status_code=info.status_code, load_time=info.load_time,
+                                    issues=issues, warnings=[], kind="asset")
+        try:
+            start_time = time.perf_counter()
+            response = self.session.head(url, allow_redirects=True, timeout=self.timeout)
+            if response.status_code in (405, 501):
+                # HEAD not supported: fall back to GET
+                response = self.session.get(url, timeout=self.timeout)
+            load_time = time.perf_counter() - start_time
+        except Exception as e:
+            logger.error(f"Error checking {url}: {e}")
+            return ValidationResult(url=url, status_code=0, load_time=0, issues=[f"Validation error: {str(e)}"],
+                                    warnings=[], kind="asset")
+        issues = [f"HTTP {response.status_code}"] if response.status_code >= 400 else []
+        return ValidationResult(url=url, status_code=response.status_code, load_time=load_time,
+                                issues=issues, warnings=[], kind="asset")
+
+    def check_page(self, url: str, collect_links: bool = True) -> Tuple[ValidationResult, List[Tuple[str, str]]]:
+        """Validate the page at url; also returns the links found in it if collect_links."""
         issues = []
         warnings = []
+        links = []
         
         try:
             # Measure load time
-            start_time = requests.utils.time()
-            response = self.session.get(url)
-            load_time = requests.utils.time() - start_time
+            start_time = time.perf_counter()
+            response = self.session.get(url, timeout=self.timeout)
+            load_time = time.perf_counter() - start_time
             
             # Basic checks
             if response.status_code != 200:
                 issues.append(f"HTTP {response.status_code}")
+
+            if response.status_code >= 400 or "html" not in response.headers.get("Content-Type", "text/html"):
+                # An error page or a linked document (PDF, image, ...): only its status matters
+                return ValidationResult(
+                    url=url,
+                    status_code=response.status_code,
+                    load_time=load_time,
+                    issues=issues,
+                    warnings=warnings
+                ), links
             
-            # Parse HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Check meta tags
-            if not soup.find('meta', attrs={'name': 'description'}):
-                warnings.append("Missing meta description")
-            
-            # Check images
-            for img in soup.find_all('img'):
-                if not img.get('alt'):
-                    issues.append(f"Image missing alt text: {img.get('src', 'unknown')}")
-                if not img.get('loading'):
-                    warnings.append(f"Image missing loading attribute: {img.get('src', 'unknown')}")
-            
-            # Check links
-            for link in soup.find_all('a'):
-                if not link.get('href'):
-                    issues.append("Link missing href attribute")
-                elif link['href'].startswith('#'):
-                    if not soup.find(id=link['href'][1:]):
-                        issues.append(f"Broken anchor link: {link['href']}")
+            # Single pass over the document for every rule
+            page = self.engine.analyze(response.text, response.url, collect_links)
+            issues += page.issues
+            warnings += page.warnings
+            links = page.links
+            weight = None
+            if self.auditor is not None:
+                weight, asset_issues, asset_warnings = self.auditor.audit(page, len(response.content))
+                issues += asset_issues
+                warnings += asset_warnings
             
             # Check performance
-            if load_time > 3.0:
+            if load_time > SLOW_PAGE_SECONDS:
                 warnings.append(f"Slow page load: {load_time:.2f}s")
             
             return ValidationResult(
@@ -89,8 +677,9 @@ class WebValidator:
                 status_code=response.status_code,
                 load_time=load_time,
                 issues=issues,
-                warnings=warnings
-            )
+                warnings=warnings,
+                weight=weight
+            ), links
             
         except Exception as e:
             logger.error(f"Error validating {url}: {e}")
@@ -100,43 +689,282 @@ class WebValidator:
                 load_time=0,
                 issues=[f"Validation error: {str(e)}"],
                 warnings=[]
-            )
+            ), links
+
+def log_result(path: str, result: ValidationResult) -> None:
+    if result.issues:
+        source = f" (linked from {result.referrer})" if result.referrer else ""
+        logger.error(f"\nIssues found in {path}{source}:")
+        for issue in result.issues:
+            logger.error(f"  - {issue}")
+    
+    if result.warnings:
+        logger.warning(f"\nWarnings for {path}:")
+        for warning in result.warnings:
+            logger.warning(f"  - {warning}")
+    
+    if result.weight:
+        parts = ", ".join(f"{kind} {format_size(result.weight[kind])}" for kind in WEIGHT_KINDS if result.weight[kind])
+        logger.info(f"Page weight of {path}: {format_size(result.weight['total'])} in "
+                    f"{result.weight['requests']} requests ({parts})")
+    logger.info(f"Validated {path} in {result.load_time:.2f}s")
+
+def log_rule_stats(engine: RuleEngine) -> None:
+    logger.info(f"\nRule timings over {engine.pages} pages ({'lxml' if etree is not None else 'html.parser'}):")
+    for line in engine.report():
+        logger.info(f"  {line}")
 
-def validate_site(base_url: str, paths: List[str]) -> Dict[str, ValidationResult]:
-    """Validate multiple pages of the site."""
-    validator = WebValidator(base_url)
+def log_audit_stats(auditor: AssetAuditor) -> None:
+    logger.info(f"Assets downloaded: {auditor.downloaded}, revalidated from cache: {auditor.revalidated}")
+
+def validate_site(base_url: str, paths: List[str], concurrency: int = DEFAULT_CONCURRENCY,
+                  rules: Optional[List[type]] = None, rule_stats: bool = False,
+                  **validator_options) -> Dict[str, ValidationResult]:
+    """Validate multiple pages of the site; validator_options are passed to WebValidator."""
+    validator = WebValidator(base_url, pool_size=concurrency, rules=rules, **validator_options)
     results = {}
     
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        future_to_path = {
-            executor.submit(validator.validate_page, path): path
-            for path in paths
-        }
-        
-        for future in concurrent.futures.as_completed(future_to_path):
-            path = future_to_path[future]
-            try:
-                result = future.result()
-                results[path] = result
-                
-                # Log results
-                if result.issues:
-                    logger.error(f"\nIssues found in {path}:")
-                    for issue in result.issues:
-                        logger.error(f"  - {issue}")
-                
-                if result.warnings:
-                    logger.warning(f"\nWarnings for {path}:")
-                    for warning in result.warnings:
-                        logger.warning(f"  - {warning}")
-                
-                logger.info(f"Validated {path} in {result.load_time:.2f}s")
-                
-            except Exception as e:
-                logger.error(f"Failed to validate {path}: {e}")
+    try:
+        with concurrent.futures.ThreadPoolExecutor(concurrency) as executor:
+            future_to_path = {
+                executor.submit(validator.validate_page, path): path
+                for path in paths
+            }
+            
+            for future in concurrent.futures.as_completed(future_to_path):
+                path = future_to_path[future]
+                try:
+                    result = future.result()
+                    results[path] = result
+                    log_result(path, result)
+                except Exception as e:
+                    logger.error(f"Failed to validate {path}: {e}")
+    finally:
+        validator.close()
     
+    if rule_stats:
+        log_rule_stats(validator.engine)
+    if validator.auditor is not None:
+        log_audit_stats(validator.auditor)
+    return results
+
+def crawl_site(base_url: str, paths: List[str] = ("/",), concurrency: int = DEFAULT_CONCURRENCY,
+               max_depth: int = DEFAULT_MAX_DEPTH, max_urls: int = DEFAULT_MAX_URLS,
+               rules: Optional[List[type]] = None, rule_stats: bool = False,
+               **validator_options) -> Dict[str, ValidationResult]:
+    """Validate the site breadth-first from paths, following same-origin links.
+
+    Pages linked up to max_depth hops from a start path are validated and
+    their links followed; assets referenced by any validated page are checked.
+    Work is scheduled as soon as a URL is discovered, so the pool never waits
+    for a whole level to finish; at most max_urls distinct URLs are fetched.
+    validator_options are passed to WebValidator.
+    """
+    origin = urlsplit(base_url)[:2]
+    validator = WebValidator(base_url, pool_size=concurrency, rules=rules, **validator_options)
+    results = {}
+    seen: Set[str] = set()
+    skipped = 0
+
+    def schedule(url: str, kind: str, depth: int, referrer: Optional[str]) -> None:
+        nonlocal skipped
+        url = normalize_url(url)
+        if url in seen or urlsplit(url)[:2] != origin:
+            return
+        if len(seen) >= max_urls:
+            skipped += 1
+            return
+        seen.add(url)
+        if kind == "page":
+            future = executor.submit(validator.check_page, url)
+        else:
+            future = executor.submit(lambda: (validator.check_asset(url), []))
+        pending[future] = (url, kind, depth, referrer)
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(concurrency) as executor:
+            pending = {}
+            for path in paths:
+                schedule(urljoin(base_url, path), "page", 0, None)
+            while pending:
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    url, kind, depth, referrer = pending.pop(future)
+                    result, links = future.result()
+                    result.kind, result.depth, result.referrer = kind, depth, referrer
+                    path = result_key(url)
+                    results[path] = result
+                    log_result(path, result)
+                    for link, link_kind in links:
+                        if link_kind == "page" and depth >= max_depth:
+                            continue
+                        schedule(link, link_kind, depth + 1, path)
+    finally:
+        validator.close()
+
+    if skipped:
+        logger.warning(f"Stopped after {max_urls} URLs; {skipped} more links were not followed (see --max-urls)")
+    if rule_stats:
+        log_rule_stats(validator.engine)
+    if validator.auditor is not None:
+        log_audit_stats(validator.auditor)
     return results
 
+@dataclass
+class LoadSample:
+    """One request of a load test; latency and ttfb in seconds.
+
+    ttfb is None when no response headers arrived.
+    """
+    path: str
+    status_code: int
+    latency: float
+    ttfb: Optional[float]
+    size: int
+    error: Optional[str] = None
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+def summarize_samples(samples: List[LoadSample], duration: float) -> dict:
+    latencies = sorted(sample.latency for sample in samples)
+    # Failed requests would pull time to first byte down exactly when errors rise
+    ttfbs = sorted(sample.ttfb for sample in samples if sample.ttfb is not None and not sample.error)
+    errors = collections.Counter(sample.error for sample in samples if sample.error)
+    count = len(samples)
+    stats = {
+        "requests": count,
+        "errors": sum(errors.values()),
+        "error_rate": sum(errors.values()) / count if count else 0.0,
+        "throughput": count / duration if duration else 0.0,
+        "bytes": sum(sample.size for sample in samples),
+        "latency_mean": sum(latencies) / count if count else 0.0,
+        "latency_max": latencies[-1] if latencies else 0.0,
+    }
+    for p in LOAD_PERCENTILES:
+        stats[f"latency_p{p}"] = percentile(latencies, p)
+    for p in LOAD_PERCENTILES:
+        stats[f"ttfb_p{p}"] = percentile(ttfbs, p)
+    stats["error_kinds"] = dict(errors)
+    return stats
+
+def load_test(base_url: str, paths: List[str], requests_per_path: int, concurrency: int = DEFAULT_CONCURRENCY,
+              rate: Optional[float] = None, timeout: float = DEFAULT_TIMEOUT) -> dict:
+    """Send requests_per_path GETs to every path and summarize them, overall and per path.
+
+    Without rate, concurrency workers send requests back-to-back (closed
+    loop). With rate, request i is due at i / rate seconds and its latency is
+    measured from that moment, so time spent waiting for a free worker counts
+    as latency instead of silently lowering the load. ttfb is always measured
+    from when the request was sent until the response headers arrived.
+    """
+    validator = WebValidator(base_url, timeout, pool_size=concurrency)
+    total = requests_per_path * len(paths)
+    jobs = itertools.count()
+    jobs_lock = threading.Lock()
+    urls = [urljoin(base_url, path) for path in paths]
+    start_time = time.perf_counter()
+
+    def worker() -> List[LoadSample]:
+        session = validator.session
+        samples = []
+        while True:
+            with jobs_lock:
+                job = next(jobs)
+            if job >= total:
+                return samples
+            index = job % len(paths)
+            due = start_time + job / rate if rate else None
+            if due is not None and due > time.perf_counter():
+                time.sleep(due - time.perf_counter())
+            sent = time.perf_counter()
+            status_code, size, error = 0, 0, None
+            ttfb = None
+            try:
+                with session.get(urls[index], timeout=timeout, stream=True) as response:
+                    ttfb = time.perf_counter() - sent
+                    status_code = response.status_code
+                    size = len(response.content)
+                if status_code >= 400:
+                    error = f"HTTP {status_code}"
+            except requests.RequestException as e:
+                error = type(e).__name__
+            samples.append(LoadSample(paths[index], status_code, time.perf_counter() - (due or sent), ttfb, size, error))
+
+    samples = []
+    try:
+        with concurrent.futures.ThreadPoolExecutor(concurrency) as executor:
+            for future in [executor.submit(worker) for _ in range(concurrency)]:
+                samples += future.result()
+    finally:
+        validator.close()
+    duration = time.perf_counter() - start_time
+
+    by_path = collections.defaultdict(list)
+    for sample in samples:
+        by_path[sample.path].append(sample)
+    return {
+        "settings": {"url": base_url, "requests_per_path": requests_per_path,
+                     "concurrency": concurrency, "rate": rate},
+        "duration": duration,
+        "overall": summarize_samples(samples, duration),
+        "paths": {path: summarize_samples(by_path[path], duration) for path in paths},
+    }
+
+def parse_budget(spec: str) -> Tuple[str, float]:
+    """Parse a --budget METRIC=VALUE argument."""
+    name, sep, value = spec.partition("=")
+    name = name.strip()
+    if not sep or name not in BUDGET_METRICS:
+        raise ValueError(f"expected METRIC=VALUE with METRIC one of {', '.join(BUDGET_METRICS)}, got {spec!r}")
+    return name, float(value)
+
+def check_budgets(report: dict, budgets: List[Tuple[str, float]]) -> List[dict]:
+    """Evaluate budgets against the overall stats and every path (throughput: overall only)."""
+    checks = []
+    scopes = [("overall", report["overall"])] + list(report["paths"].items())
+    for name, limit in budgets:
+        statistic, kind = BUDGET_METRICS[name]
+        for scope, stats in scopes:
+            if statistic == "throughput" and scope != "overall":
+                continue
+            value = stats[statistic]
+            passed = value <= limit if kind == "max" else value >= limit
+            checks.append({"budget": name, "scope": scope, "limit": limit, "value": value, "passed": passed})
+    return checks
+
+def log_load_report(report: dict) -> None:
+    logger.info(f"\nLoad test: {report['overall']['requests']} requests in {report['duration']:.2f}s")
+    logger.info(f"{'path':<30} {'req':>7} {'req/s':>9} {'p50':>8} {'p90':>8} {'p99':>8} {'ttfb p50':>9} {'errors':>7}")
+    for path, stats in list(report["paths"].items()) + [("(overall)", report["overall"])]:
+        logger.info(
+            f"{path:<30} {stats['requests']:>7} {stats['throughput']:>9.1f} "
+            f"{stats['latency_p50'] * 1000:>6.1f}ms {stats['latency_p90'] * 1000:>6.1f}ms "
+            f"{stats['latency_p99'] * 1000:>6.1f}ms {stats['ttfb_p50'] * 1000:>7.1f}ms {stats['error_rate']:>7.1%}"
+        )
+    for kind, count in report["overall"]["error_kinds"].items():
+        logger.warning(f"  {count} x {kind}")
+
+def run_load_test(args) -> int:
+    report = load_test(args.url, args.paths, args.load, args.concurrency, args.rate)
+    log_load_report(report)
+    report["budgets"] = check_budgets(report, args.budget)
+    for check in report["budgets"]:
+        relation = "<=" if BUDGET_METRICS[check["budget"]][1] == "max" else ">="
+        message = (f"Budget {check['budget']} {relation} {check['limit']:g} for {check['scope']}: "
+                   f"{check['value']:.4g}")
+        if check["passed"]:
+            logger.info(f"{message} (passed)")
+        else:
+            logger.error(f"{message} (FAILED)")
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        logger.info(f"Results saved to {args.output}")
+    return 1 if any(not check["passed"] for check in report["budgets"]) else 0
+
 def main():
     parser = argparse.ArgumentParser(description="Validate web pages")
     parser.add_argument(
@@ -148,7 +976,84 @@ def main():
         "-p", "--paths",
         nargs="+",
         default=["/"],
-        help="Paths to validate (default: /)"
+        help="Paths to validate, or to start crawling from (default: /)"
+    )
+    parser.add_argument(
+        "--crawl",
+        action="store_true",
+        help="Follow same-origin links and assets breadth-first from the paths"
+    )
+    parser.add_argument(
+        "-c", "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Concurrent requests (default: {DEFAULT_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=DEFAULT_MAX_DEPTH,
+        help=f"Link hops followed from the start paths when crawling (default: {DEFAULT_MAX_DEPTH})"
+    )
+    parser.add_argument(
+        "--max-urls",
+        type=int,
+        default=DEFAULT_MAX_URLS,
+        help=f"Distinct URLs fetched at most when crawling (default: {DEFAULT_MAX_URLS})"
+    )
+    parser.add_argument(
+        "--rules",
+        nargs="+",
+        choices=sorted(RULES),
+        help="HTML rules to run (default: all)"
+    )
+    parser.add_argument(
+        "--rule-stats",
+        action="store_true",
+        help="Log the time spent parsing and in each rule"
+    )
+    parser.add_argument(
+        "--audit",
+        action="store_true",
+        help="Measure page weight and check the images, stylesheets and scripts each page loads"
+    )
+    parser.add_argument(
+        "--page-budget",
+        action="append",
+        default=[],
+        metavar="KIND=SIZE",
+        help=f"Report pages over a byte budget with --audit, e.g. total=1MB or images=500KB; repeatable. "
+             f"Kinds: {', '.join(PAGE_BUDGET_KINDS)}"
+    )
+    parser.add_argument(
+        "--audit-cache",
+        type=Path,
+        default=DEFAULT_AUDIT_CACHE,
+        help=f"Asset metadata revalidated on the next --audit run (default: {DEFAULT_AUDIT_CACHE})"
+    )
+    parser.add_argument(
+        "--no-audit-cache",
+        action="store_true",
+        help="Fetch every asset in full, without reading or writing the audit cache"
+    )
+    parser.add_argument(
+        "--load",
+        type=int,
+        metavar="N",
+        help="Load test instead of validating: send N requests to every path"
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        help="Load test at a fixed arrival rate (requests/s overall) instead of back-to-back"
+    )
+    parser.add_argument(
+        "--budget",
+        action="append",
+        default=[],
+        metavar="METRIC=VALUE",
+        help=f"Fail the load test past a limit, e.g. p99=0.25 or error_rate=0.01 (seconds for latencies; "
+             f"throughput is a minimum); repeatable. Metrics: {', '.join(BUDGET_METRICS)}"
     )
     parser.add_argument(
         "-o", "--output",
@@ -157,16 +1062,57 @@ def main():
     )
     
     args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.load is not None:
+        if args.load < 1:
+            parser.error("--load must be at least 1")
+        if args.crawl:
+            parser.error("--load cannot be combined with --crawl")
+        if args.rate is not None and args.rate <= 0:
+            parser.error("--rate must be positive")
+    elif args.rate is not None or args.budget:
+        parser.error("--rate and --budget require --load")
+    if args.page_budget and not args.audit:
+        parser.error("--page-budget requires --audit")
+    try:
+        args.page_budget = dict(parse_page_budget(spec) for spec in args.page_budget)
+    except ValueError as e:
+        parser.error(f"--page-budget: {e}")
+    try:
+        args.budget = [parse_budget(spec) for spec in args.budget]
+    except ValueError as e:
+        parser.error(f"--budget: {e}")
     
     try:
-        results = validate_site(args.url, args.paths)
+        if args.load is not None:
+            return run_load_test(args)
+        rules = [RULES[name] for name in args.rules] if args.rules else None
+        audit_options = {}
+        if args.audit:
+            audit_options = {
+                "audit": True,
+                "audit_cache": None if args.no_audit_cache else args.audit_cache,
+                "page_budgets": args.page_budget,
+            }
+        start_time = time.perf_counter()
+        if args.crawl:
+            results = crawl_site(args.url, args.paths, args.concurrency, args.max_depth, args.max_urls,
+                                 rules, args.rule_stats, **audit_options)
+        else:
+            results = validate_site(args.url, args.paths, args.concurrency, rules, args.rule_stats, **audit_options)
+        duration = time.perf_counter() - start_time
         
         # Print summary
         total_issues = sum(len(r.issues) for r in results.values())
         total_warnings = sum(len(r.warnings) for r in results.values())
         
         logger.info("\nValidation Summary:")
-        logger.info(f"Pages validated: {len(results)}")
+        pages = sum(1 for r in results.values() if r.kind == "page")
+        logger.info(f"Pages validated: {pages}")
+        if len(results) > pages:
+            logger.info(f"Assets checked: {len(results) - pages}")
+        logger.info(f"Duration: {duration:.2f}s")
         logger.info(f"Total issues: {total_issues}")
         logger.info(f"Total warnings: {total_warnings}")
         
@@ -178,7 +1124,11 @@ def main():
                     "status_code": result.status_code,
                     "load_time": result.load_time,
                     "issues": result.issues,
-                    "warnings": result.warnings
+                    "warnings": result.warnings,
+                    "kind": result.kind,
+                    "depth": result.depth,
+                    "referrer": result.referrer,
+                    "weight": result.weight
                 }
                 for path, result in results.items()
             }